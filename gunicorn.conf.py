@@ -0,0 +1,27 @@
+"""Gunicorn settings, read from the working directory when it starts.
+
+NOTE: The app isn't imported here, so it's still imported by each worker (unless
+`--preload` is passed).
+"""
+import os
+import shutil
+
+# Seconds a worker may take to answer a request before it's killed. It must outlast a
+# render in the render pool, which may wait for a free render process, and for it to
+# start, before rendering; otherwise the worker is killed before it can answer.
+# NOTE: As `RENDER_TIMEOUT_SECONDS` and `RENDER_WORKER_STARTUP_TIMEOUT_SECONDS` default
+# in `sipn_reanalysis_plots/constants/render.py`
+timeout = int(2 * float(os.environ.get('RENDER_TIMEOUT_SECONDS', 120)) + 120 + 30)
+
+
+def on_starting(server):
+    """Clear metrics written by a previous run of the server."""
+    # NOTE: As `METRICS_DIR` defaults in `sipn_reanalysis_plots/constants/paths.py`
+    metrics_dir = os.environ.get(
+        'PROMETHEUS_MULTIPROC_DIR',
+        os.path.join(
+            os.environ.get('CACHE_DIR', '/tmp/sipn-reanalysis-plots'),
+            'metrics',
+        ),
+    )
+    shutil.rmtree(metrics_dir, ignore_errors=True)
@@ -35,10 +35,43 @@ def handle_http_exception(e):
     return response
 
 
+# Compute dask collections with a scheduler started by each (forked) worker process on
+# first use.
+from sipn_reanalysis_plots.util.dask_scheduler import (  # noqa: E402
+    configure_dask_scheduler,
+)
+
+configure_dask_scheduler()
+
+# Time each request's stages, for its `Server-Timing` header and log line
+from sipn_reanalysis_plots.util.request_timing import (  # noqa: E402
+    configure_request_timing,
+)
+
+configure_request_timing()
+
+# Profile a sample of requests, or those with a token, if enabled
+from sipn_reanalysis_plots.util.profiler import configure_profiler  # noqa: E402
+
+configure_profiler()
+
 # NOTE: This is a circular import, but it's specified by the Flask docs:
 #     https://flask.palletsprojects.com/en/3.1.x/patterns/packages/
 import sipn_reanalysis_plots.routes  # noqa: E402, F401
 
+# Map climatology blocks before gunicorn forks workers (with `--preload`), so they share
+# the pages.
+if os.environ.get('CLIMATOLOGY_PRELOAD'):
+    from sipn_reanalysis_plots.util.data.climatology_store import preload_climatology
+
+    preload_climatology()
+
+# Likewise, warm the plotting libraries' state and the availability index.
+if os.environ.get('STARTUP_PRELOAD'):
+    from sipn_reanalysis_plots.util.startup import warm_process_state
+
+    warm_process_state()
+
 # Profile data produced with this middleware may be visualized from file using snakeviz.
 if os.environ.get('ENABLE_PROFILER'):
     logger.info(f'Running profiler: {app.config}')
@@ -49,12 +82,3 @@ if os.environ.get('ENABLE_PROFILER'):
         app.wsgi_app,
         profile_dir='./.prof',
     )
-
-# Dask dashboard can be accessed at port 8787.
-# NOTE: There is a strange race condition that results in a "disconnected" dashboard,
-# and I haven't figured out a solution.  Recommend starting up dev server with these
-# lines commented, then uncommenting them (the dev server will reload and the dashboard
-# will be connected to the right cluster).
-# if os.environ.get('ENABLE_DASK_DASHBOARD'):
-#     from dask.distributed import Client
-#     client = Client()
@@ -8,10 +8,43 @@ class Variable(TypedDict):
     levels: tuple[str] | tuple[str, str, str] | tuple[str, str, str, str]
 
 
-@dataclass
+@dataclass(frozen=True)
 class YearMonth:
     year: int
     month: int
 
     def __str__(self):
         return f'{self.year}{self.month:02}'
+
+
+@dataclass(frozen=True)
+class FileFingerprint:
+    """Identify a version of a file without reading it."""
+
+    size: int
+    mtime_ns: int
+
+    def __str__(self):
+        return f'{self.size}:{self.mtime_ns}'
+
+
+@dataclass(frozen=True, kw_only=True)
+class Region:
+    """A lat/lon box, optionally of its ocean only.
+
+    Longitudes run from `min_lon` east to `max_lon`, so a box with `min_lon > max_lon`
+    crosses the antimeridian.
+    """
+
+    long_name: str
+    min_lat: float
+    max_lat: float = 90
+    min_lon: float = -180
+    max_lon: float = 180
+    ocean_only: bool = False
+
+    def __str__(self):
+        return (
+            f'lat={self.min_lat}:{self.max_lat}/lon={self.min_lon}:{self.max_lon}'
+            f'/ocean_only={self.ocean_only:d}'
+        )
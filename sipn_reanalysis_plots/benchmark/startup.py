@@ -0,0 +1,88 @@
+"""Time starting a web worker and serving its first plot, with and without preloading.
+
+Each run is a new process with an empty cache, so its first request renders the plot.
+Without preloading, the worker imports the app itself, as gunicorn's workers do by
+default. With it, the app is imported with `$STARTUP_PRELOAD` and the process forks, as
+gunicorn does with `--preload`, and the forked worker serves the request.
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from sipn_reanalysis_plots.constants.paths import PROJECT_DIR
+from sipn_reanalysis_plots.util.data.list import max_daily_data_date
+
+# NOTE: Run with `-c`, as running a module of this package would import the app before
+# it's timed.
+_WORKER_SCRIPT = '''
+import json, os, sys, time
+
+start = time.perf_counter()
+from sipn_reanalysis_plots import app
+imported = time.perf_counter()
+
+preload = bool(os.environ.get('STARTUP_PRELOAD'))
+if preload:
+    read_fd, write_fd = os.pipe()
+    if os.fork() == 0:
+        forked = time.perf_counter()
+        status = app.test_client().get(sys.argv[1]).status_code
+        times = {'status': status, 'first_request': time.perf_counter() - forked}
+        os.write(write_fd, json.dumps(times).encode())
+        os._exit(0)
+    os.close(write_fd)
+    with os.fdopen(read_fd) as f:
+        times = json.load(f)
+    os.wait()
+else:
+    status = app.test_client().get(sys.argv[1]).status_code
+    times = {'status': status, 'first_request': time.perf_counter() - imported}
+
+worker = times['first_request'] + (0 if preload else imported - start)
+print(json.dumps({**times, 'import': imported - start, 'worker': worker}))
+'''
+
+
+def first_plot_url() -> str:
+    """Build the URL of the latest day's plot."""
+    date = max_daily_data_date()
+    return f'/daily/plot.png?start_date={date:%Y-%m-%d}&variable=T&analysis_level=2m'
+
+
+def measure_startup(url: str, *, preload: bool, repeat: int = 3) -> dict[str, float]:
+    """Time importing the app, and a worker serving `url` as its first request.
+
+    Returns the median seconds spent importing the app ("import"), serving the first
+    request ("first_request") and from the worker starting until it's served
+    ("worker"; preloading moves the import before workers start).
+    """
+    runs = [_run_worker(url, preload=preload) for _ in range(repeat)]
+    return {
+        key: statistics.median(run[key] for run in runs)
+        for key in ('import', 'first_request', 'worker')
+    }
+
+
+def _run_worker(url: str, *, preload: bool) -> dict[str, float]:
+    env = {key: value for key, value in os.environ.items() if key != 'STARTUP_PRELOAD'}
+    env['PYTHONPATH'] = os.pathsep.join([str(PROJECT_DIR), env.get('PYTHONPATH', '')])
+    if preload:
+        env['STARTUP_PRELOAD'] = '1'
+
+    with tempfile.TemporaryDirectory(prefix='sipn-reanalysis-plots-cache-') as cache:
+        result = subprocess.run(
+            [sys.executable, '-c', _WORKER_SCRIPT, url],
+            env={**env, 'CACHE_DIR': cache},
+            capture_output=True,
+            text=True,
+        )
+    if result.returncode != 0:
+        raise RuntimeError(f'Worker failed:\n{result.stderr}')
+
+    times = json.loads(result.stdout.splitlines()[-1])
+    if times['status'] != 200:
+        raise RuntimeError(f'First request failed with status {times["status"]}: {url}')
+    return times
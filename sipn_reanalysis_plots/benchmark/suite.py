@@ -0,0 +1,282 @@
+"""Time the stages of serving a plot, from listing data files to encoding images.
+
+Run with `invoke benchmark.run`, which points `$DATA_DIR` at a tree of synthetic data
+(see `synthetic_data.py`) and `$CACHE_DIR` at an empty directory before the app is
+imported. Stores and caches which a stage would normally be served from (e.g. the grid
+store) are bypassed, so each stage's own work is timed; in-process state which
+persists between requests (e.g. open files) is kept, as it is in a web worker.
+
+Results are saved as JSON, so runs can be compared to flag regressions.
+"""
+import datetime as dt
+import functools
+import os
+import platform
+import statistics
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+import xarray as xra
+from matplotlib.figure import Figure
+
+from sipn_reanalysis_plots._types import YearMonth
+from sipn_reanalysis_plots.constants.paths import DATA_DAILY_DIR, DATA_DIR
+from sipn_reanalysis_plots.constants.plot import PLOT_DPI, PLOT_DPI_HIGH_RES
+from sipn_reanalysis_plots.constants.version import VERSION
+from sipn_reanalysis_plots.util.climatology import (
+    diff_from_daily_climatology,
+    diff_from_monthly_climatology,
+)
+from sipn_reanalysis_plots.util.data import list as data_list
+from sipn_reanalysis_plots.util.data.read import (
+    read_cfsr_daily_file,
+    read_cfsr_daily_files,
+    read_cfsr_monthly_file,
+    read_cfsr_monthly_files,
+)
+from sipn_reanalysis_plots.util.data.reduce import reduce_dataset
+from sipn_reanalysis_plots.util.fig import fig_to_pngs
+from sipn_reanalysis_plots.util.plot import PlotData, plot_figure
+
+RESULTS_FORMAT_VERSION = 1
+
+# Settings which change what's timed, recorded with the results
+_ENVVARS = (
+    'CLIMATOLOGY_PRELOAD',
+    'DASK_SCHEDULER',
+    'DASK_THREADS',
+    'NETCDF_FILE_POOL_SIZE',
+    'PLOT_ENGINE',
+)
+
+_VARIABLE = 'T'
+_LEVEL = '2m'
+_RANGE_DAYS = 30
+_RANGE_MONTHS = 12
+
+_benchmarks: dict[str, Callable[[], Any]] = {}
+
+
+def _benchmark(name: str) -> Callable[[Callable[[], Any]], Callable[[], Any]]:
+    def register(func: Callable[[], Any]) -> Callable[[], Any]:
+        _benchmarks[name] = func
+        return func
+
+    return register
+
+
+def run_benchmarks(
+    *,
+    repeat: int = 5,
+    only: str | None = None,
+) -> dict[str, Any]:
+    """Time each benchmark (or only those named starting with `only`) `repeat` times.
+
+    Each benchmark is run once before it's timed, e.g. to import what it uses.
+    """
+    results: dict[str, dict[str, Any]] = {}
+    for name, func in _benchmarks.items():
+        if only and not name.startswith(only):
+            continue
+
+        func()
+        seconds = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            seconds.append(time.perf_counter() - start)
+
+        results[name] = {
+            'seconds': seconds,
+            'best': min(seconds),
+            'median': statistics.median(seconds),
+        }
+        print(f'{name}: median {results[name]["median"] * 1000:.1f}ms')
+
+    return {
+        'format': RESULTS_FORMAT_VERSION,
+        'created': dt.datetime.now().isoformat(timespec='seconds'),
+        'version': VERSION,
+        'python': platform.python_version(),
+        'host': platform.node(),
+        'data_dir': str(DATA_DIR),
+        'daily_files': len(data_list.list_daily_data_paths()),
+        'env': {name: os.environ.get(name) for name in _ENVVARS},
+        'results': results,
+    }
+
+
+def compare_results(
+    baseline: dict[str, Any],
+    current: dict[str, Any],
+    *,
+    threshold: float = 0.2,
+) -> list[str]:
+    """List benchmarks whose median time grew by more than `threshold` (a fraction)."""
+    regressions = []
+    for name, result in current['results'].items():
+        if name not in baseline['results']:
+            continue
+
+        before = baseline['results'][name]['median']
+        after = result['median']
+        if after > before * (1 + threshold):
+            regressions.append(
+                f'{name}: {before * 1000:.1f}ms -> {after * 1000:.1f}ms'
+                f' (+{after / before - 1:.0%})'
+            )
+
+    return regressions
+
+
+@_benchmark('list/daily-manifest')
+def _list_daily_from_manifest() -> None:
+    data_list._daily_index.invalidate()
+    data_list.list_daily_data_paths()
+
+
+@_benchmark('list/daily-glob')
+def _list_daily_by_globbing() -> None:
+    index = data_list._AvailabilityIndex(
+        DATA_DAILY_DIR,
+        data_list._date_from_daily_path,
+        data_list._date_ordinal,
+        manifest_file=Path('/nonexistent'),
+    )
+    index.listing()
+
+
+@_benchmark('read/daily-file')
+def _read_daily_file() -> None:
+    with read_cfsr_daily_file(
+        _end_date(),
+        variable=_VARIABLE,
+        level=_LEVEL,
+    ) as dataset:
+        dataset.load()
+
+
+@_benchmark(f'read/daily-files-{_RANGE_DAYS}d')
+def _read_daily_files() -> None:
+    _load_daily_range()
+
+
+@_benchmark('read/monthly-file')
+def _read_monthly_file() -> None:
+    with read_cfsr_monthly_file(
+        _end_month(),
+        variable=_VARIABLE,
+        level=_LEVEL,
+    ) as dataset:
+        dataset.load()
+
+
+@_benchmark(f'read/monthly-files-{_RANGE_MONTHS}m')
+def _read_monthly_files() -> None:
+    _load_monthly_range()
+
+
+@_benchmark(f'reduce/daily-{_RANGE_DAYS}d')
+def _reduce_daily() -> None:
+    reduce_dataset(_daily_range(), variable=_VARIABLE, level=_LEVEL).compute()
+
+
+@_benchmark(f'anomaly/daily-{_RANGE_DAYS}d')
+def _daily_anomaly() -> None:
+    diff_from_daily_climatology(
+        _daily_grid(),
+        variable=_VARIABLE,
+        level=_LEVEL,
+        start_date=_start_date(),
+        end_date=_end_date(),
+    ).compute()
+
+
+@_benchmark(f'anomaly/monthly-{_RANGE_MONTHS}m')
+def _monthly_anomaly() -> None:
+    diff_from_monthly_climatology(
+        _monthly_grid(),
+        variable=_VARIABLE,
+        level=_LEVEL,
+        start_month=_start_month(),
+        end_month=_end_month(),
+    ).compute()
+
+
+@_benchmark('plot/pcolormesh')
+def _plot_pcolormesh() -> None:
+    plot_figure(PlotData(data_array=_daily_grid(), title='Benchmark'))
+
+
+@_benchmark('plot/contourf')
+def _plot_contourf() -> None:
+    plot_figure(
+        PlotData(data_array=_daily_grid(), title='Benchmark'),
+        as_filled_contour=True,
+    )
+
+
+@_benchmark('render/pngs')
+def _render_pngs() -> None:
+    fig_to_pngs(_figure(), dpis=[PLOT_DPI, PLOT_DPI_HIGH_RES])
+
+
+def _load_daily_range() -> xra.Dataset:
+    with read_cfsr_daily_files(
+        start_date=_start_date(),
+        end_date=_end_date(),
+        variable=_VARIABLE,
+        level=_LEVEL,
+    ) as dataset:
+        return dataset.load()
+
+
+def _load_monthly_range() -> xra.Dataset:
+    with read_cfsr_monthly_files(
+        start_month=_start_month(),
+        end_month=_end_month(),
+        variable=_VARIABLE,
+        level=_LEVEL,
+    ) as dataset:
+        return dataset.load()
+
+
+# Inputs of later stages, read once
+@functools.cache
+def _daily_range() -> xra.Dataset:
+    return _load_daily_range()
+
+
+@functools.cache
+def _daily_grid() -> xra.DataArray:
+    return reduce_dataset(_daily_range(), variable=_VARIABLE, level=_LEVEL)
+
+
+@functools.cache
+def _monthly_grid() -> xra.DataArray:
+    return reduce_dataset(_load_monthly_range(), variable=_VARIABLE, level=_LEVEL)
+
+
+@functools.cache
+def _figure() -> Figure:
+    return plot_figure(PlotData(data_array=_daily_grid(), title='Benchmark'))
+
+
+def _end_date() -> dt.date:
+    return data_list.max_daily_data_date()
+
+
+def _start_date() -> dt.date:
+    return _end_date() - dt.timedelta(days=_RANGE_DAYS - 1)
+
+
+def _end_month() -> YearMonth:
+    return data_list.max_monthly_data_yearmonth()
+
+
+def _start_month() -> YearMonth:
+    end_month = _end_month()
+    months = end_month.year * 12 + end_month.month - _RANGE_MONTHS
+    return YearMonth(year=months // 12, month=months % 12 + 1)
@@ -0,0 +1,189 @@
+"""Generate a tree of synthetic CFSR-like data files, for benchmarking.
+
+Files are laid out and named as ingested data is (see `constants/paths.py`), with every
+variable and level on a polar stereographic grid like CFSR's, and a manifest. There are
+as many daily files as the real archive, but only the latest `full_days` days (and the
+months overlapping them) hold data. Older files are placeholders with the same
+variables, whose chunks are never written: they read as NaNs, and take a few KiB each.
+
+NOTE: Placeholders are separate files, not links to full ones. The netCDF library
+treats links to a file as the same file, which must not be opened twice at once (see
+`util/data/file_pool.py`).
+"""
+import datetime as dt
+from pathlib import Path
+
+import netCDF4
+import numpy as np
+
+from sipn_reanalysis_plots.constants.paths import (
+    DATA_CLIMATOLOGY_DAILY_FILE,
+    DATA_CLIMATOLOGY_DIR,
+    DATA_CLIMATOLOGY_MONTHLY_FILE,
+    DATA_DAILY_DIR,
+    DATA_DAILY_TEMPLATE,
+    DATA_DIR,
+    DATA_MANIFEST_FILE,
+    DATA_MONTHLY_DIR,
+    DATA_MONTHLY_TEMPLATE,
+)
+from sipn_reanalysis_plots.constants.variables import VARIABLES
+from sipn_reanalysis_plots.util.data.manifest import update_manifest
+from sipn_reanalysis_plots.util.date import date_range, month_range
+
+# About as many days as the real archive, which starts in 1979
+DEFAULT_DAYS = 16_000
+DEFAULT_END_DATE = dt.date(1979, 1, 1) + dt.timedelta(days=DEFAULT_DAYS - 1)
+
+# The extent of CFSR's polar stereographic grid, in meters
+_GRID_EXTENT = 5e6
+
+# Typical value (at the pole), variation towards the grid's edge, and units of each
+# variable
+_VALUES: dict[str, tuple[float, float, str]] = {
+    'U': (0, 10, 'm/s'),
+    'V': (0, 10, 'm/s'),
+    'WSPD': (8, 6, 'm/s'),
+    'T': (250, 40, 'K'),
+    'SH': (0.002, 0.008, 'kg/kg'),
+    'RH': (80, -30, '%'),
+    'HGT': (3000, 600, 'gpm'),
+    'PWAT': (5, 25, 'kg/m^2'),
+    'MSLP': (101_000, 1000, 'Pa'),
+}
+
+
+def generate_data_tree(
+    root: Path,
+    *,
+    days: int = DEFAULT_DAYS,
+    end_date: dt.date = DEFAULT_END_DATE,
+    full_days: int = 400,
+    grid_size: int = 161,
+) -> None:
+    """Write daily, monthly and climatology files, and a manifest, under `root`."""
+    dates = list(date_range(end_date - dt.timedelta(days=days - 1), end_date))
+    full_start_date = dates[-full_days] if full_days else end_date + dt.timedelta(1)
+    grid = _Grid(grid_size)
+
+    daily_dir = root / DATA_DAILY_DIR.relative_to(DATA_DIR)
+    daily_dir.mkdir(parents=True, exist_ok=True)
+    for date in dates:
+        grid.write(
+            daily_dir / DATA_DAILY_TEMPLATE.format(date=date),
+            time_dim='t',
+            labels=[0],
+            seed=date.toordinal() if date >= full_start_date else None,
+        )
+
+    monthly_dir = root / DATA_MONTHLY_DIR.relative_to(DATA_DIR)
+    monthly_dir.mkdir(parents=True, exist_ok=True)
+    full_start_month = (full_start_date.year, full_start_date.month)
+    for month in month_range(dates[0], end_date):
+        full = (month.year, month.month) >= full_start_month
+        grid.write(
+            monthly_dir / DATA_MONTHLY_TEMPLATE.format(month=month),
+            time_dim='t',
+            labels=[0],
+            seed=month.year * 12 + month.month if full else None,
+        )
+
+    climatology_dir = root / DATA_CLIMATOLOGY_DIR.relative_to(DATA_DIR)
+    climatology_dir.mkdir(parents=True, exist_ok=True)
+    leap_year = date_range(dt.date(2020, 1, 1), dt.date(2020, 12, 31))
+    grid.write(
+        climatology_dir / DATA_CLIMATOLOGY_DAILY_FILE.name,
+        time_dim='date',
+        labels=[f'{date:%m-%d}' for date in leap_year],
+        seed=0,
+    )
+    grid.write(
+        climatology_dir / DATA_CLIMATOLOGY_MONTHLY_FILE.name,
+        time_dim='month',
+        labels=list(range(1, 13)),
+        seed=0,
+    )
+
+    update_manifest(
+        [*daily_dir.glob('*'), *monthly_dir.glob('*')],
+        manifest_file=root / DATA_MANIFEST_FILE.relative_to(DATA_DIR),
+    )
+
+
+class _Grid:
+    """Write files of every variable and level on a polar stereographic grid."""
+
+    def __init__(self, size: int):
+        self.x = np.linspace(-_GRID_EXTENT, _GRID_EXTENT, size)
+        self.y = self.x[::-1].copy()
+
+        # Distance from the pole, from 0 to ~1 at the grid's edges, and angle around it
+        x, y = np.meshgrid(self.x, self.y)
+        self._distance = np.hypot(x, y) / _GRID_EXTENT
+        self._angle = np.arctan2(y, x)
+
+    def write(
+        self,
+        path: Path,
+        *,
+        time_dim: str,
+        labels: list,
+        seed: int | None,
+    ) -> None:
+        """Write a file with a value for each of `labels`, or a placeholder if no `seed`.
+
+        Each variable's levels have their own dimension, "lev" and "lev1" onwards, as
+        in CFSR files.
+        """
+        with netCDF4.Dataset(path, 'w') as nc:
+            nc.createDimension(time_dim, len(labels))
+            nc.createDimension('y', self.y.size)
+            nc.createDimension('x', self.x.size)
+            nc.createVariable('y', 'f8', ('y',))[:] = self.y
+            nc.createVariable('x', 'f8', ('x',))[:] = self.x
+            if time_dim != 't':
+                # e.g. climatology files' "MM-DD" dates
+                self._write_labels(nc, time_dim, labels)
+
+            rng = np.random.default_rng(seed)
+            level_dims: dict[tuple[str, ...], str] = {}
+            for variable, props in VARIABLES.items():
+                levels = props['levels']
+                if levels not in level_dims:
+                    level_dims[levels] = f'lev{len(level_dims) or ""}'
+                    nc.createDimension(level_dims[levels], len(levels))
+                    self._write_labels(nc, level_dims[levels], list(levels))
+
+                var = nc.createVariable(
+                    variable,
+                    'f4',
+                    (time_dim, level_dims[levels], 'y', 'x'),
+                    fill_value=np.float32(np.nan),
+                    chunksizes=(1, 1, self.y.size, self.x.size),
+                )
+                var.long_name = props['long_name']
+                var.units = _VALUES[variable][2]
+                if seed is not None:
+                    var[:] = self._values(variable, (len(labels), len(levels)), rng)
+
+    def _write_labels(self, nc: netCDF4.Dataset, dim: str, labels: list) -> None:
+        if isinstance(labels[0], str):
+            nc.createVariable(dim, str, (dim,))[:] = np.array(labels, dtype=object)
+        else:
+            nc.createVariable(dim, 'i4', (dim,))[:] = np.array(labels)
+
+    def _values(
+        self,
+        variable: str,
+        shape: tuple[int, int],
+        rng: np.random.Generator,
+    ) -> np.ndarray:
+        """Make smooth fields which vary with distance from (and angle around) the pole.
+
+        Each time step and level's pattern is rotated by a random angle, with noise.
+        """
+        base, variation, _ = _VALUES[variable]
+        phases = rng.uniform(0, 2 * np.pi, (*shape, 1, 1))
+        pattern = self._distance + 0.2 * np.sin(3 * self._angle + phases)
+        noise = rng.normal(0, 0.02, (*shape, *self._distance.shape))
+        return (base + variation * (pattern + noise)).astype(np.float32)
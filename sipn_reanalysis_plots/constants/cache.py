@@ -0,0 +1,28 @@
+import os
+
+# The availability index is rebuilt whenever the data directory's mtime changes. The TTL
+# is a backstop for filesystems where directory mtimes are cached or coarse (e.g. NFS).
+AVAILABILITY_INDEX_TTL_SECONDS = float(
+    os.environ.get('AVAILABILITY_INDEX_TTL_SECONDS', 300),
+)
+
+PLOT_CACHE_MAX_BYTES = int(os.environ.get('PLOT_CACHE_MAX_BYTES', 2**30))
+GRID_STORE_MAX_BYTES = int(os.environ.get('GRID_STORE_MAX_BYTES', 2 * 2**30))
+TIMESERIES_CACHE_MAX_BYTES = int(
+    os.environ.get('TIMESERIES_CACHE_MAX_BYTES', 256 * 2**20)
+)
+
+# NetCDF files kept open by each process between reads. With 0, files are opened for
+# each read.
+NETCDF_FILE_POOL_SIZE = int(os.environ.get('NETCDF_FILE_POOL_SIZE', 32))
+
+# Memory-map climatology blocks built under `CLIMATOLOGY_STORE_DIR` for anomaly plots,
+# instead of reading the climatology files on each request.
+CLIMATOLOGY_PRELOAD = bool(os.environ.get('CLIMATOLOGY_PRELOAD'))
+
+# Plot images only change if their input data is re-ingested, and are revalidated by
+# ETag after this age.
+PLOT_IMAGE_MAX_AGE_SECONDS = 60 * 60
+
+# Grid coordinates are identified by a hash of their values, so never change
+GRID_COORDS_MAX_AGE_SECONDS = 365 * 24 * 60 * 60
@@ -0,0 +1,21 @@
+import os
+
+# How dask computes the data for plots: with a pool of threads shared by the requests in
+# a process, synchronously in the request's own thread, or on a local "distributed"
+# cluster of worker processes (see `util/dask_scheduler.py`)
+DASK_SCHEDULERS = ('threads', 'synchronous', 'distributed')
+DASK_SCHEDULER = os.environ.get('DASK_SCHEDULER', 'threads')
+if DASK_SCHEDULER not in DASK_SCHEDULERS:
+    raise RuntimeError(
+        f'$DASK_SCHEDULER must be one of {DASK_SCHEDULERS}; got {DASK_SCHEDULER}'
+    )
+
+# Threads of the "threads" scheduler, or of each "distributed" worker process. By
+# default, one per CPU.
+DASK_THREADS = int(os.environ.get('DASK_THREADS', os.cpu_count() or 1))
+# Worker processes of the "distributed" cluster, and the memory each may use before
+# it's paused and restarted (in bytes, or e.g. "2GiB")
+DASK_PROCESSES = int(os.environ.get('DASK_PROCESSES', 1))
+DASK_MEMORY_LIMIT = os.environ.get('DASK_MEMORY_LIMIT', 'auto')
+# Serve the "distributed" cluster's dashboard on port 8787
+DASK_DASHBOARD = bool(os.environ.get('ENABLE_DASK_DASHBOARD'))
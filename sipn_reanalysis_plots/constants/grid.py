@@ -0,0 +1,7 @@
+# Encodings of the reduced grids served by `/api/daily/grid` and `/api/monthly/grid`
+# (see `util/grid_export.py`)
+GRID_ENCODINGS = ('float32', 'uint16')
+# Marks missing values of grids quantized to uint16
+GRID_UINT16_NODATA = 2**16 - 1
+# Size of the chunks grids are streamed in
+GRID_STREAM_CHUNK_BYTES = 64 * 2**10
@@ -0,0 +1,10 @@
+import os
+
+# Processes started by each web worker to run plot jobs. With 0, jobs run in a thread
+# of the web worker itself.
+JOB_PROCESSES = int(os.environ.get('JOB_PROCESSES', 1))
+# Jobs waiting to run in each web worker, beyond which submissions are refused
+JOB_MAX_QUEUED = int(os.environ.get('JOB_MAX_QUEUED', 20))
+JOB_TIMEOUT_SECONDS = float(os.environ.get('JOB_TIMEOUT_SECONDS', 900))
+# The states of jobs untouched for this long are deleted
+JOB_STATE_MAX_AGE_SECONDS = 24 * 60 * 60
@@ -1,10 +1,12 @@
+import os
 import re
 from pathlib import Path
 
 PACKAGE_DIR = Path(__file__).resolve().parent.parent
 PROJECT_DIR = PACKAGE_DIR.parent
 
-DATA_DIR = Path('/data')
+DATA_DIR = Path(os.environ.get('DATA_DIR', '/data'))
+DATA_MANIFEST_FILE = DATA_DIR / 'manifest.tsv'
 
 DATA_DAILY_DIR = DATA_DIR / 'daily'
 DATA_DAILY_DATE_REGEX = re.compile(r'^cfsr\.(\d{8})\.nc$')
@@ -22,3 +24,19 @@ DATA_CLIMATOLOGY_MONTHLY_FILE = (
 DATA_CLIMATOLOGY_DAILY_FILE = (
     DATA_CLIMATOLOGY_DIR / 'cfsr.daily_1981-2010_climatology.nc'
 )
+
+# Caches shared by all worker processes on a host
+CACHE_DIR = Path(os.environ.get('CACHE_DIR', '/tmp/sipn-reanalysis-plots'))
+PLOT_CACHE_DIR = CACHE_DIR / 'plots'
+GRID_STORE_DIR = CACHE_DIR / 'grids'
+CLIMATOLOGY_STORE_DIR = CACHE_DIR / 'climatology'
+CUMULATIVE_STORE_DIR = CACHE_DIR / 'cumulative'
+ZARR_STORE_DIR = CACHE_DIR / 'zarr'
+PLOT_CACHE_WARM_STATE_FILE = CACHE_DIR / 'warm.json'
+JOB_STATE_DIR = CACHE_DIR / 'jobs'
+PROFILE_DIR = CACHE_DIR / 'profiles'
+GRID_COORDS_DIR = CACHE_DIR / 'grid-coords'
+TIMESERIES_CACHE_DIR = CACHE_DIR / 'timeseries'
+
+# Metrics of every process on a host, aggregated when they're scraped
+METRICS_DIR = Path(os.environ.get('PROMETHEUS_MULTIPROC_DIR', CACHE_DIR / 'metrics'))
@@ -1 +1,18 @@
+import os
+
 LATITUDE_LIMIT = 50
+# Distance from the pole to `LATITUDE_LIMIT` in `CRS` coordinates, in meters; the map's
+# extent is the square around that circle. It's not projected here, so data reads can
+# be sliced to the map without cartopy (see `test_read.py`).
+MAP_EXTENT_RADIUS = 4_651_194.3
+
+# Resolutions of the plot images offered to users
+PLOT_DPI = 100
+PLOT_DPI_HIGH_RES = 600
+
+# How plots which aren't filled contours are rendered: with matplotlib, or by the
+# "raster" engine, which colors pixels directly (see `util/raster.py`)
+PLOT_ENGINES = ('matplotlib', 'raster')
+PLOT_ENGINE = os.environ.get('PLOT_ENGINE', 'matplotlib')
+if PLOT_ENGINE not in PLOT_ENGINES:
+    raise RuntimeError(f'$PLOT_ENGINE must be one of {PLOT_ENGINES}; got {PLOT_ENGINE}')
@@ -0,0 +1,15 @@
+import os
+
+# Fraction of requests profiled (see `util/profiler.py`). With 0, only requests with the
+# token are.
+PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+# Requests with this token in the `X-Profile-Token` header are profiled; it's also
+# required to list profiles. Unset, no request is profiled by token and profiles can't
+# be listed.
+PROFILE_TOKEN = os.environ.get('PROFILE_TOKEN')
+# Profiles kept on disk; the oldest are deleted beyond this.
+PROFILE_MAX_FILES = int(os.environ.get('PROFILE_MAX_FILES', 100))
+# Seconds between samples of a profiled request's stacks
+PROFILE_SAMPLE_INTERVAL_SECONDS = 0.005
+# Allocation sites listed in each profile, by memory retained
+PROFILE_TOP_ALLOCATIONS = 25
@@ -0,0 +1,20 @@
+import os
+
+# Render processes per web worker. With 0, plots are rendered in the web worker itself.
+RENDER_POOL_PROCESSES = int(os.environ.get('RENDER_POOL_PROCESSES', 0))
+# Renders waiting for a render process, beyond which requests are refused with a 503
+RENDER_POOL_MAX_QUEUED = int(os.environ.get('RENDER_POOL_MAX_QUEUED', 4))
+# Renders (and waits for a free render process) longer than this fail. NOTE: gunicorn's
+# worker timeout is derived from it (see `gunicorn.conf.py`).
+RENDER_TIMEOUT_SECONDS = float(os.environ.get('RENDER_TIMEOUT_SECONDS', 120))
+# Render processes import the plotting libraries before their first render, which
+# doesn't count towards its timeout
+RENDER_WORKER_STARTUP_TIMEOUT_SECONDS = 120
+# Render processes are replaced after this many renders, or once their peak memory
+# use exceeds this many bytes, to release memory matplotlib holds on to.
+RENDER_WORKER_MAX_JOBS = int(os.environ.get('RENDER_WORKER_MAX_JOBS', 200))
+RENDER_WORKER_MAX_RSS_BYTES = int(
+    os.environ.get('RENDER_WORKER_MAX_RSS_BYTES', 2 * 2**30),
+)
+# Suggested wait before retrying a refused render
+RENDER_POOL_RETRY_AFTER_SECONDS = 5
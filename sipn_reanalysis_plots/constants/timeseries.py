@@ -0,0 +1,27 @@
+import os
+
+from sipn_reanalysis_plots._types import Region
+
+ARCTIC_CIRCLE_LATITUDE = 66.5
+
+# Regions offered by the time series form, besides a lat/lon box
+REGIONS: dict[str, Region] = {
+    'arctic': Region(
+        long_name='Arctic (north of the Arctic Circle)',
+        min_lat=ARCTIC_CIRCLE_LATITUDE,
+    ),
+    'arctic_ocean': Region(
+        long_name='Arctic Ocean (ocean north of the Arctic Circle)',
+        min_lat=ARCTIC_CIRCLE_LATITUDE,
+        ocean_only=True,
+    ),
+    'central_arctic': Region(
+        long_name='Central Arctic (north of 80°N)',
+        min_lat=80,
+    ),
+}
+
+# Longest date range of a time series
+TIMESERIES_MAX_DAYS = int(os.environ.get('TIMESERIES_MAX_DAYS', 366))
+# Days of a time series read at once, which bounds the memory used to calculate it
+TIMESERIES_CHUNK_DAYS = int(os.environ.get('TIMESERIES_CHUNK_DAYS', 31))
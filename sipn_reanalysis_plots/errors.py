@@ -1,2 +1,18 @@
 class NoDataFoundError(Exception):
     """No input data found during search."""
+
+
+class RenderPoolBusyError(Exception):
+    """Every render process is busy and the queue for them is full."""
+
+
+class RenderTimeoutError(Exception):
+    """A render took too long and its process was killed."""
+
+
+class RenderWorkerError(Exception):
+    """A render process died or failed to return its result."""
+
+
+class JobQueueFullError(Exception):
+    """Too many plot jobs are waiting to run."""
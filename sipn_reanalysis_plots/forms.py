@@ -4,6 +4,9 @@ from typing import Callable
 from flask_wtf import FlaskForm
 from wtforms import Field, Form, fields, validators
 
+from sipn_reanalysis_plots._types import Region, YearMonth
+from sipn_reanalysis_plots.constants.plot import LATITUDE_LIMIT
+from sipn_reanalysis_plots.constants.timeseries import REGIONS, TIMESERIES_MAX_DAYS
 from sipn_reanalysis_plots.constants.variables import VARIABLES
 from sipn_reanalysis_plots.util.data.list import (
     max_daily_data_date,
@@ -14,7 +17,11 @@ from sipn_reanalysis_plots.util.data.list import (
     min_daily_data_date_str,
     min_monthly_data_yearmonth,
     min_monthly_data_yearmonth_str,
+    missing_daily_data_dates,
+    missing_monthly_data_yearmonths,
 )
+from sipn_reanalysis_plots.util.render import DailyPlotRequest, MonthlyPlotRequest
+from sipn_reanalysis_plots.util.timeseries import DailyTimeSeriesRequest
 
 
 class MagicString:
@@ -84,7 +91,32 @@ def validate_month_in_available_range(form: Form, field: Field) -> None:
         )
 
 
-class PlotForm(FlaskForm):
+def validate_daily_data_complete(start_date: dt.date, end_date: dt.date) -> None:
+    """Reject a date range with any missing daily files, listing the missing dates."""
+    missing = missing_daily_data_dates(start_date, end_date)
+    if missing:
+        missing_str = ', '.join(f'{date:%Y-%m-%d}' for date in missing)
+        raise validators.ValidationError(
+            f'Data is missing for {len(missing)} requested date(s): {missing_str}',
+        )
+
+
+def validate_monthly_data_complete(start_month: dt.date, end_month: dt.date) -> None:
+    """Reject a month range with any missing monthly files, listing the missing months."""
+    missing = missing_monthly_data_yearmonths(
+        YearMonth(year=start_month.year, month=start_month.month),
+        YearMonth(year=end_month.year, month=end_month.month),
+    )
+    if missing:
+        missing_str = ', '.join(f'{ym.year}-{ym.month:02d}' for ym in missing)
+        raise validators.ValidationError(
+            f'Data is missing for {len(missing)} requested month(s): {missing_str}',
+        )
+
+
+class VariableForm(FlaskForm):
+    """A form for a variable at an analysis level, submitted with GET."""
+
     class Meta:
         # We don't care about CSRF in this app, and we'd rather not have a token in our
         # URL.
@@ -102,6 +134,25 @@ class PlotForm(FlaskForm):
         validators=[validators.InputRequired()],
     )
 
+    def url_args(self) -> dict[str, str]:
+        """Format the (validated) form's data as the query string args of a GET."""
+        args = {}
+        for field in self:
+            # NOTE: Not `not field.data`, which would drop e.g. a box edge at 0°
+            if field.data is None or field.data is False or field.data == '':
+                continue
+
+            if isinstance(field.data, dt.date):
+                args[field.name] = field.data.strftime(field.format[0])
+            elif field.data is True:
+                args[field.name] = 'y'
+            else:
+                args[field.name] = str(field.data)
+
+        return args
+
+
+class PlotForm(VariableForm):
     contour = fields.BooleanField(
         'Display as filled contours',
         default=False,
@@ -134,8 +185,29 @@ class DailyPlotForm(PlotForm):
         ],
     )
 
+    def plot_request(self) -> DailyPlotRequest:
+        return DailyPlotRequest(
+            start_date=self.start_date.data,
+            end_date=self.end_date.data,
+            variable=self.variable.data,
+            level=self.analysis_level.data,
+            contour=self.contour.data,
+            anomaly=self.anomaly.data,
+        )
+
+    def validate_start_date(form: Form, field: Field) -> None:
+        """Validate that data exists for a single-day request.
+
+        When an end date is provided, the full range is validated by
+        `validate_end_date`.
+        """
+        if field.errors or form.end_date.data:
+            return
+
+        validate_daily_data_complete(field.data, field.data)
+
     def validate_end_date(form: Form, field: Field) -> None:
-        """Validate relationship between start and end date."""
+        """Validate relationship between start and end date, and data completeness."""
         max_delta_days = 60
         start_date = form.start_date.data
         end_date = field.data
@@ -155,6 +227,11 @@ class DailyPlotForm(PlotForm):
                 f' {max_delta_days} days.'
             )
 
+        if form.start_date.errors or field.errors:
+            return
+
+        validate_daily_data_complete(start_date, end_date)
+
 
 class MonthlyPlotForm(PlotForm):
     start_month = fields.MonthField(
@@ -180,8 +257,37 @@ class MonthlyPlotForm(PlotForm):
         ],
     )
 
+    def plot_request(self) -> MonthlyPlotRequest:
+        end_month = self.end_month.data
+        return MonthlyPlotRequest(
+            start_month=YearMonth(
+                year=self.start_month.data.year,
+                month=self.start_month.data.month,
+            ),
+            end_month=(
+                None
+                if not end_month
+                else YearMonth(year=end_month.year, month=end_month.month)
+            ),
+            variable=self.variable.data,
+            level=self.analysis_level.data,
+            contour=self.contour.data,
+            anomaly=self.anomaly.data,
+        )
+
+    def validate_start_month(form: Form, field: Field) -> None:
+        """Validate that data exists for a single-month request.
+
+        When an end month is provided, the full range is validated by
+        `validate_end_month`.
+        """
+        if field.errors or form.end_month.data:
+            return
+
+        validate_monthly_data_complete(field.data, field.data)
+
     def validate_end_month(form: Form, field: Field) -> None:
-        """Validate relationship between start and end month.
+        """Validate relationship between start and end month, and data completeness.
 
         TODO: DRY. This validator is same as the daily plot validator (the month fields
         are really dates with day=1)
@@ -208,3 +314,118 @@ class MonthlyPlotForm(PlotForm):
             raise validators.ValidationError(
                 'Difference between start and end month must be less than 1 year.'
             )
+
+        if form.start_month.errors or field.errors:
+            return
+
+        validate_monthly_data_complete(start_month, end_month)
+
+
+def _default_timeseries_start_date() -> dt.date:
+    """Start a year before the latest data."""
+    return max(
+        min_daily_data_date(),
+        max_daily_data_date() - dt.timedelta(days=364),
+    )
+
+
+class DailyTimeSeriesForm(VariableForm):
+    start_date = fields.DateField(
+        'Start date',
+        default=_default_timeseries_start_date,
+        render_kw=date_render_kw,
+        validators=[
+            validators.DataRequired(message="This field requires format 'YYYY-MM-DD'"),
+            validate_date_in_available_range,
+        ],
+    )
+    end_date = fields.DateField(
+        'End date',
+        default=max_daily_data_date,
+        render_kw=date_render_kw,
+        validators=[
+            validators.DataRequired(message="This field requires format 'YYYY-MM-DD'"),
+            validate_date_in_available_range,
+        ],
+    )
+
+    region = fields.SelectField(
+        'Region',
+        choices=[
+            *((key, region.long_name) for key, region in REGIONS.items()),
+            ('box', 'Latitude/longitude box (below)'),
+        ],
+        default='arctic',
+        validators=[validators.InputRequired()],
+    )
+    min_lat = fields.FloatField(
+        'Box south edge (°N)',
+        validators=[validators.Optional(), validators.NumberRange(LATITUDE_LIMIT, 90)],
+    )
+    max_lat = fields.FloatField(
+        'Box north edge (°N)',
+        validators=[validators.Optional(), validators.NumberRange(LATITUDE_LIMIT, 90)],
+    )
+    min_lon = fields.FloatField(
+        'Box west edge (°E)',
+        validators=[validators.Optional(), validators.NumberRange(-180, 180)],
+    )
+    max_lon = fields.FloatField(
+        'Box east edge (°E); west of the west edge crosses 180°',
+        validators=[validators.Optional(), validators.NumberRange(-180, 180)],
+    )
+
+    def timeseries_request(self) -> DailyTimeSeriesRequest:
+        return DailyTimeSeriesRequest(
+            start_date=self.start_date.data,
+            end_date=self.end_date.data,
+            variable=self.variable.data,
+            level=self.analysis_level.data,
+            region=self._region(),
+        )
+
+    def _region(self) -> Region:
+        if self.region.data != 'box':
+            return REGIONS[self.region.data]
+
+        min_lat, max_lat = self.min_lat.data, self.max_lat.data
+        min_lon, max_lon = self.min_lon.data, self.max_lon.data
+        return Region(
+            long_name=f'{min_lat:g} to {max_lat:g}°N, {min_lon:g} to {max_lon:g}°E',
+            min_lat=min_lat,
+            max_lat=max_lat,
+            min_lon=min_lon,
+            max_lon=max_lon,
+        )
+
+    def validate_end_date(form: Form, field: Field) -> None:
+        """Validate relationship between start and end date.
+
+        Days without data are allowed; they have no mean.
+        """
+        start_date = form.start_date.data
+        end_date = field.data
+        if not start_date or not end_date:
+            return
+
+        if start_date >= end_date:
+            raise validators.ValidationError('End date must be after start date.')
+
+        if (end_date - start_date).days >= TIMESERIES_MAX_DAYS:
+            raise validators.ValidationError(
+                f'Time series must be at most {TIMESERIES_MAX_DAYS} days long.'
+            )
+
+    def validate_region(form: Form, field: Field) -> None:
+        """Validate that a box has all its edges, and its south is below its north."""
+        if field.data != 'box':
+            return
+
+        edges = (form.min_lat, form.max_lat, form.min_lon, form.max_lon)
+        if any(edge.data is None for edge in edges):
+            raise validators.ValidationError('A box needs all four of its edges.')
+
+        if form.min_lat.data >= form.max_lat.data:
+            raise validators.ValidationError(
+                "A box's south edge must be south of its north edge."
+            )
@@ -1,2 +1,7 @@
 import sipn_reanalysis_plots.routes.daily
+import sipn_reanalysis_plots.routes.debug
+import sipn_reanalysis_plots.routes.grid
+import sipn_reanalysis_plots.routes.jobs
+import sipn_reanalysis_plots.routes.metrics
 import sipn_reanalysis_plots.routes.monthly
+import sipn_reanalysis_plots.routes.timeseries
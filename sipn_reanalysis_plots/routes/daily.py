@@ -1,19 +1,21 @@
 import functools
-from pathlib import Path
 
 from flask import abort, render_template, request
 
 from sipn_reanalysis_plots import app
-from sipn_reanalysis_plots.constants.paths import DATA_DIR
 from sipn_reanalysis_plots.constants.variables import VARIABLES
 from sipn_reanalysis_plots.errors import NoDataFoundError
 from sipn_reanalysis_plots.forms import DailyPlotForm
+from sipn_reanalysis_plots.routes.image import (
+    missing_file_message,
+    plot_png_response,
+    plot_png_urls,
+)
 from sipn_reanalysis_plots.util.data.list import (
     max_daily_data_date_str,
     min_daily_data_date_str,
 )
-from sipn_reanalysis_plots.util.fig import fig_to_high_and_lowres_base64
-from sipn_reanalysis_plots.util.plot import plot_cfsr_daily
+from sipn_reanalysis_plots.util.render import plot_cache_key
 
 
 @app.route('/')
@@ -40,27 +42,16 @@ def daily():
     if not submitted or not form.validate():
         return render()
 
+    # The images are rendered when the browser requests them; only check that all
+    # inputs exist.
     try:
-        fig = plot_cfsr_daily(
-            form.start_date.data,
-            end_date=form.end_date.data,
-            variable=form.variable.data,
-            level=form.analysis_level.data,
-            as_filled_contour=form.contour.data,
-            anomaly=form.anomaly.data,
-        )
+        plot_cache_key(form.plot_request())
     except FileNotFoundError as e:
-        fn = Path(e.filename.decode('utf-8')).relative_to(DATA_DIR)
-        return render(
-            error=(
-                f'Requested file not found: "{fn}".'
-                ' Please report this message to ops so data can be ingested.',
-            )
-        )
+        return render(error=missing_file_message(e))
+
+    return render(**plot_png_urls('daily_plot_png', form))
 
-    img_b64_small, img_b64_big = fig_to_high_and_lowres_base64(fig)
 
-    return render(
-        img_b64_small=img_b64_small,
-        img_b64_big=img_b64_big,
-    )
+@app.route('/daily/plot.png')
+def daily_plot_png():
+    return plot_png_response(DailyPlotForm(request.args))
@@ -0,0 +1,67 @@
+"""List and fetch profiles of requests (see `util/profiler.py`).
+
+Both require the profile token in the `X-Profile-Token` header, and are not found
+without it.
+"""
+import json
+from typing import Any
+
+from flask import abort, request, send_from_directory, url_for
+
+from sipn_reanalysis_plots import app
+from sipn_reanalysis_plots.constants.paths import PROFILE_DIR
+from sipn_reanalysis_plots.util.profiler import list_profiles, request_has_profile_token
+
+
+@app.route('/debug/profiles')
+def profiles():
+    _require_profile_token()
+
+    summaries: list[dict[str, Any]] = []
+    for path in list_profiles():
+        try:
+            profile = json.loads(path.read_text())
+        except FileNotFoundError:
+            # Deleted by another process since it was listed
+            continue
+
+        summaries.append(
+            {
+                'name': path.stem,
+                'created': profile['created'],
+                'request_url': profile['request_url'],
+                'status': profile['status'],
+                'seconds': profile['seconds'],
+                'peak_memory_bytes': profile['peak_memory_bytes'],
+                'url': _profile_url(path.stem),
+                'folded_url': _profile_url(path.stem, folded=True),
+            }
+        )
+
+    return {'profiles': summaries}
+
+
+@app.route('/debug/profiles/<name>')
+def profile(name: str):
+    """Respond with the profile, or only its folded stacks with `?format=folded`."""
+    _require_profile_token()
+
+    if request.args.get('format') == 'folded':
+        path = PROFILE_DIR / f'{name}.json'
+        if path.parent != PROFILE_DIR or not path.is_file():
+            abort(404)
+        return app.response_class(
+            json.loads(path.read_text())['folded_stacks'],
+            mimetype='text/plain',
+        )
+
+    return send_from_directory(PROFILE_DIR, f'{name}.json', mimetype='application/json')
+
+
+def _require_profile_token() -> None:
+    if not request_has_profile_token():
+        abort(404)
+
+
+def _profile_url(name: str, *, folded: bool = False) -> str:
+    return url_for('profile', name=name, format='folded' if folded else None)
@@ -0,0 +1,167 @@
+"""Serve the reduced grids of plots, for clients to render themselves.
+
+Request a grid with the same fields as the daily or monthly plot form, and optionally an
+`encoding` (one of `GRID_ENCODINGS`; `uint16` by default). The response is the grid's
+values (see `util/grid_export.py`), described by headers:
+
+* `X-Grid-Shape`: the number of `y` and `x` cells, e.g. `70,70`,
+* `X-Grid-Encoding`, and for `uint16`, `X-Grid-Scale`, `X-Grid-Offset` and
+  `X-Grid-Nodata`,
+* `X-Grid-Units` and `X-Grid-Long-Name`,
+* `X-Grid-Coords`: the URL of the grid's coordinates, the `x` then `y` cell centers as
+  little-endian float64, which never change.
+"""
+import hashlib
+import re
+from typing import Any
+
+import numpy as np
+from flask import Response, request, url_for
+from flask_wtf import FlaskForm
+from werkzeug.datastructures import Headers
+from werkzeug.http import is_resource_modified
+
+from sipn_reanalysis_plots import app
+from sipn_reanalysis_plots.constants.cache import GRID_COORDS_MAX_AGE_SECONDS
+from sipn_reanalysis_plots.constants.grid import GRID_ENCODINGS, GRID_UINT16_NODATA
+from sipn_reanalysis_plots.constants.render import RENDER_POOL_RETRY_AFTER_SECONDS
+from sipn_reanalysis_plots.errors import (
+    RenderPoolBusyError,
+    RenderTimeoutError,
+    RenderWorkerError,
+)
+from sipn_reanalysis_plots.forms import DailyPlotForm, MonthlyPlotForm
+from sipn_reanalysis_plots.routes.image import (
+    missing_file_message,
+    set_plot_cache_control,
+)
+from sipn_reanalysis_plots.util.grid_export import (
+    ExportedGrid,
+    export_grid,
+    iter_array_chunks,
+    quantize_uint16,
+    read_grid_coords,
+)
+from sipn_reanalysis_plots.util.render import PlotCacheKey, PlotRequest, plot_cache_key
+from sipn_reanalysis_plots.util.render_pool import render_pool
+from sipn_reanalysis_plots.util.timing import stage
+
+_COORDS_ID_REGEX = re.compile(r'^[0-9a-f]{16}$')
+
+
+@app.route('/api/daily/grid')
+def daily_grid():
+    return _grid_response(DailyPlotForm(request.args))
+
+
+@app.route('/api/monthly/grid')
+def monthly_grid():
+    return _grid_response(MonthlyPlotForm(request.args))
+
+
+@app.route('/api/grid/coords/<coords_id>')
+def grid_coords(coords_id: str):
+    coords = read_grid_coords(coords_id) if _COORDS_ID_REGEX.match(coords_id) else None
+    if coords is None:
+        return {'description': f'No such grid coordinates: {coords_id}'}, 404
+
+    response = app.response_class(
+        coords.to_bytes(),
+        mimetype='application/octet-stream',
+    )
+    response.headers['X-Grid-Shape'] = f'{coords.y.size},{coords.x.size}'
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    response.cache_control.max_age = GRID_COORDS_MAX_AGE_SECONDS
+    return response
+
+
+def _grid_response(form: FlaskForm) -> Any:
+    """Respond with the grid requested by the (unvalidated) `form`, as it's encoded.
+
+    Conditional requests are answered from the plot's cache key alone, without
+    calculating the grid.
+    """
+    if not form.validate():
+        return {'description': 'Invalid plot parameters', 'errors': form.errors}, 400
+
+    encoding = request.args.get('encoding', 'uint16')
+    if encoding not in GRID_ENCODINGS:
+        return {'description': f'encoding must be one of {GRID_ENCODINGS}'}, 400
+
+    plot_request = form.plot_request()
+    try:
+        cache_key = plot_cache_key(plot_request)
+    except FileNotFoundError as e:
+        return {'description': missing_file_message(e)}, 404
+
+    etag = _grid_etag(cache_key, encoding)
+    response = app.response_class(mimetype='application/octet-stream')
+    response.set_etag(etag)
+    response.last_modified = cache_key.last_modified
+    set_plot_cache_control(response, form)
+
+    if not is_resource_modified(
+        request.environ,
+        etag=etag,
+        last_modified=cache_key.last_modified,
+    ):
+        response.status_code = 304
+        return response
+
+    return _stream_grid(response, plot_request, encoding=encoding)
+
+
+def _stream_grid(
+    response: Response,
+    plot_request: PlotRequest,
+    *,
+    encoding: str,
+) -> Any:
+    """Calculate the grid (in the render pool, if enabled), and stream it encoded."""
+    try:
+        grid = export_grid(plot_request, pool=render_pool())
+    except RenderPoolBusyError as e:
+        return (
+            {'description': f'{e}; please try again shortly.'},
+            503,
+            {'Retry-After': RENDER_POOL_RETRY_AFTER_SECONDS},
+        )
+    except RenderTimeoutError as e:
+        return {'description': str(e)}, 504
+    except RenderWorkerError as e:
+        return (
+            {'description': f'The grid failed to export ({e}); please try again.'},
+            503,
+            {'Retry-After': RENDER_POOL_RETRY_AFTER_SECONDS},
+        )
+
+    with stage('encode'):
+        values = _encode(grid, encoding=encoding, headers=response.headers)
+    response.headers['X-Grid-Coords'] = url_for(
+        'grid_coords',
+        coords_id=grid.coords_id(),
+    )
+    response.response = iter_array_chunks(values)
+    response.content_length = values.nbytes
+    return response
+
+
+def _encode(grid: ExportedGrid, *, encoding: str, headers: Headers) -> np.ndarray:
+    """Encode the grid's values, and describe them in `headers`."""
+    headers['X-Grid-Shape'] = ','.join(str(size) for size in grid.values.shape)
+    headers['X-Grid-Encoding'] = encoding
+    headers['X-Grid-Units'] = grid.units
+    headers['X-Grid-Long-Name'] = grid.long_name
+    if encoding == 'float32':
+        return grid.values.astype('<f4', copy=False)
+
+    values, scale, offset = quantize_uint16(grid.values)
+    headers['X-Grid-Scale'] = repr(scale)
+    headers['X-Grid-Offset'] = repr(offset)
+    headers['X-Grid-Nodata'] = str(GRID_UINT16_NODATA)
+    return values
+
+
+def _grid_etag(cache_key: PlotCacheKey, encoding: str) -> str:
+    return hashlib.sha256(f'{cache_key.key}\ngrid={encoding}'.encode()).hexdigest()
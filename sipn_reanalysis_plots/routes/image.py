@@ -0,0 +1,126 @@
+import os
+from pathlib import Path
+
+from flask import Response, abort, request, url_for
+from flask_wtf import FlaskForm
+from werkzeug.exceptions import ServiceUnavailable
+from werkzeug.http import is_resource_modified
+
+from sipn_reanalysis_plots import app
+from sipn_reanalysis_plots.constants.cache import PLOT_IMAGE_MAX_AGE_SECONDS
+from sipn_reanalysis_plots.constants.paths import DATA_DIR
+from sipn_reanalysis_plots.constants.plot import PLOT_DPI, PLOT_DPI_HIGH_RES
+from sipn_reanalysis_plots.constants.render import RENDER_POOL_RETRY_AFTER_SECONDS
+from sipn_reanalysis_plots.errors import (
+    RenderPoolBusyError,
+    RenderTimeoutError,
+    RenderWorkerError,
+)
+from sipn_reanalysis_plots.util.render import (
+    PlotCacheKey,
+    PlotRequest,
+    plot_cache_key,
+    render_plot_png,
+)
+from sipn_reanalysis_plots.util.render_pool import render_pool
+
+
+def plot_png_response(form: FlaskForm) -> Response:
+    """Respond with the plot image requested by the (unvalidated) `form`.
+
+    Conditional requests are answered from the plot's cache key alone, without
+    rendering.
+    """
+    if not form.validate():
+        abort(400, description=f'Invalid plot parameters: {form.errors}')
+
+    dpi = request.args.get('dpi', default=PLOT_DPI, type=int)
+    if dpi not in (PLOT_DPI, PLOT_DPI_HIGH_RES):
+        abort(400, description=f'dpi must be one of {PLOT_DPI}, {PLOT_DPI_HIGH_RES}')
+
+    plot_request = form.plot_request()
+    try:
+        cache_key = plot_cache_key(plot_request)
+    except FileNotFoundError as e:
+        abort(404, description=missing_file_message(e))
+
+    response = app.response_class(mimetype='image/png')
+    response.set_etag(cache_key.etag(dpi))
+    response.last_modified = cache_key.last_modified
+    set_plot_cache_control(response, form)
+
+    if not is_resource_modified(
+        request.environ,
+        etag=cache_key.etag(dpi),
+        last_modified=cache_key.last_modified,
+    ):
+        response.status_code = 304
+        return response
+
+    response.set_data(_render_png(plot_request, dpi=dpi, cache_key=cache_key))
+    return response
+
+
+def _render_png(
+    plot_request: PlotRequest,
+    *,
+    dpi: int,
+    cache_key: PlotCacheKey,
+) -> bytes:
+    """Render the plot in the render pool (if enabled), answering its errors."""
+    try:
+        return render_plot_png(
+            plot_request,
+            dpi=dpi,
+            cache_key=cache_key,
+            pool=render_pool(),
+        )
+    except RenderPoolBusyError as e:
+        raise ServiceUnavailable(
+            description=f'{e}; please try again shortly.',
+            retry_after=RENDER_POOL_RETRY_AFTER_SECONDS,
+        )
+    except RenderTimeoutError as e:
+        abort(504, description=str(e))
+    except RenderWorkerError as e:
+        raise ServiceUnavailable(
+            description=f'The plot failed to render ({e}); please try again shortly.',
+            retry_after=RENDER_POOL_RETRY_AFTER_SECONDS,
+        )
+
+
+def plot_png_urls(endpoint: str, form: FlaskForm) -> dict[str, str]:
+    """Build URLs of the images for the plot requested by the (validated) `form`.
+
+    The URLs have the form's dates, even if they were left to default to the latest
+    data, so the images can be cached.
+    """
+    args = form.url_args()
+
+    return {
+        'img_url_small': url_for(endpoint, **args),
+        'img_url_big': url_for(endpoint, **args, dpi=PLOT_DPI_HIGH_RES),
+    }
+
+
+def set_plot_cache_control(response: Response, form: FlaskForm) -> None:
+    """Let the plot (or grid) be cached, unless its dates default to the latest data.
+
+    The latest data changes with each ingest, so then it must be revalidated (by its
+    ETag) before each use.
+    """
+    response.cache_control.public = True
+    if any(
+        callable(field.default) and not request.args.get(field.name) for field in form
+    ):
+        response.cache_control.no_cache = True
+    else:
+        response.cache_control.max_age = PLOT_IMAGE_MAX_AGE_SECONDS
+
+
+def missing_file_message(e: FileNotFoundError) -> str:
+    fn = Path(os.fsdecode(e.filename)).relative_to(DATA_DIR)
+    return (
+        f'Requested file not found: "{fn}".'
+        ' Please report this message to ops so data can be ingested.'
+    )
@@ -0,0 +1,89 @@
+"""Render plots in the background, e.g. long ranges which are slow to render.
+
+Submit a job with the same fields as the daily or monthly plot form (as a form or JSON),
+then poll its URL until it's done, and fetch its images.
+"""
+from typing import Any
+
+from flask import url_for
+from flask_wtf import FlaskForm
+
+from sipn_reanalysis_plots import app
+from sipn_reanalysis_plots.constants.plot import PLOT_DPI_HIGH_RES
+from sipn_reanalysis_plots.constants.render import RENDER_POOL_RETRY_AFTER_SECONDS
+from sipn_reanalysis_plots.errors import JobQueueFullError
+from sipn_reanalysis_plots.forms import DailyPlotForm, MonthlyPlotForm
+from sipn_reanalysis_plots.routes.image import missing_file_message
+from sipn_reanalysis_plots.util.jobs import JobState, read_job, submit_job
+from sipn_reanalysis_plots.util.render import plot_cache_key
+
+
+@app.route('/api/jobs/daily', methods=['POST'])
+def submit_daily_job():
+    return _submit_job_response(DailyPlotForm(), image_endpoint='daily_plot_png')
+
+
+@app.route('/api/jobs/monthly', methods=['POST'])
+def submit_monthly_job():
+    return _submit_job_response(MonthlyPlotForm(), image_endpoint='monthly_plot_png')
+
+
+@app.route('/api/jobs/<job_id>')
+def job(job_id: str):
+    state = read_job(job_id)
+    if state is None:
+        return {'description': f'No such job: {job_id}'}, 404
+
+    return _job_json(state)
+
+
+def _submit_job_response(form: FlaskForm, *, image_endpoint: str) -> Any:
+    if not form.validate():
+        return {'description': 'Invalid plot parameters', 'errors': form.errors}, 400
+
+    plot_request = form.plot_request()
+    try:
+        cache_key = plot_cache_key(plot_request)
+    except FileNotFoundError as e:
+        return {'description': missing_file_message(e)}, 404
+
+    try:
+        state = submit_job(
+            plot_request,
+            cache_key=cache_key,
+            image_endpoint=image_endpoint,
+            image_args=form.url_args(),
+        )
+    except JobQueueFullError as e:
+        return (
+            {'description': f'{e}; please try again shortly.'},
+            503,
+            {'Retry-After': RENDER_POOL_RETRY_AFTER_SECONDS},
+        )
+
+    return _job_json(state), 202, {'Location': url_for('job', job_id=state.id)}
+
+
+def _job_json(state: JobState) -> dict[str, Any]:
+    """Describe the job, with its images' URLs once it's done."""
+    job_json: dict[str, Any] = {
+        'id': state.id,
+        'url': url_for('job', job_id=state.id),
+        'plot': state.plot,
+        'status': state.status,
+        'progress': {
+            'files_read': state.files_read,
+            'files_total': state.files_total,
+        },
+        'error': state.error,
+    }
+    if state.status == 'done':
+        image_args: dict[str, Any] = state.image_args
+        job_json['img_url_small'] = url_for(state.image_endpoint, **image_args)
+        job_json['img_url_big'] = url_for(
+            state.image_endpoint,
+            **image_args,
+            dpi=PLOT_DPI_HIGH_RES,
+        )
+
+    return job_json
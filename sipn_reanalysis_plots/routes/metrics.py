@@ -0,0 +1,9 @@
+from sipn_reanalysis_plots import app
+from sipn_reanalysis_plots.util.metrics import metrics_response_body
+
+
+@app.route('/metrics')
+def metrics():
+    """Expose the metrics of every process on this host, for Prometheus to scrape."""
+    body, content_type = metrics_response_body()
+    return app.response_class(body, content_type=content_type)
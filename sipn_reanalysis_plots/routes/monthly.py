@@ -1,20 +1,21 @@
 import functools
-from pathlib import Path
 
 from flask import abort, render_template, request
 
 from sipn_reanalysis_plots import app
-from sipn_reanalysis_plots._types import YearMonth
-from sipn_reanalysis_plots.constants.paths import DATA_DIR
 from sipn_reanalysis_plots.constants.variables import VARIABLES
 from sipn_reanalysis_plots.errors import NoDataFoundError
 from sipn_reanalysis_plots.forms import MonthlyPlotForm
+from sipn_reanalysis_plots.routes.image import (
+    missing_file_message,
+    plot_png_response,
+    plot_png_urls,
+)
 from sipn_reanalysis_plots.util.data.list import (
     max_monthly_data_yearmonth_str,
     min_monthly_data_yearmonth_str,
 )
-from sipn_reanalysis_plots.util.fig import fig_to_high_and_lowres_base64
-from sipn_reanalysis_plots.util.plot import plot_cfsr_monthly
+from sipn_reanalysis_plots.util.render import plot_cache_key
 
 
 # TODO: DRY. Very similar to daily route. Maybe:
@@ -46,40 +47,16 @@ def monthly():
     if not submitted or not form.validate():
         return render()
 
-    start_month = YearMonth(
-        year=form.start_month.data.year,
-        month=form.start_month.data.month,
-    )
-    end_month = (
-        None
-        if not form.end_month.data
-        else YearMonth(
-            year=form.end_month.data.year,
-            month=form.end_month.data.month,
-        )
-    )
-
+    # The images are rendered when the browser requests them; only check that all
+    # inputs exist.
     try:
-        fig = plot_cfsr_monthly(
-            start_month,
-            end_month=end_month,
-            variable=form.variable.data,
-            level=form.analysis_level.data,
-            as_filled_contour=form.contour.data,
-            anomaly=form.anomaly.data,
-        )
+        plot_cache_key(form.plot_request())
     except FileNotFoundError as e:
-        fn = Path(e.filename.decode('utf-8')).relative_to(DATA_DIR)
-        return render(
-            error=(
-                f'Requested file not found: "{fn}".'
-                ' Please report this message to ops so data can be ingested.',
-            )
-        )
+        return render(error=missing_file_message(e))
+
+    return render(**plot_png_urls('monthly_plot_png', form))
 
-    img_b64_small, img_b64_big = fig_to_high_and_lowres_base64(fig)
 
-    return render(
-        img_b64_small=img_b64_small,
-        img_b64_big=img_b64_big,
-    )
+@app.route('/monthly/plot.png')
+def monthly_plot_png():
+    return plot_png_response(MonthlyPlotForm(request.args))
@@ -0,0 +1,164 @@
+"""Serve time series of a variable's daily mean over a region.
+
+`/api/daily/timeseries` takes the fields of the time series form, and streams the
+series as it's calculated, as JSON or (with `format=csv`) CSV. Days without data have
+no value. Its plot is served from `/timeseries/plot.png`.
+"""
+import csv
+import io
+import json
+from collections.abc import Iterator
+from typing import Any
+
+from flask import abort, render_template, request, stream_with_context, url_for
+from werkzeug.http import is_resource_modified
+
+from sipn_reanalysis_plots import app
+from sipn_reanalysis_plots.constants.plot import PLOT_DPI
+from sipn_reanalysis_plots.constants.variables import VARIABLES
+from sipn_reanalysis_plots.errors import NoDataFoundError
+from sipn_reanalysis_plots.forms import DailyTimeSeriesForm
+from sipn_reanalysis_plots.routes.image import set_plot_cache_control
+from sipn_reanalysis_plots.util.data.list import (
+    max_daily_data_date_str,
+    min_daily_data_date_str,
+)
+from sipn_reanalysis_plots.util.timeseries import (
+    DailyMean,
+    DailyTimeSeriesRequest,
+    daily_means,
+    render_daily_means_png,
+    timeseries_etag,
+)
+
+_FORMATS = {'json': 'application/json', 'csv': 'text/csv'}
+
+
+@app.route('/timeseries')
+def timeseries():
+    submitted = request.args != {}
+
+    try:
+        form = DailyTimeSeriesForm(request.args)
+        context = {
+            'min_available_data': min_daily_data_date_str(),
+            'max_available_data': max_daily_data_date_str(),
+        }
+    except NoDataFoundError as e:
+        abort(500, description=str(e))
+
+    if submitted and form.validate():
+        args = form.url_args()
+        context['img_url'] = url_for('daily_timeseries_png', **args)
+        context['json_url'] = url_for('daily_timeseries', **args)
+        context['csv_url'] = url_for('daily_timeseries', **args, format='csv')
+
+    return render_template(
+        'timeseries.html.j2',
+        form=form,
+        variables=VARIABLES,
+        **context,
+    )
+
+
+@app.route('/timeseries/plot.png')
+def daily_timeseries_png():
+    form = DailyTimeSeriesForm(request.args)
+    if not form.validate():
+        return {
+            'description': 'Invalid time series parameters',
+            'errors': form.errors,
+        }, 400
+
+    timeseries_request = form.timeseries_request()
+    response = _conditional_response(form, timeseries_request, suffix='png')
+    if response.status_code != 304:
+        means = list(daily_means(timeseries_request))
+        response.set_data(
+            render_daily_means_png(timeseries_request, means, dpi=PLOT_DPI),
+        )
+        response.mimetype = 'image/png'
+    return response
+
+
+@app.route('/api/daily/timeseries')
+def daily_timeseries():
+    form = DailyTimeSeriesForm(request.args)
+    if not form.validate():
+        return {
+            'description': 'Invalid time series parameters',
+            'errors': form.errors,
+        }, 400
+
+    fmt = request.args.get('format', 'json')
+    if fmt not in _FORMATS:
+        return {'description': f'format must be one of {tuple(_FORMATS)}'}, 400
+
+    timeseries_request = form.timeseries_request()
+    response = _conditional_response(form, timeseries_request, suffix=fmt)
+    if response.status_code != 304:
+        chunks = _csv_chunks if fmt == 'csv' else _json_chunks
+        response.response = stream_with_context(
+            chunks(timeseries_request, daily_means(timeseries_request)),
+        )
+        response.mimetype = _FORMATS[fmt]
+    return response
+
+
+def _conditional_response(
+    form: DailyTimeSeriesForm,
+    timeseries_request: DailyTimeSeriesRequest,
+    *,
+    suffix: str,
+) -> Any:
+    """Make a response with the series' ETag, which is a 304 if it's not modified."""
+    etag = f'{timeseries_etag(timeseries_request)}-{suffix}'
+    response = app.response_class()
+    response.set_etag(etag)
+    set_plot_cache_control(response, form)
+
+    if not is_resource_modified(request.environ, etag=etag):
+        response.status_code = 304
+    return response
+
+
+def _json_chunks(
+    timeseries_request: DailyTimeSeriesRequest,
+    means: Iterator[DailyMean],
+) -> Iterator[str]:
+    """Encode the series as a JSON object, with its units (known last) at the end."""
+    header = {
+        'variable': timeseries_request.variable,
+        'level': timeseries_request.level,
+        'region': timeseries_request.region.long_name,
+        'start_date': timeseries_request.start_date.isoformat(),
+        'end_date': timeseries_request.end_date.isoformat(),
+    }
+    yield json.dumps(header)[:-1] + ', "values": ['
+
+    units = None
+    for i, mean in enumerate(means):
+        units = units or mean.units
+        value = {'date': mean.date.isoformat(), 'value': mean.value}
+        yield (', ' if i else '') + json.dumps(value)
+
+    yield f'], "units": {json.dumps(units)}}}'
+
+
+def _csv_chunks(
+    timeseries_request: DailyTimeSeriesRequest,
+    means: Iterator[DailyMean],
+) -> Iterator[str]:
+    yield _csv_row('date', 'value', 'units')
+    for mean in means:
+        yield _csv_row(
+            mean.date.isoformat(),
+            '' if mean.value is None else repr(mean.value),
+            mean.units or '',
+        )
+
+
+def _csv_row(*values: str) -> str:
+    with io.StringIO() as buffer:
+        csv.writer(buffer).writerow(values)
+        return buffer.getvalue()
@@ -0,0 +1,79 @@
+import datetime as dt
+
+import pytest
+
+from sipn_reanalysis_plots.benchmark.synthetic_data import generate_data_tree
+from sipn_reanalysis_plots.constants.paths import (
+    DATA_DAILY_DIR,
+    DATA_DIR,
+    DATA_MANIFEST_FILE,
+    DATA_MONTHLY_DIR,
+)
+from sipn_reanalysis_plots.util import grid_export, render, timeseries
+from sipn_reanalysis_plots.util.data import files
+from sipn_reanalysis_plots.util.data import list as data_list
+from sipn_reanalysis_plots.util.data import reduce, zarr_store
+from sipn_reanalysis_plots.util.data.grid_store import GridStore
+from sipn_reanalysis_plots.util.disk_cache import DiskCache
+
+
+@pytest.fixture
+def synthetic_data(tmp_path, monkeypatch):
+    """Point the data and cache paths at a tree of 5 synthetic days in `tmp_path`.
+
+    Returns the days' dates.
+    """
+    data_dir = tmp_path / 'data'
+    cache_dir = tmp_path / 'cache'
+    end_date = dt.date(2020, 1, 5)
+    generate_data_tree(data_dir, days=5, end_date=end_date, full_days=5, grid_size=41)
+
+    daily_dir = data_dir / DATA_DAILY_DIR.relative_to(DATA_DIR)
+    monthly_dir = data_dir / DATA_MONTHLY_DIR.relative_to(DATA_DIR)
+    manifest_file = data_dir / DATA_MANIFEST_FILE.relative_to(DATA_DIR)
+    for module in (files, data_list):
+        monkeypatch.setattr(module, 'DATA_DAILY_DIR', daily_dir)
+    monkeypatch.setattr(files, 'DATA_MONTHLY_DIR', monthly_dir)
+    monkeypatch.setattr(
+        data_list,
+        '_daily_index',
+        data_list._AvailabilityIndex(
+            daily_dir,
+            data_list._date_from_daily_path,
+            data_list._date_ordinal,
+            manifest_file=manifest_file,
+        ),
+    )
+    monkeypatch.setattr(
+        data_list,
+        '_monthly_index',
+        data_list._AvailabilityIndex(
+            monthly_dir,
+            data_list._yearmonth_from_monthly_path,
+            data_list._yearmonth_ordinal,
+            manifest_file=manifest_file,
+        ),
+    )
+
+    monkeypatch.setattr(
+        reduce,
+        'grid_store',
+        GridStore(cache_dir / 'grids', max_bytes=2**24),
+    )
+    monkeypatch.setattr(zarr_store, 'ZARR_STORE_DIR', cache_dir / 'zarr')
+    monkeypatch.setattr(zarr_store, '_ZARR_DIR', cache_dir / 'zarr' / 'daily.zarr')
+    monkeypatch.setattr(zarr_store, '_META_FILE', cache_dir / 'zarr' / 'meta.json')
+    monkeypatch.setattr(zarr_store, '_store_cache', None)
+    monkeypatch.setattr(grid_export, 'GRID_COORDS_DIR', cache_dir / 'grid-coords')
+    monkeypatch.setattr(
+        render,
+        'plot_cache',
+        DiskCache(cache_dir / 'plots', max_bytes=2**24, suffix='.png'),
+    )
+    monkeypatch.setattr(
+        timeseries,
+        'timeseries_cache',
+        DiskCache(cache_dir / 'timeseries', max_bytes=2**20, suffix='.json'),
+    )
+
+    return [end_date - dt.timedelta(days=days) for days in range(4, -1, -1)]
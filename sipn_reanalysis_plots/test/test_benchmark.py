@@ -0,0 +1,44 @@
+import datetime as dt
+
+import numpy as np
+import xarray as xra
+
+from sipn_reanalysis_plots.benchmark.suite import compare_results
+from sipn_reanalysis_plots.benchmark.synthetic_data import generate_data_tree
+
+
+def test_generate_data_tree_fills_only_latest_days(tmp_path):
+    generate_data_tree(
+        tmp_path,
+        days=3,
+        end_date=dt.date(2020, 1, 3),
+        full_days=1,
+        grid_size=5,
+    )
+
+    daily_files = sorted((tmp_path / 'daily').glob('*'))
+    assert [p.name for p in daily_files] == [
+        'cfsr.20200101.nc',
+        'cfsr.20200102.nc',
+        'cfsr.20200103.nc',
+    ]
+    assert (tmp_path / 'manifest.tsv').exists()
+
+    with xra.open_dataset(daily_files[0]) as placeholder:
+        assert np.isnan(placeholder['T'].values).all()
+    with xra.open_dataset(daily_files[-1]) as full:
+        assert full['T'].shape == (1, 4, 5, 5)
+        assert not np.isnan(full['T'].values).any()
+
+
+def test_compare_results_flags_slower_benchmarks():
+    def results(**medians):
+        return {'results': {k: {'median': v} for k, v in medians.items()}}
+
+    regressions = compare_results(
+        results(fast=1.0, slow=1.0, old=1.0),
+        results(fast=1.1, slow=1.5, new=9.0),
+        threshold=0.2,
+    )
+    assert len(regressions) == 1
+    assert regressions[0].startswith('slow:')
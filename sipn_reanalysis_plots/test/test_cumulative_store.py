@@ -0,0 +1,58 @@
+import numpy as np
+
+from sipn_reanalysis_plots.util.data import cumulative_store
+from sipn_reanalysis_plots.util.data.cumulative_store import _RowWriter
+from sipn_reanalysis_plots.util.data.read import read_cfsr_daily_files
+from sipn_reanalysis_plots.util.data.reduce import reduce_dataset
+
+
+def test_row_writer_resumes_and_counts_wrap(tmp_path):
+    path = tmp_path / 'T-2m.counts'
+    dtype = np.dtype(np.uint16)
+
+    writer = _RowWriter(path, dtype=dtype, shape=(2,), row=0)
+    writer.add(np.array([60_000, 1]))
+    writer.close()
+
+    # Resume after row 1, as when the store is extended after the next ingest
+    writer = _RowWriter(path, dtype=dtype, shape=(2,), row=1)
+    writer.add(np.array([10_000, 2]))
+    writer.close()
+
+    rows = np.fromfile(path, dtype=dtype).reshape(3, 2)
+    # The running count overflowed, but differences between rows are still correct
+    assert rows[2][0] < rows[1][0]
+    assert list(rows[2] - rows[1]) == [10_000, 2]
+
+
+def test_cumulative_mean_matches_files_in_the_maps_region(
+    synthetic_data,
+    tmp_path,
+    monkeypatch,
+):
+    store_dir = tmp_path / 'cumulative'
+    monkeypatch.setattr(cumulative_store, 'CUMULATIVE_STORE_DIR', store_dir)
+    monkeypatch.setattr(cumulative_store, '_META_FILE', store_dir / 'meta.json')
+    monkeypatch.setattr(cumulative_store, '_meta_cache', None)
+    assert cumulative_store.extend_cumulative_store() == len(synthetic_data)
+
+    start_date, end_date = synthetic_data[1], synthetic_data[3]
+    mean = cumulative_store.cumulative_mean(
+        start_date,
+        end_date,
+        variable='T',
+        level='2m',
+    )
+    with read_cfsr_daily_files(
+        start_date=start_date,
+        end_date=end_date,
+        variable='T',
+        level='2m',
+    ) as dataset:
+        expected = reduce_dataset(dataset, variable='T', level='2m')
+
+    # Rows only hold the map's region of the grid
+    assert mean.shape == expected.shape != (41, 41)
+    np.testing.assert_allclose(mean, expected, rtol=1e-6)
+    row_bytes = (store_dir / 'T-2m.sums').stat().st_size // (len(synthetic_data) + 1)
+    assert row_bytes == mean.size * 8
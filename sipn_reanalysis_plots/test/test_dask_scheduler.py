@@ -0,0 +1,19 @@
+import dask.array as da
+
+from sipn_reanalysis_plots.util.dask_scheduler import configure_dask_scheduler
+from sipn_reanalysis_plots.util.timing import StageTimer, recording
+
+
+def test_dask_computes_recorded():
+    configure_dask_scheduler()
+    timer = StageTimer()
+
+    with recording(timer):
+        assert da.ones(10, chunks=5).sum().compute() == 10
+    # Not recorded outside the block
+    da.ones(10, chunks=5).sum().compute()
+
+    assert timer.counts['dask_tasks'] > 0
+    assert timer.seconds['dask'] > 0
+    assert set(timer.counts) == {'dask_tasks'}
+    assert set(timer.seconds) == {'dask'}
@@ -0,0 +1,36 @@
+import os
+
+from sipn_reanalysis_plots.util.disk_cache import DiskCache
+
+
+def _put_at(cache, key, data, mtime):
+    path = cache.put(key, data)
+    os.utime(path, (mtime, mtime))
+
+
+def test_disk_cache_round_trip(tmp_path):
+    cache = DiskCache(tmp_path, max_bytes=1000)
+
+    assert cache.get('foo') is None
+    cache.put('foo', b'bar')
+    assert cache.get('foo') == b'bar'
+
+    assert (cache.stats.hits, cache.stats.misses, cache.stats.writes) == (1, 1, 1)
+
+
+def test_disk_cache_evicts_least_recently_used(tmp_path):
+    cache = DiskCache(tmp_path, max_bytes=300)
+    for i in range(3):
+        _put_at(cache, str(i), b'x' * 100, mtime=1_000_000 + i)
+
+    # Reading an entry makes it the most recently used
+    assert cache.get('0') is not None
+    cache.put('3', b'x' * 100)
+
+    assert [cache.get(str(i)) is not None for i in range(4)] == [
+        True,
+        False,
+        True,
+        True,
+    ]
+    assert cache.stats.evictions == 1
@@ -0,0 +1,61 @@
+import numpy as np
+import xarray as xra
+
+from sipn_reanalysis_plots.util.data.file_pool import NetcdfFilePool
+
+
+def _write_nc(path, value):
+    xra.Dataset({'T': (('y', 'x'), np.full((2, 2), value))}).to_netcdf(
+        path,
+        engine='netcdf4',
+    )
+
+
+def test_file_pool_reuses_open_files(tmp_path):
+    path = tmp_path / 'a.nc'
+    _write_nc(path, 1.0)
+    pool = NetcdfFilePool(max_size=2)
+
+    with pool.open(path) as handle:
+        first = handle
+    with pool.open(path) as handle:
+        assert handle is first
+        assert handle.isopen()
+
+    assert (pool.stats.hits, pool.stats.misses) == (1, 1)
+    pool.close()
+    assert not first.isopen()
+
+
+def test_file_pool_reopens_rewritten_files(tmp_path):
+    path = tmp_path / 'a.nc'
+    _write_nc(path, 1.0)
+    pool = NetcdfFilePool(max_size=2)
+    with pool.open(path) as handle:
+        first = handle
+
+    # Re-ingested by replacing the file
+    _write_nc(tmp_path / 'b.nc', 2.0)
+    (tmp_path / 'b.nc').rename(path)
+
+    with pool.open(path) as handle:
+        assert handle['T'][0, 0] == 2.0
+    assert not first.isopen()
+    pool.close()
+
+
+def test_file_pool_closes_evicted_files_once_unused(tmp_path):
+    paths = [tmp_path / f'{i}.nc' for i in range(2)]
+    for path in paths:
+        _write_nc(path, 1.0)
+    pool = NetcdfFilePool(max_size=1)
+
+    with pool.open(paths[0]) as first:
+        with pool.open(paths[1]):
+            # Evicted, but still in use
+            assert first.isopen()
+        assert first.isopen()
+    assert not first.isopen()
+
+    assert pool.stats.evictions == 1
+    pool.close()
@@ -0,0 +1,45 @@
+import numpy as np
+
+from sipn_reanalysis_plots import app
+from sipn_reanalysis_plots.constants.grid import GRID_UINT16_NODATA
+from sipn_reanalysis_plots.util.grid_export import quantize_uint16
+
+
+def test_quantize_uint16_restores_values_within_half_a_step():
+    values = np.array([[250.0, np.nan], [260.5, 255.25]], dtype=np.float32)
+
+    quantized, scale, offset = quantize_uint16(values)
+
+    assert quantized.dtype == np.dtype('<u2')
+    assert quantized[0, 1] == GRID_UINT16_NODATA
+    assert quantized.max(initial=0, where=quantized != GRID_UINT16_NODATA) == 65534
+    restored = quantized.astype(np.float64) * scale + offset
+    finite = np.isfinite(values)
+    assert np.all(np.abs(restored[finite] - values[finite]) <= scale / 2)
+
+
+def test_grid_response_is_described_by_headers(synthetic_data):
+    client = app.test_client()
+    url = (
+        '/api/daily/grid?variable=T&analysis_level=2m&encoding=float32'
+        f'&start_date={synthetic_data[-1]}'
+    )
+
+    response = client.get(url)
+
+    assert response.status_code == 200
+    ny, nx = (int(size) for size in response.headers['X-Grid-Shape'].split(','))
+    values = np.frombuffer(response.data, dtype='<f4')
+    assert values.size == ny * nx
+    assert np.isfinite(values).any()
+
+    coords = client.get(response.headers['X-Grid-Coords'])
+    assert coords.status_code == 200
+    assert len(coords.data) == (nx + ny) * 8
+    assert 'immutable' in coords.headers['Cache-Control']
+
+    not_modified = client.get(
+        url,
+        headers={'If-None-Match': response.headers['ETag']},
+    )
+    assert not_modified.status_code == 304
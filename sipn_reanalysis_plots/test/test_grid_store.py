@@ -0,0 +1,25 @@
+import numpy as np
+import xarray as xra
+
+from sipn_reanalysis_plots.util.data.grid_store import GridStore
+
+
+def test_grid_store_round_trip(tmp_path):
+    data_array = xra.DataArray(
+        np.arange(6, dtype=np.float64).reshape(2, 3),
+        dims=('lat', 'lon'),
+        coords={'lat': [90.0, 89.5], 'lon': [0.0, 0.5, 1.0], 'lev': '2m'},
+        attrs={'long_name': 'Air temperature', 'units': 'K'},
+        name='T',
+    )
+    store = GridStore(tmp_path, max_bytes=2**20)
+
+    assert store.get('foo', template_key='T/2m') is None
+    store.put('foo', data_array, template_key='T/2m')
+
+    # A fresh store (as in another worker process) reads the template from disk
+    actual = GridStore(tmp_path, max_bytes=2**20).get('foo', template_key='T/2m')
+
+    assert isinstance(actual.data, np.memmap)
+    assert actual.dtype == np.float32
+    xra.testing.assert_identical(actual, data_array.astype(np.float32))
@@ -0,0 +1,27 @@
+import re
+
+from sipn_reanalysis_plots import app
+
+
+def test_latest_plot_images_are_linked_by_date(synthetic_data):
+    client = app.test_client()
+
+    page = client.get('/daily?variable=T&analysis_level=2m')
+    assert page.status_code == 200
+    img_urls = re.findall(r'src="(/daily/plot\.png[^"]*)"', page.text)
+    assert len(img_urls) == 2
+    assert all(f'start_date={synthetic_data[-1]}' in url for url in img_urls)
+
+    # Images of the latest data (by default) must be revalidated
+    latest = client.get('/daily/plot.png?variable=T&analysis_level=2m')
+    assert latest.status_code == 200
+    assert latest.cache_control.no_cache
+    assert latest.cache_control.max_age is None
+
+    dated = client.get(
+        f'/daily/plot.png?variable=T&analysis_level=2m&start_date={synthetic_data[-1]}',
+        headers={'If-None-Match': latest.headers['ETag']},
+    )
+    assert dated.status_code == 304
+    assert not dated.cache_control.no_cache
+    assert dated.cache_control.max_age > 0
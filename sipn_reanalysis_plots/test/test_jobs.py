@@ -0,0 +1,48 @@
+import os
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from sipn_reanalysis_plots.util import jobs
+from sipn_reanalysis_plots.util.jobs import JobState, _JobProgress, read_job
+
+
+@pytest.fixture
+def job_state(tmp_path, monkeypatch):
+    monkeypatch.setattr(jobs, 'JOB_STATE_DIR', tmp_path)
+    state = JobState(
+        id='abc',
+        plot='daily/T/2m/20200101-20200102/contour=0/anomaly=0',
+        status='running',
+        files_read=0,
+        files_total=2,
+        image_endpoint='daily_plot_png',
+        pid=os.getpid(),
+        updated_ns=0,
+    )
+    jobs._write_state(state)
+    return state
+
+
+def test_job_progress_counts_each_input_file_once(job_state):
+    fps = [Path('/data/daily/cfsr.20200101.nc'), Path('/data/daily/cfsr.20200102.nc')]
+    progress = _JobProgress(job_state.id, frozenset(fps))
+
+    progress(fps[0])
+    progress(fps[0])
+    progress(Path('/data/daily/cfsr.20200103.nc'))
+    assert read_job(job_state.id).files_read == 1
+
+    progress(fps[1])
+    assert read_job(job_state.id).files_read == 2
+
+
+def test_read_job_reports_abandoned_jobs_failed(job_state):
+    assert read_job(job_state.id).status == 'running'
+
+    exited = subprocess.Popen(['true'])
+    exited.wait()
+    jobs._update_state(job_state.id, pid=exited.pid)
+
+    assert read_job(job_state.id).status == 'failed'
@@ -0,0 +1,128 @@
+import datetime as dt
+import os
+
+from sipn_reanalysis_plots.util.data.list import (
+    _AvailabilityIndex,
+    _date_from_daily_path,
+    _date_ordinal,
+    _Presence,
+    data_file_fingerprints,
+)
+from sipn_reanalysis_plots.util.data.manifest import update_manifest
+
+
+def _touch_daily(directory, date):
+    (directory / f'cfsr.{date:%Y%m%d}.nc').touch()
+
+
+def _daily_index(directory, **kwargs):
+    return _AvailabilityIndex(
+        directory,
+        _date_from_daily_path,
+        _date_ordinal,
+        manifest_file=directory.parent / 'manifest.tsv',
+        **kwargs,
+    )
+
+
+def test_availability_index_sorted(tmp_path):
+    daily_dir = tmp_path / 'daily'
+    daily_dir.mkdir()
+
+    for day in (3, 1, 2):
+        _touch_daily(daily_dir, dt.date(2021, 1, day))
+
+    index = _daily_index(daily_dir)
+    listing = index.listing()
+
+    assert listing.keys == [dt.date(2021, 1, day) for day in (1, 2, 3)]
+    assert listing.paths == sorted(listing.paths)
+
+
+def test_availability_index_rebuilds_on_mtime_change(tmp_path):
+    daily_dir = tmp_path / 'daily'
+    daily_dir.mkdir()
+
+    _touch_daily(daily_dir, dt.date(2021, 1, 1))
+    index = _daily_index(daily_dir)
+    assert len(index.listing().keys) == 1
+
+    # Add a file without changing the directory mtime; the cached listing is used.
+    stat = daily_dir.stat()
+    _touch_daily(daily_dir, dt.date(2021, 1, 2))
+    os.utime(daily_dir, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert len(index.listing().keys) == 1
+
+    os.utime(daily_dir, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    assert len(index.listing().keys) == 2
+
+
+def test_availability_index_rebuilds_on_ttl_expiry(tmp_path):
+    daily_dir = tmp_path / 'daily'
+    daily_dir.mkdir()
+
+    _touch_daily(daily_dir, dt.date(2021, 1, 1))
+    index = _daily_index(daily_dir, ttl=0)
+    assert len(index.listing().keys) == 1
+
+    stat = daily_dir.stat()
+    _touch_daily(daily_dir, dt.date(2021, 1, 2))
+    os.utime(daily_dir, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert len(index.listing().keys) == 2
+
+
+def test_availability_index_reads_manifest(tmp_path):
+    daily_dir = tmp_path / 'daily'
+    daily_dir.mkdir()
+    for day in (1, 2):
+        _touch_daily(daily_dir, dt.date(2021, 1, day))
+    update_manifest(daily_dir.glob('*'), manifest_file=tmp_path / 'manifest.tsv')
+
+    # The manifest is newer than the directory, so the directory is not listed.
+    index = _daily_index(daily_dir)
+    stat = daily_dir.stat()
+    _touch_daily(daily_dir, dt.date(2021, 1, 3))
+    os.utime(daily_dir, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert len(index.listing().keys) == 2
+
+    # Once the directory is newer than the manifest, it's listed instead.
+    os.utime(daily_dir, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert len(index.listing().keys) == 3
+
+
+def test_first_incremental_manifest_update_lists_every_file(tmp_path):
+    daily_dir = tmp_path / 'daily'
+    daily_dir.mkdir()
+    for day in (1, 2, 3):
+        _touch_daily(daily_dir, dt.date(2021, 1, day))
+
+    # Without a manifest, an update for one file records them all
+    (path, *_) = daily_dir.glob('*')
+    update_manifest([path], manifest_file=tmp_path / 'manifest.tsv')
+
+    index = _daily_index(daily_dir)
+    assert index.listing().keys == [dt.date(2021, 1, day) for day in (1, 2, 3)]
+
+
+def test_presence():
+    presence = _Presence([3, 4, 6, 7, 10])
+
+    assert presence.count(0, 20) == 5
+    assert presence.count(4, 6) == 2
+    assert presence.missing(3, 4) == []
+    assert presence.missing(1, 7) == [1, 2, 5]
+    assert presence.missing(9, 12) == [9, 11, 12]
+
+
+def test_data_file_fingerprints_see_files_rewritten_after_manifest(tmp_path):
+    daily_dir = tmp_path / 'daily'
+    daily_dir.mkdir()
+    _touch_daily(daily_dir, dt.date(2021, 1, 1))
+    update_manifest(daily_dir.glob('*'), manifest_file=tmp_path / 'manifest.tsv')
+
+    # Re-ingested in place, without updating the manifest
+    (path,) = daily_dir.glob('*')
+    path.write_bytes(b'reingested')
+
+    (fingerprint,) = data_file_fingerprints([path])
+    assert fingerprint.size == len(b'reingested')
@@ -0,0 +1,17 @@
+from sipn_reanalysis_plots import app
+
+
+def test_metrics_scraped_after_requests():
+    client = app.test_client()
+    client.get('/daily/plot.png?contour=y')
+
+    response = client.get('/metrics')
+
+    assert response.status_code == 200
+    assert response.content_type.startswith('text/plain')
+    body = response.get_data(as_text=True)
+    assert (
+        'sipn_reanalysis_plots_request_duration_seconds_count{anomaly="false",'
+        'contour="true",endpoint="daily_plot_png",period="daily",range="single"}'
+    ) in body
+    assert 'sipn_reanalysis_plots_data_files_opened_total' in body
@@ -0,0 +1,26 @@
+import numpy as np
+
+from sipn_reanalysis_plots.util.plot import plot_cmap_params
+
+
+def test_plot_cmap_params_center_values_spanning_zero():
+    values = np.array([[-2.0, np.nan], [5.0, 1.0]])
+
+    params = plot_cmap_params(values)
+
+    assert (params['vmin'], params['vmax']) == (-5.0, 5.0)
+    assert params['cmap'] == 'RdBu_r'
+    assert plot_cmap_params(values + 10)['cmap'] == 'viridis'
+
+
+def test_plot_cmap_params_contour_levels_are_round():
+    values = np.array([[251.3, 268.9], [np.nan, 259.0]])
+
+    params = plot_cmap_params(values, as_filled_contour=True)
+
+    assert list(params['levels']) == list(np.arange(251.0, 270.0))
+    assert params['norm'].boundaries[0] == 251.0
+    # A color for each band, and others beyond the levels at both ends
+    assert params['cmap'].N == len(params['levels']) - 1
+    assert not np.array_equal(params['cmap'].get_under(), params['cmap'](0))
+    assert params['extend'] == 'both'
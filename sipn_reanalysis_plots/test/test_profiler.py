@@ -0,0 +1,35 @@
+import threading
+
+from sipn_reanalysis_plots import app
+from sipn_reanalysis_plots.util import profiler
+
+
+def test_stack_sampler_samples_thread():
+    sampler = profiler.StackSampler(threading.get_ident(), interval=1)
+    sampler.sample()
+
+    assert sampler.samples == 1
+    (line,) = sampler.folded().splitlines()
+    assert line.startswith('request;')
+    assert ';test_stack_sampler_samples_thread (test/test_profiler.py);' in line
+    assert line.endswith(' 1')
+
+
+def test_oldest_profiles_deleted(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiler, 'PROFILE_DIR', tmp_path)
+    monkeypatch.setattr(profiler, 'PROFILE_MAX_FILES', 2)
+
+    for i in range(3):
+        profiler._save_profile({'request_url': f'/daily?{i}'})
+
+    saved = [path.read_text() for path in profiler.list_profiles()]
+    assert saved == ['{"request_url": "/daily?2"}', '{"request_url": "/daily?1"}']
+
+
+def test_profile_token_only_accepted_in_header(monkeypatch):
+    monkeypatch.setattr(profiler, 'PROFILE_TOKEN', 'secret')
+
+    with app.test_request_context('/', headers={'X-Profile-Token': 'secret'}):
+        assert profiler.request_has_profile_token()
+    with app.test_request_context('/?profile_token=secret'):
+        assert not profiler.request_has_profile_token()
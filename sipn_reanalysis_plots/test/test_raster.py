@@ -0,0 +1,60 @@
+import io
+
+import numpy as np
+import pytest
+import xarray as xra
+from PIL import Image
+
+from sipn_reanalysis_plots.constants.plot import PLOT_DPI
+from sipn_reanalysis_plots.util.plot import PlotData
+from sipn_reanalysis_plots.util.raster import _cell_indices
+from sipn_reanalysis_plots.util.render import render_plot_data_pngs
+
+
+@pytest.mark.parametrize(
+    'corners',
+    [
+        pytest.param(np.array([0.0, 1.0, 2.0, 3.0]), id='ascending'),
+        pytest.param(np.array([3.0, 2.0, 1.0, 0.0]), id='descending'),
+    ],
+)
+def test_cell_indices(corners):
+    coords = np.array([-0.5, 0.5, 1.5, 2.5, 3.5])
+    actual = _cell_indices(corners, coords)
+
+    # Each coordinate inside the grid is between its cell's corners
+    for coord, index in zip(coords, actual):
+        if index < 0:
+            assert not corners.min() <= coord <= corners.max()
+        else:
+            low, high = sorted(corners[index : index + 2])
+            assert low <= coord <= high
+
+    assert list(actual < 0) == [True, False, False, False, True]
+
+
+def test_raster_image_matches_matplotlib():
+    """The engines' images differ by ~1 of 255 per channel, in lines and placement."""
+    coords = np.linspace(-5e6, 5e6, 161)
+    x, y = np.meshgrid(coords, coords[::-1])
+    # A field in the range the raster frame's colorbar is laid out for
+    values = 250 + 40 * np.hypot(x, y) / 5e6 + 5 * np.sin(x / 1e6)
+    plot_data = PlotData(
+        data_array=xra.DataArray(
+            values,
+            coords={'y': coords[::-1], 'x': coords},
+            dims=('y', 'x'),
+        ),
+        title='Synthetic field\n(K)',
+    )
+
+    matplotlib_rgb = _render_rgb(plot_data, engine='matplotlib')
+    raster_rgb = _render_rgb(plot_data, engine='raster')
+
+    assert raster_rgb.shape == matplotlib_rgb.shape
+    assert np.abs(raster_rgb - matplotlib_rgb).mean() < 2
+
+
+def _render_rgb(plot_data, *, engine):
+    png = render_plot_data_pngs(plot_data, engine=engine, dpis=[PLOT_DPI])[PLOT_DPI]
+    return np.asarray(Image.open(io.BytesIO(png)).convert('RGB'), dtype=np.float64)
@@ -0,0 +1,62 @@
+import cartopy.crs as ccrs
+import numpy as np
+import pytest
+import xarray as xra
+
+from sipn_reanalysis_plots.constants.crs import CRS
+from sipn_reanalysis_plots.constants.plot import LATITUDE_LIMIT, MAP_EXTENT_RADIUS
+from sipn_reanalysis_plots.util.data.read import (
+    _select,
+    covering_slice,
+    map_region_slices,
+)
+from sipn_reanalysis_plots.util.data.reduce import select_variable_level
+
+
+def test_select():
+    shape = (1, 4, 11, 11)
+    dataset = xra.Dataset(
+        {
+            'U': (('t', 'lev', 'y', 'x'), np.arange(484.0).reshape(shape)),
+            'T': (('t', 'lev1', 'y', 'x'), np.arange(484.0).reshape(shape) + 1000),
+        },
+        coords={
+            'lev': ['10m', '925mb', '850mb', '500mb'],
+            'lev1': ['2m', '925mb', '850mb', '500mb'],
+            'y': np.linspace(5e6, -5e6, 11),
+            'x': np.linspace(-5e6, 5e6, 11),
+        },
+    )
+
+    actual = _select(dataset, variable='T', level='850mb')
+
+    assert list(actual.data_vars) == ['T']
+    assert 'lev' not in actual.coords
+    assert list(actual['lev1'].values) == ['850mb']
+    # It can still be reduced like the whole dataset, within the map's region
+    np.testing.assert_array_equal(
+        select_variable_level(actual, variable='T', level='850mb'),
+        select_variable_level(dataset, variable='T', level='850mb').isel(
+            map_region_slices(dataset),
+        ),
+    )
+
+
+@pytest.mark.parametrize(
+    'coords',
+    [
+        pytest.param(np.arange(10.0), id='ascending'),
+        pytest.param(np.arange(10.0)[::-1], id='descending'),
+    ],
+)
+def test_covering_slice(coords):
+    actual = coords[covering_slice(coords, (6.5, 2.5))]
+    assert sorted(actual) == [2, 3, 4, 5, 6, 7]
+
+    assert len(coords[covering_slice(coords, (-1, 100))]) == 10
+
+
+def test_map_extent_radius_is_latitude_limits_distance_from_pole():
+    x, y = CRS.transform_point(30, LATITUDE_LIMIT, ccrs.PlateCarree())
+
+    assert np.hypot(x, y) == pytest.approx(MAP_EXTENT_RADIUS, abs=1)
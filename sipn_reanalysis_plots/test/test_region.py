@@ -0,0 +1,21 @@
+import numpy as np
+import pytest
+
+from sipn_reanalysis_plots.constants.timeseries import REGIONS
+from sipn_reanalysis_plots.util import region
+
+
+def test_region_weights_average_sin_lat_like_the_globe():
+    """Over a polar cap from latitude φ0, sin(lat) averages to (1 + sin φ0) / 2."""
+    x = np.linspace(-5e6, 5e6, 161)
+    signature = (x.tobytes(), x[::-1].tobytes(), x.dtype.str)
+    arctic = REGIONS['arctic']
+
+    weights = region.region_weights(arctic, signature)
+    _, lat = region._cell_lonlats(signature)
+    mean = np.average(np.sin(np.deg2rad(lat)), weights=weights)
+
+    assert mean == pytest.approx(
+        (1 + np.sin(np.deg2rad(arctic.min_lat))) / 2,
+        abs=5e-4,
+    )
@@ -0,0 +1,106 @@
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from sipn_reanalysis_plots import app
+from sipn_reanalysis_plots.errors import (
+    RenderPoolBusyError,
+    RenderTimeoutError,
+    RenderWorkerError,
+)
+from sipn_reanalysis_plots.routes import image
+from sipn_reanalysis_plots.util.render_pool import RenderPool
+
+
+@pytest.fixture
+def pool():
+    pool = RenderPool(
+        1,
+        max_queued=0,
+        timeout_seconds=5,
+        max_jobs=2,
+        max_rss_bytes=2**40,
+    )
+    yield pool
+    pool.close()
+
+
+def test_render_pool_recycles_workers(pool):
+    first_pid = pool.run(os.getpid)
+    assert pool.run(os.getpid) == first_pid
+    # The process was replaced after its second job
+    assert pool.run(os.getpid) != first_pid
+
+
+def test_render_pool_raises_job_errors(pool):
+    with pytest.raises(FileNotFoundError):
+        pool.run(os.stat, '/does/not/exist')
+
+
+def test_render_pool_timeout_replaces_worker(pool):
+    pool._timeout_seconds = 0.5
+    pid = pool.run(os.getpid)
+
+    with pytest.raises(RenderTimeoutError):
+        pool.run(time.sleep, 60)
+
+    assert pool.run(os.getpid) != pid
+
+
+def test_render_pool_refuses_beyond_queue(pool):
+    running = threading.Thread(target=pool.run, args=(time.sleep, 2))
+    running.start()
+    time.sleep(0.5)
+
+    with pytest.raises(RenderPoolBusyError):
+        pool.run(os.getpid)
+
+    running.join()
+
+
+def test_render_worker_error_is_a_retryable_503(synthetic_data, monkeypatch):
+    def render_plot_png(*args, **kwargs):
+        raise RenderWorkerError('Render process died')
+
+    monkeypatch.setattr(image, 'render_plot_png', render_plot_png)
+
+    response = app.test_client().get(
+        f'/daily/plot.png?variable=T&analysis_level=2m&start_date={synthetic_data[-1]}'
+    )
+
+    assert response.status_code == 503
+    assert 'Retry-After' in response.headers
+
+
+def test_render_processes_exit_with_killed_web_worker():
+    web_worker = subprocess.Popen(
+        [
+            sys.executable,
+            '-c',
+            'import os, time\n'
+            'from sipn_reanalysis_plots.util.render_pool import RenderPool\n'
+            'pool = RenderPool(1, max_queued=0, timeout_seconds=5, max_jobs=9,'
+            ' max_rss_bytes=2**40)\n'
+            'print(pool.run(os.getpid), flush=True)\n'
+            'pool.run(time.sleep, 60)\n',
+        ],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    render_pid = int(web_worker.stdout.readline())
+
+    # Killed mid-render, so the render process can't see its pipe close
+    time.sleep(0.5)
+    web_worker.send_signal(signal.SIGKILL)
+    web_worker.wait()
+
+    for _ in range(50):
+        if not os.path.exists(f'/proc/{render_pid}'):
+            break
+        time.sleep(0.1)
+    assert not os.path.exists(f'/proc/{render_pid}')
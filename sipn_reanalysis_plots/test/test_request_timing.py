@@ -0,0 +1,27 @@
+from sipn_reanalysis_plots import app
+from sipn_reanalysis_plots.util.timing import StageTimer, recording, stage
+
+
+def test_stages_recorded_in_current_timer():
+    timer = StageTimer()
+    other = StageTimer()
+    other.count('files_read', 2)
+
+    with recording(timer):
+        with stage('list'):
+            pass
+        timer.merge(other)
+    # Not recorded outside the block
+    with stage('open'):
+        pass
+
+    assert set(timer.seconds) == {'list'}
+    assert timer.counts == {'files_read': 2}
+    assert timer.server_timing().startswith('list;dur=')
+
+
+def test_responses_have_server_timing_header():
+    response = app.test_client().get('/nonexistent')
+
+    assert response.status_code == 404
+    assert response.headers['Server-Timing'].startswith('total;dur=')
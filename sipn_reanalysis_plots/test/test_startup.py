@@ -0,0 +1,31 @@
+import subprocess
+import sys
+
+from sipn_reanalysis_plots.constants.paths import PROJECT_DIR
+
+
+def test_app_imported_without_plotting_libraries():
+    """Web workers import the data and plotting libraries only to render."""
+    modules = _imported_modules('sipn_reanalysis_plots')
+
+    for module in ('cartopy', 'matplotlib', 'netCDF4', 'xarray', 'zarr'):
+        assert module not in modules
+
+
+def test_data_reads_imported_without_plotting_libraries():
+    """Jobs, grid exports and the warm process read data without drawing a map."""
+    modules = _imported_modules('sipn_reanalysis_plots.util.data.read')
+
+    for module in ('cartopy', 'matplotlib'):
+        assert module not in modules
+
+
+def _imported_modules(module: str) -> list[str]:
+    """List the modules imported, in a new interpreter, by importing `module`."""
+    return subprocess.run(
+        [sys.executable, '-c', f'import sys, {module}; print(*sys.modules)'],
+        cwd=PROJECT_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.split()
@@ -0,0 +1,67 @@
+import csv
+import datetime as dt
+
+import numpy as np
+
+from sipn_reanalysis_plots import app
+from sipn_reanalysis_plots.constants.timeseries import REGIONS
+from sipn_reanalysis_plots.util import timeseries
+from sipn_reanalysis_plots.util.data import region_means
+from sipn_reanalysis_plots.util.disk_cache import DiskCache
+
+
+def test_daily_means_read_uncached_runs_of_days(tmp_path, monkeypatch):
+    """Days are read in runs between missing (or cached) days, then cached."""
+    reads = []
+
+    def read_daily_region_means(start_date, end_date, **kwargs):
+        reads.append((start_date.day, end_date.day))
+        days = range(start_date.day, end_date.day + 1)
+        return np.array([np.nan if day == 5 else day for day in days]), 'K'
+
+    monkeypatch.setattr(
+        timeseries,
+        'timeseries_cache',
+        DiskCache(tmp_path, max_bytes=2**20, suffix='.json'),
+    )
+    monkeypatch.setattr(
+        timeseries,
+        'daily_data_fingerprints',
+        lambda dates: [None if date.day == 3 else 'f' for date in dates],
+    )
+    monkeypatch.setattr(
+        region_means,
+        'read_daily_region_means',
+        read_daily_region_means,
+    )
+
+    def values(end_day):
+        request = timeseries.DailyTimeSeriesRequest(
+            start_date=dt.date(2020, 1, 1),
+            end_date=dt.date(2020, 1, end_day),
+            variable='T',
+            level='2m',
+            region=REGIONS['arctic'],
+        )
+        return [mean.value for mean in timeseries.daily_means(request)]
+
+    assert values(6) == [1, 2, None, 4, None, 6]
+    assert reads == [(1, 2), (4, 6)]
+
+    assert values(7) == [1, 2, None, 4, None, 6, 7]
+    assert reads == [(1, 2), (4, 6), (7, 7)]
+
+
+def test_timeseries_csv_has_a_row_per_day(synthetic_data):
+    response = app.test_client().get(
+        '/api/daily/timeseries?variable=T&analysis_level=2m&region=arctic'
+        f'&start_date={synthetic_data[0]}&end_date={synthetic_data[-1]}&format=csv'
+    )
+
+    assert response.status_code == 200
+    assert response.mimetype == 'text/csv'
+    rows = list(csv.DictReader(response.get_data(as_text=True).splitlines()))
+    assert [row['date'] for row in rows] == [str(date) for date in synthetic_data]
+    # Synthetic temperatures are 250K at the pole, rising towards the grid's edges
+    assert all(250 < float(row['value']) < 290 for row in rows)
+    assert {row['units'] for row in rows} == {'K'}
@@ -0,0 +1,29 @@
+import os
+
+from sipn_reanalysis_plots.util import warm
+from sipn_reanalysis_plots.util.data.files import cfsr_daily_fps
+
+
+def test_newly_ingested_data_sees_files_copied_with_mtimes(
+    synthetic_data,
+    tmp_path,
+    monkeypatch,
+):
+    monkeypatch.setattr(warm, 'PLOT_CACHE_WARM_STATE_FILE', tmp_path / 'warm.json')
+
+    # The first time, only the latest day is new
+    daily_dates, _ = warm.newly_ingested_data(warm.data_fingerprints(), limit=7)
+    assert daily_dates == synthetic_data[-1:]
+
+    warm._write_warmed_fingerprints(warm.data_fingerprints())
+    assert warm.newly_ingested_data(warm.data_fingerprints(), limit=7) == ([], [])
+
+    # Re-ingested, e.g. with `rsync -a`, which preserves the source file's mtime
+    (path,) = cfsr_daily_fps(synthetic_data[1])
+    stat = path.stat()
+    with open(path, 'ab') as f:
+        f.write(b'\0')
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    daily_dates, _ = warm.newly_ingested_data(warm.data_fingerprints(), limit=7)
+    assert daily_dates == [synthetic_data[1]]
@@ -0,0 +1,105 @@
+import datetime as dt
+
+import numpy as np
+import pytest
+import xarray as xra
+
+from sipn_reanalysis_plots.util.data import zarr_store
+from sipn_reanalysis_plots.util.data.files import cfsr_daily_fps
+from sipn_reanalysis_plots.util.data.read import read_cfsr_daily_files
+from sipn_reanalysis_plots.util.data.reduce import reduce_dataset
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """Store synthetic days, each of whose value is its file's fingerprint."""
+    fingerprints = {
+        dt.date(2020, 1, 1) + dt.timedelta(days=i): str(i) for i in range(5)
+    }
+
+    def day_grids(date, levels, *, missing=False):
+        value = 0 if missing else float(fingerprints[date])
+        dims = ('lev1', 'y', 'x')
+        return xra.Dataset(
+            {
+                'T-2m': (dims, np.full((1, 2, 2), value, np.float32)),
+                'T-2m-count': (dims, np.full((1, 2, 2), not missing, np.uint16)),
+            },
+            coords={'y': [1.0, 0.0], 'x': [0.0, 1.0]},
+        ).expand_dims(t=[np.datetime64(date, 'ns')])
+
+    monkeypatch.setattr(zarr_store, 'ZARR_STORE_DIR', tmp_path)
+    monkeypatch.setattr(zarr_store, '_ZARR_DIR', tmp_path / 'daily.zarr')
+    monkeypatch.setattr(zarr_store, '_META_FILE', tmp_path / 'meta.json')
+    monkeypatch.setattr(zarr_store, '_CHUNK_DAYS', 2)
+    monkeypatch.setattr(zarr_store, '_store_cache', None)
+    monkeypatch.setattr(zarr_store, '_levels', lambda: [('T', '2m')])
+    monkeypatch.setattr(zarr_store, '_day_grids', day_grids)
+    monkeypatch.setattr(zarr_store, 'min_daily_data_date', lambda: min(fingerprints))
+    monkeypatch.setattr(zarr_store, 'max_daily_data_date', lambda: max(fingerprints))
+    monkeypatch.setattr(
+        zarr_store,
+        'daily_data_fingerprints',
+        lambda dates: [fingerprints.get(d) for d in dates],
+    )
+    return fingerprints
+
+
+def _read_values(start_date, end_date):
+    with zarr_store.read_zarr_store(
+        start_date=start_date,
+        end_date=end_date,
+        variable='T',
+        level='2m',
+    ) as dataset:
+        return list(dataset['T'].isel(y=0, x=0, lev1=0).values)
+
+
+def test_zarr_store_extends_and_rewrites_reingested_days(store):
+    assert zarr_store.extend_zarr_store() == 5
+    assert zarr_store.extend_zarr_store() == 0
+    assert _read_values(dt.date(2020, 1, 2), dt.date(2020, 1, 4)) == [1, 2, 3]
+
+    # Re-ingest a day, and ingest a new one
+    store[dt.date(2020, 1, 3)] = '10'
+    store[dt.date(2020, 1, 6)] = '5'
+    assert zarr_store.extend_zarr_store() == 4
+    assert _read_values(dt.date(2020, 1, 1), dt.date(2020, 1, 6)) == [0, 1, 10, 3, 4, 5]
+
+
+def test_zarr_store_skips_missing_days(store):
+    del store[dt.date(2020, 1, 3)]
+    zarr_store.extend_zarr_store()
+
+    meta, _ = zarr_store._open_store()
+    assert meta.rows(dt.date(2020, 1, 1), dt.date(2020, 1, 2)) == slice(0, 2)
+    assert meta.rows(dt.date(2020, 1, 2), dt.date(2020, 1, 4)) is None
+    assert meta.rows(dt.date(2020, 1, 4), dt.date(2020, 1, 6)) is None
+
+
+def test_zarr_store_range_means_match_files_with_partly_missing_steps(synthetic_data):
+    """Days with different numbers of valid steps weigh as much as in their files."""
+    for date, num_steps in zip(synthetic_data[1:3], (4, 2)):
+        (path,) = cfsr_daily_fps(date)
+        with xra.open_dataset(path) as dataset:
+            day = dataset.load()
+        steps = xra.concat([day + i for i in range(num_steps)], dim='t')
+        # Every other row is missing from all but the first step
+        steps['T'][1:, :, ::2] = np.nan
+        steps.to_netcdf(path)
+
+    zarr_store.extend_zarr_store()
+    start_date, end_date = synthetic_data[0], synthetic_data[3]
+    assert zarr_store.zarr_store_covers(start_date, end_date)
+
+    means = []
+    for opener in (zarr_store.read_zarr_store, read_cfsr_daily_files):
+        with opener(
+            start_date=start_date,
+            end_date=end_date,
+            variable='T',
+            level='2m',
+        ) as dataset:
+            means.append(reduce_dataset(dataset, variable='T', level='2m').values)
+
+    np.testing.assert_allclose(means[0], means[1], rtol=1e-6)
@@ -3,6 +3,8 @@ import datetime as dt
 import xarray as xra
 
 from sipn_reanalysis_plots._types import YearMonth
+from sipn_reanalysis_plots.constants.cache import CLIMATOLOGY_PRELOAD
+from sipn_reanalysis_plots.util.data.climatology_store import climatology_block
 from sipn_reanalysis_plots.util.data.read import (
     read_cfsr_daily_climatology_file,
     read_cfsr_monthly_climatology_file,
@@ -22,22 +24,30 @@ def diff_from_daily_climatology(
 ) -> xra.DataArray:
     """Calculate difference from climatology for given `data_array`.
 
-    Climatology is read from file and filtered to only include days in `data_array`
-    and then averaged over the "day" dimension.
+    Climatology is read from file (or a preloaded block) and filtered to only include
+    days in `data_array` and then averaged over the "day" dimension.
     """
     if not end_date:
         days = {f'{start_date:%m-%d}'}
     else:
         days = set(f'{date:%m-%d}' for date in date_range(start_date, end_date))
 
-    with read_cfsr_daily_climatology_file() as climatology_dataset:
-        climatology_dataset = climatology_dataset.sel(date=list(days))
-        climatology_data_array = reduce_dataset(
-            climatology_dataset,
+    if CLIMATOLOGY_PRELOAD:
+        block = climatology_block('daily', variable=variable, level=level)
+        climatology_data_array = block.mean(days)
+    else:
+        with read_cfsr_daily_climatology_file(
             variable=variable,
             level=level,
-        )
-        climatology_data_array = climatology_data_array.mean(dim='date')
+        ) as climatology_dataset:
+            climatology_dataset = climatology_dataset.sel(date=list(days))
+            climatology_data_array = reduce_dataset(
+                climatology_dataset,
+                variable=variable,
+                level=level,
+            )
+            # NOTE: Computed before the file is closed
+            climatology_data_array = climatology_data_array.mean(dim='date').compute()
 
     with xra.set_options(keep_attrs=True):
         diff = data_array - climatology_data_array
@@ -54,8 +64,8 @@ def diff_from_monthly_climatology(
 ) -> xra.DataArray:
     """Calculate difference from climatology for given `data_array`.
 
-    Climatology is read from file and filtered to only include months in `data_array`
-    and then averaged over the "month" dimension.
+    Climatology is read from file (or a preloaded block) and filtered to only include
+    months in `data_array` and then averaged over the "month" dimension.
     """
     if end_month is None:
         months = {start_month.month}
@@ -64,14 +74,22 @@ def diff_from_monthly_climatology(
             year_month.month for year_month in month_range(start_month, end_month)
         )
 
-    with read_cfsr_monthly_climatology_file() as climatology_dataset:
-        climatology_dataset = climatology_dataset.sel(month=list(months))
-        climatology_data_array = reduce_dataset(
-            climatology_dataset,
+    if CLIMATOLOGY_PRELOAD:
+        block = climatology_block('monthly', variable=variable, level=level)
+        climatology_data_array = block.mean(str(month) for month in months)
+    else:
+        with read_cfsr_monthly_climatology_file(
             variable=variable,
             level=level,
-        )
-        climatology_data_array = climatology_data_array.mean(dim='month')
+        ) as climatology_dataset:
+            climatology_dataset = climatology_dataset.sel(month=list(months))
+            climatology_data_array = reduce_dataset(
+                climatology_dataset,
+                variable=variable,
+                level=level,
+            )
+            # NOTE: Computed before the file is closed
+            climatology_data_array = climatology_data_array.mean(dim='month').compute()
 
     with xra.set_options(keep_attrs=True):
         diff = data_array - climatology_data_array
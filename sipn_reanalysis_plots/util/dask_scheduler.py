@@ -0,0 +1,122 @@
+"""Compute dask collections with a scheduler managed by each process.
+
+By default, dask starts a pool of threads for each thread which computes something (e.g.
+each of a web worker's job threads), and a `dask.distributed` client started when the
+app is imported would be shared, broken, by the workers gunicorn forks from it (with
+`--preload`). Instead, each process starts its scheduler on first use, after any fork,
+and shares it between its requests.
+
+The scheduler is chosen by `$DASK_SCHEDULER`, so they can be benchmarked against each
+other:
+
+* "threads": a pool of `$DASK_THREADS` threads.
+* "synchronous": in the computing thread itself, e.g. for profiling.
+* "distributed": a local cluster of `$DASK_PROCESSES` worker processes, each with
+  `$DASK_THREADS` threads and limited to `$DASK_MEMORY_LIMIT` of memory.
+"""
+import atexit
+import functools
+import multiprocessing
+import os
+import threading
+from collections.abc import Callable, Mapping
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+import dask
+import dask.local
+import dask.threaded
+
+from sipn_reanalysis_plots import app
+from sipn_reanalysis_plots.constants.dask import (
+    DASK_DASHBOARD,
+    DASK_MEMORY_LIMIT,
+    DASK_PROCESSES,
+    DASK_SCHEDULER,
+    DASK_THREADS,
+)
+from sipn_reanalysis_plots.util.timing import current_timer
+
+Get = Callable[..., Any]
+
+# Threads of the `threads` scheduler, e.g. for the profiler to sample
+DASK_THREAD_NAME_PREFIX = 'dask-compute'
+
+# This process's ID and scheduler
+_scheduler: tuple[int, Get] | None = None
+_scheduler_lock = threading.Lock()
+
+
+def configure_dask_scheduler() -> None:
+    """Compute dask collections with this process's scheduler, started on first use.
+
+    Computes are recorded in the current timer (see `util/timing.py`): the time spent
+    computing as the "dask" stage, and the number of tasks as the "dask_tasks" count.
+    """
+    dask.config.set(scheduler=_get)
+
+
+def _get(dsk: Any, keys: Any, **kwargs: Any) -> Any:
+    if threading.current_thread().name.startswith(DASK_THREAD_NAME_PREFIX):
+        # A task computing something itself would wait for a thread of the pool it's
+        # holding
+        return dask.local.get_sync(dsk, keys, **kwargs)
+
+    get = _process_scheduler()
+    timer = current_timer()
+    if timer is None:
+        return get(dsk, keys, **kwargs)
+
+    timer.count('dask_tasks', _task_count(dsk))
+    with timer.stage('dask'):
+        return get(dsk, keys, **kwargs)
+
+
+def _task_count(dsk: Any) -> int:
+    # NOTE: Newer versions of dask pass graph expressions instead of mappings
+    if not isinstance(dsk, Mapping):
+        dsk = dsk.__dask_graph__()
+    return len(dsk)
+
+
+def _process_scheduler() -> Get:
+    """Start this process's scheduler on first use, including in a forked process."""
+    global _scheduler
+
+    with _scheduler_lock:
+        if _scheduler is None or _scheduler[0] != os.getpid():
+            app.logger.info(f'Starting "{DASK_SCHEDULER}" dask scheduler')
+            _scheduler = (os.getpid(), _start_scheduler())
+
+        return _scheduler[1]
+
+
+def _start_scheduler() -> Get:
+    if DASK_SCHEDULER == 'synchronous':
+        return dask.local.get_sync
+    if DASK_SCHEDULER == 'distributed':
+        return _start_distributed_client().get
+
+    pool = ThreadPoolExecutor(DASK_THREADS, thread_name_prefix=DASK_THREAD_NAME_PREFIX)
+    atexit.register(pool.shutdown)
+    return functools.partial(dask.threaded.get, pool=pool)
+
+
+def _start_distributed_client() -> Any:
+    # NOTE: Imported here because `distributed` is only needed by this scheduler
+    from dask.distributed import Client, LocalCluster
+
+    cluster = LocalCluster(
+        n_workers=DASK_PROCESSES,
+        threads_per_worker=DASK_THREADS,
+        memory_limit=DASK_MEMORY_LIMIT,
+        # Daemon processes, like render processes, can't start worker processes
+        processes=not multiprocessing.current_process().daemon,
+        dashboard_address=':8787' if DASK_DASHBOARD else None,
+    )
+    client = Client(cluster, set_as_default=False)
+
+    # NOTE: Called in reverse order
+    atexit.register(cluster.close)
+    atexit.register(client.close)
+    return client
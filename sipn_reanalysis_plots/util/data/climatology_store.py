@@ -0,0 +1,200 @@
+"""Memory-mapped climatology blocks, shared by all worker processes on a host.
+
+A block holds the climatology of one variable at one level for every day (or month) of
+the year, as a float32 `.npy` file of shape `(label, *grid)`. Each block is built once
+per host and climatology file version, and then memory-mapped by every worker, so an
+anomaly request costs an in-memory slice-and-mean instead of opening the climatology
+file.
+"""
+import hashlib
+import json
+import shutil
+from contextlib import AbstractContextManager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterable, Literal
+
+import numpy as np
+import xarray as xra
+
+from sipn_reanalysis_plots import app
+from sipn_reanalysis_plots.constants.paths import (
+    CLIMATOLOGY_STORE_DIR,
+    DATA_CLIMATOLOGY_DAILY_FILE,
+    DATA_CLIMATOLOGY_MONTHLY_FILE,
+)
+from sipn_reanalysis_plots.constants.variables import VARIABLES
+from sipn_reanalysis_plots.constants.version import VERSION
+from sipn_reanalysis_plots.util.data.grid_store import (
+    read_grid_template,
+    write_grid_template,
+)
+from sipn_reanalysis_plots.util.data.read import (
+    map_region_slices,
+    read_cfsr_daily_climatology_file,
+    read_cfsr_monthly_climatology_file,
+)
+from sipn_reanalysis_plots.util.data.reduce import reduce_dataset
+from sipn_reanalysis_plots.util.file import (
+    atomic_path,
+    atomic_write,
+    file_lock,
+    stat_fingerprint,
+)
+
+Cadence = Literal['daily', 'monthly']
+
+# Number of days (or months) read from the climatology file at once while building
+_BUILD_CHUNK_SIZE = 31
+
+
+@dataclass(frozen=True)
+class _ClimatologySource:
+    path: Path
+    label_dim: str
+    opener: Callable[..., AbstractContextManager[xra.Dataset]]
+
+
+_SOURCES: dict[Cadence, _ClimatologySource] = {
+    'daily': _ClimatologySource(
+        path=DATA_CLIMATOLOGY_DAILY_FILE,
+        label_dim='date',
+        opener=read_cfsr_daily_climatology_file,
+    ),
+    'monthly': _ClimatologySource(
+        path=DATA_CLIMATOLOGY_MONTHLY_FILE,
+        label_dim='month',
+        opener=read_cfsr_monthly_climatology_file,
+    ),
+}
+
+
+@dataclass(frozen=True)
+class ClimatologyBlock:
+    # Memory-mapped, with shape `(label, *grid)`
+    values: np.ndarray
+    # Position of each label (e.g. `'01-31'` for daily, or `'1'` for monthly) in `values`
+    label_indexes: dict[str, int]
+    # Coordinates and attributes of a single grid
+    template: xra.DataArray
+
+    def mean(self, labels: Iterable[str]) -> xra.DataArray:
+        """Average the climatology over `labels`."""
+        indexes = sorted(self.label_indexes[label] for label in labels)
+        # Only the map's region of the grid is read from the block
+        region = map_region_slices(self.template)
+        grid_index = tuple(
+            region.get(str(dim), slice(None)) for dim in self.template.dims
+        )
+        index: tuple[np.ndarray | slice, ...] = (np.asarray(indexes), *grid_index)
+        values = np.nanmean(
+            self.values[index],
+            axis=0,
+            dtype=np.float64,
+        )
+
+        template = self.template.isel(region)
+        grid = template.copy(deep=False, data=values.astype(np.float32))
+        grid.attrs = dict(self.template.attrs)
+        return grid
+
+
+_blocks: dict[tuple[Path, str, str], ClimatologyBlock] = {}
+
+
+def climatology_block(
+    cadence: Cadence,
+    *,
+    variable: str,
+    level: str,
+) -> ClimatologyBlock:
+    """Map the climatology block for variable and level, building it if necessary."""
+    directory = _store_dir(cadence)
+    memo_key = (directory, variable, level)
+    if memo_key in _blocks:
+        return _blocks[memo_key]
+
+    block_path = directory / f'{variable}-{level}.npy'
+    if not block_path.exists():
+        with file_lock(CLIMATOLOGY_STORE_DIR / '.lock'):
+            # Another process may have built the block while we waited for the lock
+            if not block_path.exists():
+                _build_block(cadence, directory, variable=variable, level=level)
+
+    block = ClimatologyBlock(
+        values=np.load(block_path, mmap_mode='r'),
+        label_indexes=json.loads((directory / 'labels.json').read_text()),
+        template=read_grid_template(directory / f'{variable}-{level}.npz'),
+    )
+    _blocks[memo_key] = block
+    return block
+
+
+def preload_climatology(*, build: bool = False) -> None:
+    """Map every climatology block into this process.
+
+    Unless `build` is set, only blocks which were already built are mapped, so startup
+    isn't delayed by reading the climatology files.
+    """
+    for cadence in _SOURCES:
+        directory = _store_dir(cadence)
+        for variable, props in VARIABLES.items():
+            for level in props['levels']:
+                if build or (directory / f'{variable}-{level}.npy').exists():
+                    climatology_block(cadence, variable=variable, level=level)
+
+
+def _store_dir(cadence: Cadence) -> Path:
+    """Locate blocks for the current version of the climatology file (and this code)."""
+    source = _SOURCES[cadence]
+    fingerprint = stat_fingerprint(source.path)
+    digest = hashlib.sha256(f'v{VERSION}\n{fingerprint}'.encode('utf-8')).hexdigest()
+    return CLIMATOLOGY_STORE_DIR / cadence / digest[:16]
+
+
+def _build_block(
+    cadence: Cadence,
+    directory: Path,
+    *,
+    variable: str,
+    level: str,
+) -> None:
+    app.logger.info(f'Building {cadence} climatology block for {variable} {level}')
+    source = _SOURCES[cadence]
+    _remove_outdated_store_dirs(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    with source.opener(variable=variable, level=level) as dataset:
+        data_array = reduce_dataset(dataset, variable=variable, level=level)
+        data_array = data_array.transpose(source.label_dim, ...)
+        labels = [str(label) for label in data_array[source.label_dim].values]
+
+        with atomic_write(directory / f'{variable}-{level}.npz') as f:
+            write_grid_template(f, data_array.isel({source.label_dim: 0}, drop=True))
+
+        with atomic_write(directory / 'labels.json', 'w') as f:
+            json.dump({label: i for i, label in enumerate(labels)}, f)
+
+        # NOTE: The block is written last, as its existence marks the build complete.
+        with atomic_path(directory / f'{variable}-{level}.npy') as tmp_path:
+            block = np.lib.format.open_memmap(
+                tmp_path,
+                mode='w+',
+                dtype=np.float32,
+                shape=data_array.shape,
+            )
+            for start in range(0, len(labels), _BUILD_CHUNK_SIZE):
+                chunk = slice(start, start + _BUILD_CHUNK_SIZE)
+                block[chunk] = data_array.isel({source.label_dim: chunk}).values
+            block.flush()
+            del block
+
+
+def _remove_outdated_store_dirs(directory: Path) -> None:
+    """Remove blocks built from other versions of the climatology file.
+
+    Processes which have already mapped them are unaffected.
+    """
+    for other in directory.parent.glob('*'):
+        if other != directory:
+            shutil.rmtree(other, ignore_errors=True)
@@ -0,0 +1,344 @@
+"""Cumulative sums of daily data along the time axis, for constant-time range means.
+
+For each variable and level, row `i` of the sums file holds the sum of every daily grid
+before the store's `i`th day, and the counts file holds the matching number of valid
+(non-NaN) values. The mean over any date range is then the difference of two rows of
+sums divided by the difference of two rows of counts, no matter how long the range is.
+
+Rows only hold the map's region of the grid (see `map_region_slices`), as that's all
+that's read from them. Sums are float64, so the difference of two large sums doesn't
+lose precision, and counts are uint16, so each row takes 10 bytes per cell: about 6 MiB
+per day for every variable and level on a 161x161 grid like CFSR's, or 100 GiB for the
+whole archive. The map covers most of the grid, so that's only an eighth less than the
+whole grid would take. float32 sums would take 6 bytes per cell, but a range's mean
+would lose precision as the totals before it grow.
+
+The store is extended with `invoke cumulative.extend` after ingest. It's only used for
+date ranges which it covers, and whose files haven't been re-ingested since they were
+added.
+"""
+import datetime as dt
+import json
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import xarray as xra
+
+from sipn_reanalysis_plots import app
+from sipn_reanalysis_plots._types import FileFingerprint
+from sipn_reanalysis_plots.constants.paths import CUMULATIVE_STORE_DIR
+from sipn_reanalysis_plots.constants.variables import VARIABLES
+from sipn_reanalysis_plots.util.data.files import cfsr_daily_fps
+from sipn_reanalysis_plots.util.data.grid_store import (
+    read_grid_template,
+    write_grid_template,
+)
+from sipn_reanalysis_plots.util.data.list import (
+    daily_data_fingerprints,
+    data_file_fingerprints,
+    max_daily_data_date,
+    min_daily_data_date,
+)
+from sipn_reanalysis_plots.util.data.read import map_region_slices, read_cfsr_daily_file
+from sipn_reanalysis_plots.util.data.reduce import reduce_dataset, select_variable_level
+from sipn_reanalysis_plots.util.date import date_range
+from sipn_reanalysis_plots.util.file import atomic_write, file_lock, stat_fingerprint
+
+# Incremented when the layout of the store changes, so it's rebuilt from scratch
+_FORMAT_VERSION = 2
+_META_FILE = CUMULATIVE_STORE_DIR / 'meta.json'
+_SUMS_DTYPE = np.dtype(np.float64)
+# NOTE: Counts are allowed to overflow; the difference of two rows is still correct
+# (modulo 2**16) for any range with fewer than 2**16 time steps.
+_COUNTS_DTYPE = np.dtype(np.uint16)
+# Days added between metadata writes, which make the new rows visible to readers
+_CHECKPOINT_DAYS = 30
+
+
+@dataclass(frozen=True)
+class _StoreMeta:
+    start_date: dt.date
+    # Fingerprint of each day's file when it was added to the store; `None` if missing
+    fingerprints: tuple[str | None, ...]
+
+    @property
+    def num_days(self) -> int:
+        return len(self.fingerprints)
+
+    def covers(self, start_date: dt.date, end_date: dt.date) -> bool:
+        end_offset = (end_date - self.start_date).days
+        return self.start_date <= start_date and end_offset < self.num_days
+
+
+class _RowWriter:
+    """Append cumulative rows to a sums or counts file, after its last valid row."""
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        dtype: np.dtype,
+        shape: tuple[int, ...],
+        row: int,
+    ):
+        self._file = open(path, 'r+b' if path.exists() else 'w+b')
+        self._dtype = dtype
+        size = int(np.prod(shape))
+
+        if row == 0:
+            self.running = np.zeros(shape, dtype=dtype)
+            self._file.write(self.running.tobytes())
+        else:
+            self._file.seek(row * size * dtype.itemsize)
+            self.running = np.fromfile(self._file, dtype=dtype, count=size)
+            self.running = self.running.reshape(shape)
+
+    def add(self, values: np.ndarray) -> None:
+        self.running += values.astype(self._dtype)
+        self._file.write(self.running.tobytes())
+
+    def flush(self) -> None:
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+_meta_cache: tuple[FileFingerprint, _StoreMeta] | None = None
+
+
+def cumulative_mean(
+    start_date: dt.date,
+    end_date: dt.date,
+    *,
+    variable: str,
+    level: str,
+) -> xra.DataArray | None:
+    """Calculate the mean of daily data over a date range from the store.
+
+    Returns `None` if the store doesn't cover the range, or if any of the range's files
+    were re-ingested since they were added to the store.
+    """
+    meta = _read_meta()
+    if meta is None or not meta.covers(start_date, end_date):
+        return None
+
+    start = (start_date - meta.start_date).days
+    end = (end_date - meta.start_date).days + 1
+    fingerprints = data_file_fingerprints(cfsr_daily_fps(start_date, end_date))
+    if list(meta.fingerprints[start:end]) != [str(f) for f in fingerprints]:
+        return None
+
+    template = read_grid_template(_store_path(variable, level, '.npz'))
+    sums = _map_rows(variable, level, '.sums', meta=meta, shape=template.shape)
+    counts = _map_rows(variable, level, '.counts', meta=meta, shape=template.shape)
+
+    total = sums[end] - sums[start]
+    count = counts[end] - counts[start]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        values = np.where(count > 0, total / count, np.nan).astype(np.float32)
+
+    data_array = template.copy(deep=False, data=values)
+    data_array.attrs = dict(template.attrs)
+    return data_array
+
+
+def extend_cumulative_store(start_date: dt.date | None = None) -> int:
+    """Add days ingested since the store was last extended, returning the number added.
+
+    A day whose file was re-ingested (or filled in) since it was added to the store is
+    recalculated, along with every day after it. `start_date` sets the first day of a
+    new store, and defaults to the first day of data. Passing a different `start_date`
+    for an existing store rebuilds it.
+    """
+    with file_lock(CUMULATIVE_STORE_DIR / '.lock'):
+        meta = _read_meta()
+        if meta is None or start_date not in (None, meta.start_date):
+            meta = _new_store(start_date or min_daily_data_date())
+
+        dates = list(date_range(meta.start_date, max_daily_data_date()))
+        fingerprints = daily_data_fingerprints(dates)
+
+        # Find the first day which is new, or has changed since it was added
+        changed = (
+            i
+            for i, (old, new) in enumerate(zip(meta.fingerprints, fingerprints))
+            if old != new
+        )
+        first = next(changed, min(meta.num_days, len(dates)))
+        if first == len(dates):
+            return 0
+
+        if first < meta.num_days:
+            # Hide the rows which are about to be overwritten from readers
+            meta = _StoreMeta(meta.start_date, meta.fingerprints[:first])
+            _write_meta(meta)
+
+        _extend_rows(meta, dates[first:], fingerprints[first:])
+        return len(dates) - first
+
+
+def _extend_rows(
+    meta: _StoreMeta,
+    dates: list[dt.date],
+    fingerprints: list[str | None],
+) -> None:
+    levels = [
+        (variable, level)
+        for variable, props in VARIABLES.items()
+        for level in props['levels']
+    ]
+    _write_missing_templates(levels)
+
+    writers: dict[tuple[str, str], tuple[_RowWriter, _RowWriter]] = {}
+    try:
+        for variable, level in levels:
+            shape = read_grid_template(_store_path(variable, level, '.npz')).shape
+            writers[(variable, level)] = (
+                _RowWriter(
+                    _store_path(variable, level, '.sums'),
+                    dtype=_SUMS_DTYPE,
+                    shape=shape,
+                    row=meta.num_days,
+                ),
+                _RowWriter(
+                    _store_path(variable, level, '.counts'),
+                    dtype=_COUNTS_DTYPE,
+                    shape=shape,
+                    row=meta.num_days,
+                ),
+            )
+
+        for i, date in enumerate(dates):
+            _add_day(date, writers)
+
+            if (i + 1) % _CHECKPOINT_DAYS == 0 or i + 1 == len(dates):
+                for sums_writer, counts_writer in writers.values():
+                    sums_writer.flush()
+                    counts_writer.flush()
+                _write_meta(
+                    _StoreMeta(
+                        meta.start_date,
+                        meta.fingerprints + tuple(fingerprints[: i + 1]),
+                    )
+                )
+                app.logger.info(f'Extended cumulative store to {date}')
+    finally:
+        for sums_writer, counts_writer in writers.values():
+            sums_writer.close()
+            counts_writer.close()
+
+
+def _add_day(
+    date: dt.date,
+    writers: dict[tuple[str, str], tuple[_RowWriter, _RowWriter]],
+) -> None:
+    """Add a day's sums and counts, in the map's region, to the running totals.
+
+    A missing day adds nothing, so ranges which include it are never served.
+    """
+    if not cfsr_daily_fps(date)[0].exists():
+        for sums_writer, counts_writer in writers.values():
+            sums_writer.add(np.zeros_like(sums_writer.running))
+            counts_writer.add(np.zeros_like(counts_writer.running))
+        return
+
+    with read_cfsr_daily_file(date) as dataset:
+        dataset = dataset.isel(map_region_slices(dataset))
+        for (variable, level), (sums_writer, counts_writer) in writers.items():
+            data_array = select_variable_level(dataset, variable=variable, level=level)
+            if 't' not in data_array.dims:
+                data_array = data_array.expand_dims('t')
+            values = data_array.transpose('t', ...).values
+
+            sums_writer.add(np.asarray(np.nansum(values, axis=0, dtype=np.float64)))
+            counts_writer.add(np.count_nonzero(~np.isnan(values), axis=0))
+
+
+def _write_missing_templates(levels: list[tuple[str, str]]) -> None:
+    missing = [
+        (variable, level)
+        for variable, level in levels
+        if not _store_path(variable, level, '.npz').exists()
+    ]
+    if not missing:
+        return
+
+    with read_cfsr_daily_file(max_daily_data_date()) as dataset:
+        dataset = dataset.isel(map_region_slices(dataset))
+        for variable, level in missing:
+            data_array = reduce_dataset(dataset, variable=variable, level=level)
+            with atomic_write(_store_path(variable, level, '.npz')) as f:
+                write_grid_template(f, data_array)
+
+
+def _new_store(start_date: dt.date) -> _StoreMeta:
+    """Start an empty store, without disturbing readers which mapped the old one."""
+    app.logger.info(f'Creating cumulative store from {start_date}')
+    meta = _StoreMeta(start_date, ())
+    _write_meta(meta)
+
+    # Unlinked files stay valid for processes which have mapped them
+    for path in CUMULATIVE_STORE_DIR.glob('*-*.*'):
+        path.unlink()
+
+    return meta
+
+
+def _map_rows(
+    variable: str,
+    level: str,
+    suffix: str,
+    *,
+    meta: _StoreMeta,
+    shape: tuple[int, ...],
+) -> np.memmap:
+    dtype = _SUMS_DTYPE if suffix == '.sums' else _COUNTS_DTYPE
+    return np.memmap(
+        _store_path(variable, level, suffix),
+        dtype=dtype,
+        mode='r',
+        shape=(meta.num_days + 1, *shape),
+    )
+
+
+def _store_path(variable: str, level: str, suffix: str) -> Path:
+    return CUMULATIVE_STORE_DIR / f'{variable}-{level}{suffix}'
+
+
+def _read_meta() -> _StoreMeta | None:
+    """Read the store's metadata, or `None` if there's no store of the current format."""
+    global _meta_cache
+
+    try:
+        fingerprint = stat_fingerprint(_META_FILE)
+    except FileNotFoundError:
+        return None
+
+    if _meta_cache is not None and _meta_cache[0] == fingerprint:
+        return _meta_cache[1]
+
+    raw = json.loads(_META_FILE.read_text())
+    if raw['format'] != _FORMAT_VERSION:
+        return None
+
+    meta = _StoreMeta(
+        start_date=dt.date.fromisoformat(raw['start_date']),
+        fingerprints=tuple(raw['fingerprints']),
+    )
+    _meta_cache = (fingerprint, meta)
+    return meta
+
+
+def _write_meta(meta: _StoreMeta) -> None:
+    CUMULATIVE_STORE_DIR.mkdir(parents=True, exist_ok=True)
+    with atomic_write(_META_FILE, 'w') as f:
+        json.dump(
+            {
+                'format': _FORMAT_VERSION,
+                'start_date': meta.start_date.isoformat(),
+                'fingerprints': meta.fingerprints,
+            },
+            f,
+        )
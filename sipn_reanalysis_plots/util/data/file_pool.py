@@ -0,0 +1,138 @@
+"""A pool of open NetCDF files, kept open between the requests of a process.
+
+Most requests read the same few recent daily and monthly files, and anomaly requests
+the climatology file. Opening an HDF5 file on networked storage costs several metadata
+round-trips, so files are kept open in a size-bounded, least recently used pool. Each
+use checks the file's inode, size and mtime, so a re-ingested file is opened again.
+
+NOTE: The netCDF library can crash when a file which is already open is opened again
+and closed, so data files must only be opened through the pool while it's enabled.
+"""
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Generator
+
+import netCDF4
+from xarray.backends.netCDF4_ import NETCDF4_PYTHON_LOCK
+
+from sipn_reanalysis_plots import app
+from sipn_reanalysis_plots.util.disk_cache import CacheStats
+from sipn_reanalysis_plots.util.metrics import file_pool_lookups
+from sipn_reanalysis_plots.util.timing import current_timer
+
+# A file's inode, size and mtime
+_Fingerprint = tuple[int, int, int]
+
+
+@dataclass
+class _Entry:
+    handle: netCDF4.Dataset
+    fingerprint: _Fingerprint
+    # Number of reads using the handle
+    users: int = 0
+    # Evicted entries are closed once they're no longer used
+    evicted: bool = False
+
+
+class NetcdfFilePool:
+    """Open NetCDF files, of which at most `max_size` are kept open by the process.
+
+    Uses are counted in the current timer (see `util/timing.py`) as "file_pool_hits"
+    and "file_pool_misses", in `stats` for the whole process, and in the file pool
+    lookups metric.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.stats = CacheStats()
+
+        self._entries: OrderedDict[Path, _Entry] = OrderedDict()
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    @contextmanager
+    def open(self, path: Path) -> Generator[netCDF4.Dataset, None, None]:
+        """Use the open file at `path`, which must not be closed by the caller."""
+        entry = self._check_out(path)
+        try:
+            yield entry.handle
+        finally:
+            self._check_in(entry)
+
+    def close(self) -> None:
+        with self._lock:
+            for path in list(self._entries):
+                self._evict(path)
+
+    def _check_out(self, path: Path) -> _Entry:
+        stat = path.stat()
+        fingerprint = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+        with self._lock:
+            self._forget_inherited_entries()
+            entry = self._entries.get(path)
+            if entry is not None and entry.fingerprint == fingerprint:
+                self._entries.move_to_end(path)
+                entry.users += 1
+                self._count('hits')
+                return entry
+
+            self._count('misses')
+            if entry is not None:
+                # Re-ingested
+                self._evict(path)
+
+            # NOTE: Opened while holding the pool's lock, so a file isn't opened twice
+            # at once
+            with NETCDF4_PYTHON_LOCK:
+                handle = netCDF4.Dataset(path, mode='r')
+            entry = _Entry(handle=handle, fingerprint=fingerprint, users=1)
+
+            self._entries[path] = entry
+            while len(self._entries) > self.max_size:
+                self._evict(next(iter(self._entries)))
+
+            return entry
+
+    def _check_in(self, entry: _Entry) -> None:
+        with self._lock:
+            entry.users -= 1
+            if entry.evicted and entry.users == 0:
+                _close(entry.handle)
+
+    def _evict(self, path: Path) -> None:
+        entry = self._entries.pop(path)
+        entry.evicted = True
+        if entry.users == 0:
+            _close(entry.handle)
+        self._count('evictions')
+
+    def _forget_inherited_entries(self) -> None:
+        """Forget files opened by the parent of a forked process, without closing them.
+
+        The parent still uses them, and HDF5 handles can't be shared between processes.
+        """
+        if self._pid != os.getpid():
+            self._entries.clear()
+            self._pid = os.getpid()
+
+    def _count(self, stat_name: str) -> None:
+        setattr(self.stats, stat_name, getattr(self.stats, stat_name) + 1)
+        if stat_name != 'evictions':
+            file_pool_lookups.labels(result=stat_name).inc()
+            if (timer := current_timer()) is not None:
+                timer.count(f'file_pool_{stat_name}')
+
+        app.logger.debug(
+            f'NetCDF file pool {stat_name}: {self.stats}'
+            f' (hit rate {self.stats.hit_rate:.0%})'
+        )
+
+
+def _close(handle: netCDF4.Dataset) -> None:
+    with NETCDF4_PYTHON_LOCK:
+        handle.close()
@@ -0,0 +1,67 @@
+"""Paths of data files, and listeners for reads of them.
+
+Kept apart from `read.py`, so web workers which don't read data themselves (e.g. when
+plots are rendered in the render pool) can identify plots by their files without
+importing the data libraries.
+"""
+import datetime as dt
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Generator
+
+from sipn_reanalysis_plots._types import YearMonth
+from sipn_reanalysis_plots.constants.paths import (
+    DATA_DAILY_DIR,
+    DATA_DAILY_TEMPLATE,
+    DATA_MONTHLY_DIR,
+    DATA_MONTHLY_TEMPLATE,
+)
+from sipn_reanalysis_plots.util.date import date_range, month_range
+
+FileReadListener = Callable[[Path], None]
+
+_file_read_listeners: list[FileReadListener] = []
+
+
+def cfsr_daily_fps(start_date: dt.date, end_date: dt.date | None = None) -> list[Path]:
+    """List paths of the daily files between start and end date, inclusive."""
+    dates = date_range(start_date, end_date or start_date)
+    return sorted(_cfsr_daily_fp(d) for d in dates)
+
+
+def cfsr_monthly_fps(
+    start_month: YearMonth,
+    end_month: YearMonth | None = None,
+) -> list[Path]:
+    """List paths of the monthly files between start and end month, inclusive."""
+    months = month_range(start_month, end_month or start_month)
+    return sorted(_cfsr_monthly_fp(m) for m in months)
+
+
+@contextmanager
+def listen_for_file_reads(listener: FileReadListener) -> Generator[None, None, None]:
+    """Call `listener` with the path of each file opened in this process.
+
+    Listeners are called from every thread, including dask's, so they may be called with
+    files opened for other work in the same process.
+    """
+    _file_read_listeners.append(listener)
+    try:
+        yield
+    finally:
+        _file_read_listeners.remove(listener)
+
+
+def notify_file_read(fp: Path) -> None:
+    for listener in list(_file_read_listeners):
+        listener(fp)
+
+
+def _cfsr_daily_fp(date: dt.date) -> Path:
+    fp = DATA_DAILY_DIR / DATA_DAILY_TEMPLATE.format(date=date)
+    return fp
+
+
+def _cfsr_monthly_fp(month: YearMonth) -> Path:
+    fp = DATA_MONTHLY_DIR / DATA_MONTHLY_TEMPLATE.format(month=month)
+    return fp
@@ -0,0 +1,125 @@
+"""Store reduced 2-D grids on disk, so repeat requests skip reading NetCDF files.
+
+Each grid's values are stored as a float32 `.npy` file which is memory-mapped when read,
+so all worker processes share the OS page cache and nothing is decoded. The coordinates
+and attributes are the same for every grid of a given variable and level, so they're
+stored once, in a "template".
+"""
+import json
+from pathlib import Path
+
+import numpy as np
+import xarray as xra
+
+from sipn_reanalysis_plots.util.disk_cache import DiskCache
+from sipn_reanalysis_plots.util.file import atomic_write
+
+
+class GridStore:
+    def __init__(self, directory: Path, *, max_bytes: int):
+        self.templates_dir = directory / 'templates'
+        self.grids = DiskCache(directory / 'grids', max_bytes=max_bytes, suffix='.npy')
+
+        self._templates: dict[str, xra.DataArray] = {}
+
+    def get(self, key: str, *, template_key: str) -> xra.DataArray | None:
+        """Read the grid stored for `key`, or return None if there is none."""
+        path = self.grids.get_path(key)
+        if path is None:
+            return None
+
+        template = self._template(template_key)
+        if template is None:
+            return None
+
+        try:
+            values = np.load(path, mmap_mode='r')
+        except FileNotFoundError:
+            # Evicted by another process between lookup and read
+            return None
+
+        if values.shape != template.shape:
+            return None
+
+        grid = template.copy(deep=False, data=values)
+        grid.attrs = dict(template.attrs)
+        return grid
+
+    def put(self, key: str, data_array: xra.DataArray, *, template_key: str) -> None:
+        values = np.asarray(data_array.values, dtype=np.float32)
+
+        self._write_template(template_key, data_array)
+        self.grids.put_with(key, lambda f: np.save(f, values))
+
+    def _template_path(self, template_key: str) -> Path:
+        return self.templates_dir / f'{template_key.replace("/", "-")}.npz'
+
+    def _template(self, template_key: str) -> xra.DataArray | None:
+        if template_key in self._templates:
+            return self._templates[template_key]
+
+        try:
+            template = read_grid_template(self._template_path(template_key))
+        except FileNotFoundError:
+            return None
+
+        self._templates[template_key] = template
+        return template
+
+    def _write_template(self, template_key: str, data_array: xra.DataArray) -> None:
+        path = self._template_path(template_key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        with atomic_write(path) as f:
+            write_grid_template(f, data_array)
+
+        self._templates.pop(template_key, None)
+
+
+def write_grid_template(f, data_array: xra.DataArray) -> None:
+    """Write everything but `data_array`'s values.
+
+    Array coordinates are stored as arrays, and everything else as JSON metadata.
+    """
+    array_coords = {
+        name: coord for name, coord in data_array.coords.items() if coord.ndim > 0
+    }
+    meta = {
+        'name': data_array.name,
+        'dims': list(data_array.dims),
+        'shape': list(data_array.shape),
+        'attrs': data_array.attrs,
+        'array_coords': {
+            name: list(coord.dims) for name, coord in array_coords.items()
+        },
+        'scalar_coords': {
+            name: coord.item()
+            for name, coord in data_array.coords.items()
+            if coord.ndim == 0
+        },
+    }
+
+    np.savez(
+        f,
+        __meta__=np.array(json.dumps(meta, default=str)),
+        **{str(name): coord.values for name, coord in array_coords.items()},
+    )
+
+
+def read_grid_template(path: Path) -> xra.DataArray:
+    """Read a template written by `write_grid_template`, with placeholder values."""
+    with np.load(path) as npz:
+        meta = json.loads(str(npz['__meta__']))
+        coords = {
+            **meta['scalar_coords'],
+            **{name: (dims, npz[name]) for name, dims in meta['array_coords'].items()},
+        }
+
+    return xra.DataArray(
+        # Placeholder values, which take no memory
+        np.broadcast_to(np.float32(np.nan), meta['shape']),
+        dims=meta['dims'],
+        coords=coords,
+        attrs=meta['attrs'],
+        name=meta['name'],
+    )
@@ -1,40 +1,49 @@
 import datetime as dt
+import itertools
 import re
+import threading
+import time
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Callable, Generic, TypeVar
 
 from sipn_reanalysis_plots import app
-from sipn_reanalysis_plots._types import YearMonth
+from sipn_reanalysis_plots._types import FileFingerprint, YearMonth
+from sipn_reanalysis_plots.constants.cache import AVAILABILITY_INDEX_TTL_SECONDS
 from sipn_reanalysis_plots.constants.paths import (
     DATA_DAILY_DATE_FORMAT,
     DATA_DAILY_DATE_REGEX,
     DATA_DAILY_DIR,
+    DATA_DAILY_TEMPLATE,
+    DATA_MANIFEST_FILE,
     DATA_MONTHLY_DIR,
     DATA_MONTHLY_YEARMONTH_REGEX,
 )
 from sipn_reanalysis_plots.errors import NoDataFoundError
+from sipn_reanalysis_plots.util.data.manifest import read_manifest
+from sipn_reanalysis_plots.util.file import stat_fingerprint
+from sipn_reanalysis_plots.util.metrics import listing_seconds
+from sipn_reanalysis_plots.util.timing import stage
+
+_K = TypeVar('_K')
 
 
 def list_daily_data_paths() -> list[Path]:
     """List sorted paths of existing daily files.
 
-    NOTE: With ~16k files, this listing takes two-tenths of a second on 2023 NSIDC
-    networked storage infrastructure.
+    NOTE: With ~16k files, globbing takes two-tenths of a second on 2023 NSIDC
+    networked storage infrastructure, so listings are served from an in-process index
+    which is only rebuilt when the data directory (or the manifest) changes.
     """
-    paths = list(DATA_DAILY_DIR.glob('*'))
-    if len(paths) == 0:
-        raise NoDataFoundError('No daily data found. Please run ingest!')
-
-    return sorted(paths)
+    return list(_daily_listing().paths)
 
 
 def list_daily_data_dates() -> list[dt.date]:
-    paths = list_daily_data_paths()
-    dates = [date for p in paths if (date := _date_from_daily_path(p)) is not None]
-    return dates
+    return list(_daily_listing().keys)
 
 
 def min_daily_data_date() -> dt.date:
-    return list_daily_data_dates()[0]
+    return _daily_listing().keys[0]
 
 
 def min_daily_data_date_str() -> str:
@@ -43,7 +52,7 @@ def min_daily_data_date_str() -> str:
 
 
 def max_daily_data_date() -> dt.date:
-    return list_daily_data_dates()[-1]
+    return _daily_listing().keys[-1]
 
 
 def max_daily_data_date_str() -> str:
@@ -51,28 +60,30 @@ def max_daily_data_date_str() -> str:
     return f'{max_date:%Y-%m-%d}'
 
 
-def list_monthly_data_paths() -> list[Path]:
-    """List sorted paths of existing monthly files."""
-    paths = list(DATA_MONTHLY_DIR.glob('*'))
+def missing_daily_data_dates(start_date: dt.date, end_date: dt.date) -> list[dt.date]:
+    """List dates between start and end, inclusive, for which no daily file exists.
 
-    if len(paths) == 0:
-        raise NoDataFoundError('No monthly data found. Please run ingest!')
+    Answered from the availability index without touching the data directory, in
+    constant time when no dates are missing.
+    """
+    missing = _daily_listing().presence.missing(
+        start_date.toordinal(),
+        end_date.toordinal(),
+    )
+    return [dt.date.fromordinal(o) for o in missing]
 
-    return sorted(paths)
+
+def list_monthly_data_paths() -> list[Path]:
+    """List sorted paths of existing monthly files."""
+    return list(_monthly_listing().paths)
 
 
 def list_monthly_data_yearmonths() -> list[YearMonth]:
-    paths = list_monthly_data_paths()
-    dates = [
-        yearmonth
-        for p in paths
-        if (yearmonth := _yearmonth_from_monthly_path(p)) is not None
-    ]
-    return dates
+    return list(_monthly_listing().keys)
 
 
 def min_monthly_data_yearmonth() -> YearMonth:
-    min_yearmonth = list_monthly_data_yearmonths()[0]
+    min_yearmonth = _monthly_listing().keys[0]
     return min_yearmonth
 
 
@@ -83,7 +94,7 @@ def min_monthly_data_yearmonth_str() -> str:
 
 
 def max_monthly_data_yearmonth() -> YearMonth:
-    max_yearmonth = list_monthly_data_yearmonths()[-1]
+    max_yearmonth = _monthly_listing().keys[-1]
     return max_yearmonth
 
 
@@ -93,6 +104,45 @@ def max_monthly_data_yearmonth_str() -> str:
     return max_yearmonth_str
 
 
+def missing_monthly_data_yearmonths(
+    start_month: YearMonth,
+    end_month: YearMonth,
+) -> list[YearMonth]:
+    """List months between start and end, inclusive, for which no monthly file exists.
+
+    Answered from the availability index without touching the data directory, in
+    constant time when no months are missing.
+    """
+    missing = _monthly_listing().presence.missing(
+        _yearmonth_ordinal(start_month),
+        _yearmonth_ordinal(end_month),
+    )
+    return [_yearmonth_from_ordinal(o) for o in missing]
+
+
+def data_file_fingerprints(paths: list[Path]) -> list[FileFingerprint]:
+    """Fingerprint data files with `stat`.
+
+    NOTE: The manifest's fingerprints aren't trusted, as a file may be re-ingested
+    without the manifest being updated (and cached plots of it must not be served).
+    """
+    return [stat_fingerprint(p) for p in paths]
+
+
+def daily_data_fingerprints(dates: list[dt.date]) -> list[str | None]:
+    """Fingerprint each date's daily file, or `None` if it's missing.
+
+    Stores of data derived from daily files record these, so they can detect re-ingested
+    (or filled in) days.
+    """
+    available = set(list_daily_data_dates())
+    present = [date for date in dates if date in available]
+    fps = [DATA_DAILY_DIR / DATA_DAILY_TEMPLATE.format(date=date) for date in present]
+    fingerprints = dict(zip(present, data_file_fingerprints(fps)))
+
+    return [str(fingerprints[d]) if d in fingerprints else None for d in dates]
+
+
 def _date_from_daily_path(path: Path) -> dt.date | None:
     match = re.search(DATA_DAILY_DATE_REGEX, path.name)
     if not match:
@@ -111,3 +161,191 @@ def _yearmonth_from_monthly_path(path: Path) -> YearMonth | None:
 
     yearmonth = YearMonth(year=int(match.group(1)), month=int(match.group(2)))
     return yearmonth
+
+
+def _date_ordinal(date: dt.date) -> int:
+    return date.toordinal()
+
+
+def _yearmonth_ordinal(yearmonth: YearMonth) -> int:
+    return (12 * yearmonth.year) + yearmonth.month - 1
+
+
+def _yearmonth_from_ordinal(ordinal: int) -> YearMonth:
+    year, month_index = divmod(ordinal, 12)
+    return YearMonth(year=year, month=month_index + 1)
+
+
+class _Presence:
+    """Presence bitmap over a span of consecutive ordinals (e.g. days).
+
+    Holds a running count of present ordinals so the number present in any range can be
+    calculated in constant time.
+    """
+
+    def __init__(self, ordinals: list[int]):
+        self.first = ordinals[0] if ordinals else 0
+        span = (ordinals[-1] - self.first + 1) if ordinals else 0
+
+        self._bitmap = bytearray(span)
+        for ordinal in ordinals:
+            self._bitmap[ordinal - self.first] = 1
+
+        # `_cumulative[i]` is the number of present ordinals before `first + i`
+        self._cumulative = [0, *itertools.accumulate(self._bitmap)]
+
+    def count(self, start: int, end: int) -> int:
+        """Count present ordinals between start and end, inclusive."""
+        lo = self._clamp(start - self.first)
+        hi = self._clamp(end - self.first + 1)
+        return self._cumulative[hi] - self._cumulative[lo]
+
+    def missing(self, start: int, end: int) -> list[int]:
+        """List absent ordinals between start and end, inclusive."""
+        if self.count(start, end) == end - start + 1:
+            return []
+
+        return [o for o in range(start, end + 1) if not self._is_present(o)]
+
+    def _clamp(self, index: int) -> int:
+        return min(max(index, 0), len(self._bitmap))
+
+    def _is_present(self, ordinal: int) -> bool:
+        index = ordinal - self.first
+        return 0 <= index < len(self._bitmap) and self._bitmap[index] == 1
+
+
+@dataclass(frozen=True)
+class _Listing(Generic[_K]):
+    """Snapshot of a data directory.
+
+    `paths` contains every file in the directory, and `keys` the date (or year-month)
+    of every file with a valid name. Both are sorted.
+    """
+
+    paths: list[Path]
+    keys: list[_K]
+    presence: _Presence
+
+
+class _AvailabilityIndex(Generic[_K]):
+    """Sorted listing of a data directory, shared by all requests in a worker.
+
+    The listing is read from the manifest when it's at least as new as the directory,
+    and otherwise by globbing the directory. It is only rebuilt when either mtime
+    changes or `ttl` seconds have passed since the last build; otherwise a lookup costs
+    two `stat` calls.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        key_from_path: Callable[[Path], _K | None],
+        key_ordinal: Callable[[_K], int],
+        *,
+        manifest_file: Path = DATA_MANIFEST_FILE,
+        ttl: float = AVAILABILITY_INDEX_TTL_SECONDS,
+    ):
+        self.directory = directory
+        self.key_from_path = key_from_path
+        self.key_ordinal = key_ordinal
+        self.manifest_file = manifest_file
+        self.ttl = ttl
+
+        self._lock = threading.Lock()
+        self._listing: _Listing[_K] | None = None
+        self._stamp: tuple[int | None, int | None] | None = None
+        self._expires_at = 0.0
+
+    def listing(self) -> _Listing[_K]:
+        with stage('list'):
+            return self._lookup()
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._listing = None
+
+    def _lookup(self) -> _Listing[_K]:
+        # NOTE: Read the mtimes _before_ listing, so a change made during the listing is
+        # detected on the next lookup.
+        stamp = self._current_stamp()
+
+        with self._lock:
+            listing = self._listing
+            if (
+                listing is None
+                or stamp != self._stamp
+                or time.monotonic() >= self._expires_at
+            ):
+                listing = self._listing = self._build(
+                    from_manifest=stamp[1] is not None
+                )
+                self._stamp = stamp
+                self._expires_at = time.monotonic() + self.ttl
+
+            return listing
+
+    def _current_stamp(self) -> tuple[int | None, int | None]:
+        """Directory mtime, and manifest mtime if the manifest is usable."""
+        directory_mtime_ns = _mtime_ns(self.directory)
+        manifest_mtime_ns = _mtime_ns(self.manifest_file)
+
+        if (
+            directory_mtime_ns is None
+            or manifest_mtime_ns is None
+            or manifest_mtime_ns < directory_mtime_ns
+        ):
+            return (directory_mtime_ns, None)
+
+        return (directory_mtime_ns, manifest_mtime_ns)
+
+    def _build(self, *, from_manifest: bool) -> _Listing[_K]:
+        source = 'manifest' if from_manifest else 'directory'
+        with listing_seconds.labels(source=source).time():
+            return self._list(from_manifest=from_manifest)
+
+    def _list(self, *, from_manifest: bool) -> _Listing[_K]:
+        if from_manifest:
+            manifest = read_manifest(self.manifest_file)
+            paths = sorted(p for p in manifest if p.parent == self.directory)
+        else:
+            paths = sorted(self.directory.glob('*'))
+
+        keys = [key for p in paths if (key := self.key_from_path(p)) is not None]
+        presence = _Presence([self.key_ordinal(k) for k in keys])
+        return _Listing(paths=paths, keys=keys, presence=presence)
+
+
+def _mtime_ns(directory: Path) -> int | None:
+    try:
+        return directory.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+_daily_index = _AvailabilityIndex(
+    DATA_DAILY_DIR,
+    _date_from_daily_path,
+    _date_ordinal,
+)
+_monthly_index = _AvailabilityIndex(
+    DATA_MONTHLY_DIR,
+    _yearmonth_from_monthly_path,
+    _yearmonth_ordinal,
+)
+
+
+def _daily_listing() -> _Listing[dt.date]:
+    listing = _daily_index.listing()
+    if len(listing.paths) == 0:
+        raise NoDataFoundError('No daily data found. Please run ingest!')
+
+    return listing
+
+
+def _monthly_listing() -> _Listing[YearMonth]:
+    listing = _monthly_index.listing()
+    if len(listing.paths) == 0:
+        raise NoDataFoundError('No monthly data found. Please run ingest!')
+
+    return listing
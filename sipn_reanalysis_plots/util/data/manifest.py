@@ -0,0 +1,97 @@
+"""Read and write the data manifest.
+
+The manifest lives next to the data and records the size and mtime of every daily and
+monthly file, so availability can be answered without listing networked storage. It is
+a plain tab-separated file which is always replaced atomically, as SQLite's locking is
+not reliable on network filesystems.
+
+The manifest must be updated after each ingest, e.g.:
+
+    invoke manifest.update --path /data/daily/cfsr.20230101.nc
+"""
+from pathlib import Path
+from typing import Iterable
+
+from sipn_reanalysis_plots._types import FileFingerprint
+from sipn_reanalysis_plots.constants.paths import (
+    DATA_DAILY_DIR,
+    DATA_DIR,
+    DATA_MANIFEST_FILE,
+    DATA_MONTHLY_DIR,
+)
+from sipn_reanalysis_plots.util.file import atomic_write, stat_fingerprint
+
+MANIFEST_HEADER = '# sipn-reanalysis-plots data manifest v1'
+# Relative to the manifest's directory (the data directory)
+MANIFEST_TRACKED_DIRS = tuple(
+    d.relative_to(DATA_DIR) for d in (DATA_DAILY_DIR, DATA_MONTHLY_DIR)
+)
+
+
+def read_manifest(
+    manifest_file: Path = DATA_MANIFEST_FILE,
+) -> dict[Path, FileFingerprint]:
+    """Read all manifest entries, keyed by absolute path."""
+    root = manifest_file.parent
+    entries = {}
+
+    with open(manifest_file) as f:
+        header = f.readline().rstrip('\n')
+        if header != MANIFEST_HEADER:
+            raise RuntimeError(
+                f'Unexpected manifest header in {manifest_file}: {header}'
+            )
+
+        for line in f:
+            relative_path, size, mtime_ns = line.rstrip('\n').split('\t')
+            entries[root / relative_path] = FileFingerprint(
+                size=int(size),
+                mtime_ns=int(mtime_ns),
+            )
+
+    return entries
+
+
+def update_manifest(
+    paths: Iterable[Path] | None = None,
+    *,
+    manifest_file: Path = DATA_MANIFEST_FILE,
+) -> None:
+    """Record the current size and mtime of data files in the manifest.
+
+    With `paths`, only those files are re-recorded (or dropped, if they no longer
+    exist); this is the cheap incremental update to run after ingesting some files.
+    Without `paths`, or if there's no manifest yet, the tracked data directories are
+    listed in full and the manifest is rebuilt from the result.
+
+    NOTE: A first manifest must list every file, as it's trusted over the directories
+    it's newer than; one of only `paths` would hide all the others.
+    """
+    if paths is not None and manifest_file.exists():
+        entries = read_manifest(manifest_file)
+    else:
+        entries = {}
+        tracked_dirs = [manifest_file.parent / d for d in MANIFEST_TRACKED_DIRS]
+        paths = [*(p for d in tracked_dirs for p in d.glob('*')), *(paths or [])]
+
+    for path in paths:
+        path = Path(path).absolute()
+        try:
+            entries[path] = stat_fingerprint(path)
+        except FileNotFoundError:
+            entries.pop(path, None)
+
+    _write_manifest(entries, manifest_file)
+
+
+def _write_manifest(
+    entries: dict[Path, FileFingerprint],
+    manifest_file: Path,
+) -> None:
+    root = manifest_file.parent
+
+    with atomic_write(manifest_file, 'w') as f:
+        f.write(f'{MANIFEST_HEADER}\n')
+        for path, fingerprint in sorted(entries.items()):
+            relative_path = path.relative_to(root)
+            f.write(f'{relative_path}\t{fingerprint.size}\t{fingerprint.mtime_ns}\n')
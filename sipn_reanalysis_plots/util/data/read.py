@@ -1,30 +1,51 @@
 import datetime as dt
-from contextlib import contextmanager
+import functools
+from contextlib import ExitStack, contextmanager
 from pathlib import Path
-from typing import Generator
+from typing import Any, Generator
 
-import rioxarray  # noqa: F401; Activate xarray extension
+import numpy as np
 import xarray as xra
+from xarray.backends import NetCDF4DataStore
 
 from sipn_reanalysis_plots._types import YearMonth
+from sipn_reanalysis_plots.constants.cache import NETCDF_FILE_POOL_SIZE
+from sipn_reanalysis_plots.constants.dask import DASK_SCHEDULER
 from sipn_reanalysis_plots.constants.paths import (
     DATA_CLIMATOLOGY_DAILY_FILE,
     DATA_CLIMATOLOGY_MONTHLY_FILE,
-    DATA_DAILY_DIR,
-    DATA_DAILY_TEMPLATE,
-    DATA_MONTHLY_DIR,
-    DATA_MONTHLY_TEMPLATE,
 )
-from sipn_reanalysis_plots.util.date import date_range, month_range
+from sipn_reanalysis_plots.constants.plot import MAP_EXTENT_RADIUS
+from sipn_reanalysis_plots.constants.variables import VARIABLES
+from sipn_reanalysis_plots.util.data.file_pool import NetcdfFilePool
+from sipn_reanalysis_plots.util.data.files import (
+    cfsr_daily_fps,
+    cfsr_monthly_fps,
+    notify_file_read,
+)
+from sipn_reanalysis_plots.util.metrics import bytes_read, files_opened
+from sipn_reanalysis_plots.util.timing import current_timer, stage
+
+# NOTE: Files opened from the pool can't be sent to `distributed` worker processes
+_file_pool = (
+    NetcdfFilePool(NETCDF_FILE_POOL_SIZE)
+    if NETCDF_FILE_POOL_SIZE > 0 and DASK_SCHEDULER != 'distributed'
+    else None
+)
 
 
 @contextmanager
-def read_cfsr_daily_file(date: dt.date) -> Generator[xra.Dataset, None, None]:
-    fp = _cfsr_daily_fp(date)
+def read_cfsr_daily_file(
+    date: dt.date,
+    *,
+    variable: str | None = None,
+    level: str | None = None,
+) -> Generator[xra.Dataset, None, None]:
+    """Open a daily file, with only `variable` at `level` if given (see `_select`)."""
+    fp = cfsr_daily_fps(date)[0]
 
-    dataset = _dataset_from_nc(fp)
-    yield dataset
-    dataset.close()
+    with _open_nc(fp, variable=variable, level=level) as dataset:
+        yield dataset
 
 
 @contextmanager
@@ -32,88 +53,208 @@ def read_cfsr_daily_files(
     *,
     start_date: dt.date,
     end_date: dt.date,
+    variable: str,
+    level: str,
 ) -> Generator[xra.Dataset, None, None]:
-    dates = date_range(start_date, end_date)
-    file_paths = sorted(_cfsr_daily_fp(d) for d in dates)
+    file_paths = cfsr_daily_fps(start_date, end_date)
 
-    # Tested `h5netcdf` engine and it was 1/2 as fast as `netcdf4`
-    dataset = _dataset_from_multi_nc(file_paths)
-    yield dataset
-    dataset.close()
+    with _open_multi_nc(file_paths, variable=variable, level=level) as dataset:
+        yield dataset
 
 
 @contextmanager
-def read_cfsr_monthly_file(month: YearMonth) -> Generator[xra.Dataset, None, None]:
-    fp = _cfsr_monthly_fp(month)
+def read_cfsr_monthly_file(
+    month: YearMonth,
+    *,
+    variable: str | None = None,
+    level: str | None = None,
+) -> Generator[xra.Dataset, None, None]:
+    """Open a monthly file, with only `variable` at `level` if given (see `_select`)."""
+    fp = cfsr_monthly_fps(month)[0]
 
-    dataset = _dataset_from_nc(fp)
-    yield dataset
-    dataset.close()
+    with _open_nc(fp, variable=variable, level=level) as dataset:
+        yield dataset
 
 
 @contextmanager
 def read_cfsr_monthly_files(
     start_month: YearMonth,
     end_month: YearMonth,
+    *,
+    variable: str,
+    level: str,
 ) -> Generator[xra.Dataset, None, None]:
-    months = month_range(start_month, end_month)
-    file_paths = sorted(_cfsr_monthly_fp(d) for d in months)
+    file_paths = cfsr_monthly_fps(start_month, end_month)
 
-    dataset = _dataset_from_multi_nc(file_paths)
-    yield dataset
-    dataset.close()
+    with _open_multi_nc(file_paths, variable=variable, level=level) as dataset:
+        yield dataset
 
 
 @contextmanager
-def read_cfsr_daily_climatology_file() -> Generator[xra.Dataset, None, None]:
-    dataset = _dataset_from_nc(
+def read_cfsr_daily_climatology_file(
+    *,
+    variable: str,
+    level: str,
+) -> Generator[xra.Dataset, None, None]:
+    with _open_nc(
         DATA_CLIMATOLOGY_DAILY_FILE,
+        variable=variable,
+        level=level,
         chunks={'date': 10},
-    )
-    yield dataset
-    dataset.close()
+    ) as dataset:
+        yield dataset
 
 
 @contextmanager
-def read_cfsr_monthly_climatology_file() -> Generator[xra.Dataset, None, None]:
-    dataset = _dataset_from_nc(
+def read_cfsr_monthly_climatology_file(
+    *,
+    variable: str,
+    level: str,
+) -> Generator[xra.Dataset, None, None]:
+    with _open_nc(
         DATA_CLIMATOLOGY_MONTHLY_FILE,
+        variable=variable,
+        level=level,
         chunks={'month': 4},
-    )
-    yield dataset
-    dataset.close()
+    ) as dataset:
+        yield dataset
+
+
+def level_dim_name(data_array: xra.DataArray) -> str:
+    """Find the variable's "level" dimension; each variable's has a different name."""
+    level_dim_names = [d for d in data_array.dims if str(d).startswith('lev')]
+    if len(level_dim_names) != 1:
+        raise RuntimeError(
+            f'Expected 1 "level" dimension in {data_array.dims=};'
+            f' found {level_dim_names}'
+        )
+
+    return str(level_dim_names[0])
+
+
+def map_region_slices(data: xra.Dataset | xra.DataArray) -> dict[str, slice]:
+    """Slice the data's grid to the part shown on the map.
+
+    The map only shows latitudes north of `LATITUDE_LIMIT` (within `MAP_EXTENT_RADIUS`
+    of the pole), so most of the grid's cells are never drawn. As the grid is sliced,
+    only the map's hyperslab is read from the file.
+    """
+    x = data['x'].values
+    y = data['y'].values
+    return dict(_map_region_slices_for_grid(x.tobytes(), y.tobytes(), x.dtype.str))
+
+
+@functools.lru_cache(maxsize=8)
+def _map_region_slices_for_grid(
+    x_bytes: bytes,
+    y_bytes: bytes,
+    dtype: str,
+) -> dict[str, slice]:
+    limits = (-MAP_EXTENT_RADIUS, MAP_EXTENT_RADIUS)
+    return {
+        'x': covering_slice(np.frombuffer(x_bytes, dtype=dtype), limits),
+        'y': covering_slice(np.frombuffer(y_bytes, dtype=dtype), limits),
+    }
+
 
+def covering_slice(coords: np.ndarray, limits: tuple[float, float]) -> slice:
+    """Slice the monotonic cell-center `coords` to cover `limits`.
 
-def _dataset_from_nc(
+    One more cell than those inside `limits` is kept on each side, so the cells at the
+    edges of the map are drawn whole.
+    """
+    low, high = sorted(limits)
+    inside = np.flatnonzero((coords >= low) & (coords <= high))
+    if inside.size == 0:
+        return slice(None)
+
+    return slice(max(inside[0] - 1, 0), min(inside[-1] + 2, len(coords)))
+
+
+@contextmanager
+def _open_nc(
     fp: Path,
     *,
+    variable: str | None,
+    level: str | None,
     chunks: dict | None = None,
+) -> Generator[xra.Dataset, None, None]:
+    """Open the file (from the file pool, if enabled) with only `variable` at `level`.
+
+    See `_select`. Opens are timed as the "open" stage of the current timer, and counted
+    as "files_read". The bytes selected are counted in the "bytes read" metric, though
+    they're only read if they're computed.
+    """
+    open_kwargs: dict[str, Any] = {
+        'chunks': chunks,
+        'drop_variables': _other_variables(variable),
+    }
+    with ExitStack() as stack:
+        with stage('open'):
+            if _file_pool is None:
+                # Tested `h5netcdf` engine and it was 1/2 as fast as `netcdf4`
+                dataset = xra.open_dataset(fp, engine='netcdf4', **open_kwargs)
+                stack.callback(dataset.close)
+            else:
+                # NOTE: The dataset isn't closed, which would close the pool's file
+                handle = stack.enter_context(_file_pool.open(fp))
+                dataset = xra.open_dataset(NetCDF4DataStore(handle), **open_kwargs)
+
+        if (timer := current_timer()) is not None:
+            timer.count('files_read')
+        files_opened.inc()
+        notify_file_read(fp)
+
+        selected = _select(dataset, variable=variable, level=level)
+        bytes_read.inc(selected.nbytes)
+        yield selected
+
+
+@contextmanager
+def _open_multi_nc(
+    fps: list[Path],
+    *,
+    variable: str,
+    level: str,
+) -> Generator[xra.Dataset, None, None]:
+    with ExitStack() as stack:
+        # NOTE: Each file is pruned before they're concatenated
+        datasets = [
+            stack.enter_context(
+                _open_nc(fp, variable=variable, level=level, chunks={'t': 100}),
+            )
+            for fp in fps
+        ]
+        yield xra.combine_nested(datasets, concat_dim='t', combine_attrs='override')
+
+
+def _select(
+    dataset: xra.Dataset,
+    *,
+    variable: str | None,
+    level: str | None,
 ) -> xra.Dataset:
-    # Tested `h5netcdf` engine and it was 1/2 as fast as `netcdf4`
-    dataset = xra.open_dataset(fp, engine='netcdf4', chunks=chunks)
-    return dataset
-
-
-def _dataset_from_multi_nc(fps: list[Path]) -> xra.Dataset:
-    # Tested `h5netcdf` engine and it was 1/2 as fast as `netcdf4`
-    dataset = xra.open_mfdataset(
-        fps,
-        engine='netcdf4',
-        chunks={
-            't': 100,
-        },
-        concat_dim='t',
-        combine='nested',
-        parallel=True,
-    )
-    return dataset
-
-
-def _cfsr_daily_fp(date: dt.date) -> Path:
-    fp = DATA_DAILY_DIR / DATA_DAILY_TEMPLATE.format(date=date)
-    return fp
-
-
-def _cfsr_monthly_fp(month: YearMonth) -> Path:
-    fp = DATA_MONTHLY_DIR / DATA_MONTHLY_TEMPLATE.format(month=month)
-    return fp
+    """Select `variable` at `level`, in the map's region, from the lazy dataset.
+
+    The level dimension is kept, with only `level` in it, so the dataset can still be
+    reduced with `select_variable_level`. The level and region are selected with
+    slices, all at once, so dask reads only their hyperslab from the file.
+    """
+    if variable is None:
+        return dataset
+
+    dataset = dataset[[variable]]
+    slices = map_region_slices(dataset)
+    if level is not None:
+        level_dim = level_dim_name(dataset[variable])
+        level_index = dataset.get_index(level_dim).get_loc(level)
+        slices[level_dim] = slice(level_index, level_index + 1)
+
+    return dataset.isel(slices)
+
+
+def _other_variables(variable: str | None) -> list[str]:
+    """List the variables not to open at all when reading `variable`."""
+    if variable is None:
+        return []
+    return [other for other in VARIABLES if other != variable]
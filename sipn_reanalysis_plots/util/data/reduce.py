@@ -1,5 +1,127 @@
+import datetime as dt
+import functools
+from contextlib import AbstractContextManager
+from pathlib import Path
+from typing import Callable
+
 import xarray as xra
 
+from sipn_reanalysis_plots._types import YearMonth
+from sipn_reanalysis_plots.constants.cache import GRID_STORE_MAX_BYTES
+from sipn_reanalysis_plots.constants.paths import GRID_STORE_DIR
+from sipn_reanalysis_plots.constants.version import VERSION
+from sipn_reanalysis_plots.util.data.files import cfsr_daily_fps, cfsr_monthly_fps
+from sipn_reanalysis_plots.util.data.grid_store import GridStore
+from sipn_reanalysis_plots.util.data.list import data_file_fingerprints
+from sipn_reanalysis_plots.util.data.read import (
+    level_dim_name,
+    read_cfsr_daily_file,
+    read_cfsr_daily_files,
+    read_cfsr_monthly_file,
+    read_cfsr_monthly_files,
+)
+from sipn_reanalysis_plots.util.data.zarr_store import (
+    VALID_STEPS_COORD,
+    read_zarr_store,
+    zarr_store_covers,
+)
+
+grid_store = GridStore(GRID_STORE_DIR, max_bytes=GRID_STORE_MAX_BYTES)
+
+
+def reduce_cfsr_daily(
+    start_date: dt.date,
+    end_date: dt.date | None = None,
+    *,
+    variable: str,
+    level: str,
+) -> xra.DataArray:
+    """Reduce daily data for a date (range) to a single grid, via the grid store."""
+    opener: Callable[[], AbstractContextManager[xra.Dataset]]
+    if not end_date:
+        opener = functools.partial(
+            read_cfsr_daily_file,
+            start_date,
+            variable=variable,
+            level=level,
+        )
+    else:
+        opener = daily_range_opener(
+            start_date,
+            end_date,
+            variable=variable,
+            level=level,
+        )
+
+    return _reduce_via_grid_store(
+        opener,
+        fps=cfsr_daily_fps(start_date, end_date),
+        template_key=f'daily/{variable}/{level}',
+        variable=variable,
+        level=level,
+    )
+
+
+def daily_range_opener(
+    start_date: dt.date,
+    end_date: dt.date,
+    *,
+    variable: str,
+    level: str,
+) -> Callable[[], AbstractContextManager[xra.Dataset]]:
+    """Choose how to open a range of daily data, with a day per time step."""
+    if zarr_store_covers(start_date, end_date):
+        # Ranges are read from a few chunks of the Zarr store, if it covers them
+        return functools.partial(
+            read_zarr_store,
+            start_date=start_date,
+            end_date=end_date,
+            variable=variable,
+            level=level,
+        )
+
+    return functools.partial(
+        read_cfsr_daily_files,
+        start_date=start_date,
+        end_date=end_date,
+        variable=variable,
+        level=level,
+    )
+
+
+def reduce_cfsr_monthly(
+    start_month: YearMonth,
+    end_month: YearMonth | None = None,
+    *,
+    variable: str,
+    level: str,
+) -> xra.DataArray:
+    """Reduce monthly data for a month (range) to a single grid, via the grid store."""
+    opener: Callable[[], AbstractContextManager[xra.Dataset]]
+    if not end_month:
+        opener = functools.partial(
+            read_cfsr_monthly_file,
+            start_month,
+            variable=variable,
+            level=level,
+        )
+    else:
+        opener = functools.partial(
+            read_cfsr_monthly_files,
+            start_month=start_month,
+            end_month=end_month,
+            variable=variable,
+            level=level,
+        )
+
+    return _reduce_via_grid_store(
+        opener,
+        fps=cfsr_monthly_fps(start_month, end_month),
+        template_key=f'monthly/{variable}/{level}',
+        variable=variable,
+        level=level,
+    )
+
 
 def reduce_dataset(
     dataset: xra.Dataset,
@@ -8,23 +130,70 @@ def reduce_dataset(
     level: str,
 ) -> xra.DataArray:
     """Reduce the dataset to a single grid."""
+    data_array = select_variable_level(dataset, variable=variable, level=level)
+
+    # Average over time dimension if it exists
+    if VALID_STEPS_COORD in data_array.coords:
+        # Days from the Zarr store are means of their valid steps, so they're weighted
+        # by them: the mean is then that of all the steps
+        data_array = data_array.weighted(data_array[VALID_STEPS_COORD]).mean(
+            dim='t',
+            keep_attrs=True,
+        )
+    elif 't' in data_array.dims:
+        data_array = data_array.mean(dim='t', keep_attrs=True)
+
+    return data_array
+
+
+def select_variable_level(
+    dataset: xra.Dataset,
+    *,
+    variable: str,
+    level: str,
+) -> xra.DataArray:
+    """Select a variable at a level from the dataset, keeping any time dimension."""
     # Select variable
     data_array = dataset[variable]
 
     # Select level
-    level_dim_names = [d for d in data_array.dims if str(d).startswith('lev')]
-    if len(level_dim_names) != 1:
-        raise RuntimeError(
-            f'Expected 1 "level" dimension in {data_array.dims=};'
-            f' found {level_dim_names}'
-        )
-
-    level_dim_name = level_dim_names[0]
-    data_array = data_array.sel({level_dim_name: level})
+    data_array = data_array.sel({level_dim_name(data_array): level})
     data_array.attrs['analysis_level'] = level
 
-    # Average over time dimension if it exists
-    if 't' in data_array.dims:
-        data_array = data_array.mean(dim='t', keep_attrs=True)
+    return data_array
+
+
+def _reduce_via_grid_store(
+    opener: Callable[[], AbstractContextManager[xra.Dataset]],
+    *,
+    fps: list[Path],
+    template_key: str,
+    variable: str,
+    level: str,
+) -> xra.DataArray:
+    """Read the grid from the store, or reduce the opened data and store the result.
+
+    Grids are keyed by the fingerprints of their source files, so re-ingesting a file
+    invalidates the grids calculated from it.
+    """
+    fingerprints = data_file_fingerprints(fps)
+    key = '\n'.join(
+        [
+            f'v{VERSION}',
+            template_key,
+            *(f'{fp.name}:{fingerprint}' for fp, fingerprint in zip(fps, fingerprints)),
+        ]
+    )
+
+    if (grid := grid_store.get(key, template_key=template_key)) is not None:
+        return grid
+
+    with opener() as dataset:
+        data_array = reduce_dataset(
+            dataset,
+            variable=variable,
+            level=level,
+        ).compute()
 
+    grid_store.put(key, data_array, template_key=template_key)
     return data_array
@@ -0,0 +1,49 @@
+import datetime as dt
+
+import numpy as np
+import xarray as xra
+
+from sipn_reanalysis_plots._types import Region
+from sipn_reanalysis_plots.util.data.reduce import (
+    daily_range_opener,
+    select_variable_level,
+)
+from sipn_reanalysis_plots.util.grid_geometry import grid_signature
+from sipn_reanalysis_plots.util.region import region_weights
+from sipn_reanalysis_plots.util.timing import stage
+
+
+def read_daily_region_means(
+    start_date: dt.date,
+    end_date: dt.date,
+    *,
+    variable: str,
+    level: str,
+    region: Region,
+) -> tuple[np.ndarray, str]:
+    """Average each day of a range over the region, weighted by area.
+
+    Days are read from the Zarr store if it covers them, or else their files, and
+    computed together by the dask scheduler. Only the map's region is read (see
+    `map_region_slices`), so the region is clipped to it. Returns a mean per day (NaN if
+    the region has no data), and their units. Every day's file must exist.
+    """
+    opener = daily_range_opener(start_date, end_date, variable=variable, level=level)
+    with opener() as dataset:
+        data_array = select_variable_level(dataset, variable=variable, level=level)
+        *_, y_dim, x_dim = data_array.dims
+        weights = xra.DataArray(
+            region_weights(region, grid_signature(data_array.isel(t=0))),
+            dims=(y_dim, x_dim),
+        )
+        with stage('region_means'):
+            means = data_array.weighted(weights).mean((y_dim, x_dim)).values
+
+    num_days = (end_date - start_date).days + 1
+    if means.shape != (num_days,):
+        raise RuntimeError(
+            f'Expected a time step per day from {start_date} to {end_date};'
+            f' got {means.shape}'
+        )
+
+    return means, data_array.attrs.get('units', '')
@@ -0,0 +1,311 @@
+"""A Zarr store of daily grids, for reading date ranges from a few chunks.
+
+Reading a date range from the daily files opens a file for every day of the range. The
+store holds each day's sum of every variable and level's time steps instead, and the
+number of valid (non-NaN) steps in each cell, in the map's region only (see
+`map_region_slices`). They're arrays per variable and level chunked by `_CHUNK_DAYS`
+days, so a month's range is read from one or two chunks of each.
+
+A range's mean is its sums' total divided by its counts' total, as for the cumulative
+store, so it's the same as the mean of all the steps in its files even if days have
+different numbers of valid steps; a mean of daily means isn't.
+
+The store is extended with `invoke zarr-store.extend` after ingest. It's only used for
+date ranges which it covers, and whose files haven't been re-ingested since they were
+added; other ranges are read from the daily files.
+"""
+import datetime as dt
+import json
+import shutil
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Generator
+
+import numpy as np
+import xarray as xra
+import zarr
+
+from sipn_reanalysis_plots import app
+from sipn_reanalysis_plots._types import FileFingerprint
+from sipn_reanalysis_plots.constants.paths import ZARR_STORE_DIR
+from sipn_reanalysis_plots.constants.variables import VARIABLES
+from sipn_reanalysis_plots.util.data.files import cfsr_daily_fps
+from sipn_reanalysis_plots.util.data.list import (
+    daily_data_fingerprints,
+    data_file_fingerprints,
+    max_daily_data_date,
+    min_daily_data_date,
+)
+from sipn_reanalysis_plots.util.data.read import (
+    level_dim_name,
+    map_region_slices,
+    read_cfsr_daily_file,
+)
+from sipn_reanalysis_plots.util.date import date_range
+from sipn_reanalysis_plots.util.file import atomic_write, file_lock, stat_fingerprint
+
+# The coordinate of each day's number of valid time steps, when read from the store
+VALID_STEPS_COORD = 'valid_steps'
+# Incremented when the layout of the store changes, so it's rebuilt from scratch
+_FORMAT_VERSION = 2
+# Days in each chunk of an array; days are also added a chunk at a time
+_CHUNK_DAYS = 32
+_ZARR_DIR = ZARR_STORE_DIR / 'daily.zarr'
+# Written after the arrays, so readers only see days which were written completely
+_META_FILE = ZARR_STORE_DIR / 'meta.json'
+
+
+@dataclass(frozen=True)
+class _StoreMeta:
+    start_date: dt.date
+    # Fingerprint of each day's file when it was added to the store; `None` if missing
+    fingerprints: tuple[str | None, ...]
+
+    @property
+    def num_days(self) -> int:
+        return len(self.fingerprints)
+
+    def rows(self, start_date: dt.date, end_date: dt.date) -> slice | None:
+        """Find the range's days in the store, or `None` if it doesn't hold them all."""
+        start = (start_date - self.start_date).days
+        end = (end_date - self.start_date).days + 1
+        if start < 0 or end > self.num_days or None in self.fingerprints[start:end]:
+            return None
+
+        return slice(start, end)
+
+
+_store_cache: tuple[FileFingerprint, _StoreMeta, xra.Dataset] | None = None
+
+
+def zarr_store_covers(start_date: dt.date, end_date: dt.date) -> bool:
+    """Check that the store holds the date range, and that none of its files changed."""
+    store = _open_store()
+    if store is None:
+        return False
+
+    meta, _ = store
+    rows = meta.rows(start_date, end_date)
+    if rows is None:
+        return False
+
+    fingerprints = data_file_fingerprints(cfsr_daily_fps(start_date, end_date))
+    return list(meta.fingerprints[rows]) == [str(f) for f in fingerprints]
+
+
+@contextmanager
+def read_zarr_store(
+    *,
+    start_date: dt.date,
+    end_date: dt.date,
+    variable: str,
+    level: str,
+) -> Generator[xra.Dataset, None, None]:
+    """Open a date range from the store, like `read_cfsr_daily_files` opens its files.
+
+    Each day is a single time step, the mean of its valid steps, with their number as
+    the `VALID_STEPS_COORD` coordinate; `reduce_dataset` weights days by it. Check that
+    the store covers the range with `zarr_store_covers` first.
+    """
+    store = _open_store()
+    rows = store[0].rows(start_date, end_date) if store else None
+    if store is None or rows is None:
+        raise RuntimeError(f'Zarr store does not cover {start_date} to {end_date}')
+
+    name = _array_name(variable, level)
+    sums = store[1][name].isel(t=rows)
+    counts = store[1][_count_array_name(name)].isel(t=rows)
+    data_array = (sums / counts.where(counts > 0)).astype(sums.dtype)
+    data_array.attrs = sums.attrs
+    data_array = data_array.assign_coords(
+        {level_dim_name(sums): [level], VALID_STEPS_COORD: counts},
+    )
+    yield data_array.to_dataset(name=variable)
+
+
+def extend_zarr_store(start_date: dt.date | None = None) -> int:
+    """Add days ingested since the store was last extended, returning the number added.
+
+    As in the cumulative store, a day whose file was re-ingested (or filled in) since it
+    was added is rewritten, along with every day after it, and passing a different
+    `start_date` for an existing store rebuilds it.
+    """
+    with file_lock(ZARR_STORE_DIR / '.lock'):
+        store = _open_store()
+        meta = store[0] if store else None
+        if meta is None or start_date not in (None, meta.start_date):
+            meta = _new_store(start_date or min_daily_data_date())
+
+        dates = list(date_range(meta.start_date, max_daily_data_date()))
+        fingerprints = daily_data_fingerprints(dates)
+
+        # Find the first day which is new, or has changed since it was added
+        changed = (
+            i
+            for i, (old, new) in enumerate(zip(meta.fingerprints, fingerprints))
+            if old != new
+        )
+        first = next(changed, min(meta.num_days, len(dates)))
+        if first == len(dates):
+            return 0
+
+        if first < meta.num_days:
+            meta = _StoreMeta(meta.start_date, meta.fingerprints[:first])
+            _truncate(meta)
+
+        _append_days(meta, dates[first:], fingerprints[first:])
+        return len(dates) - first
+
+
+def _append_days(
+    meta: _StoreMeta,
+    dates: list[dt.date],
+    fingerprints: list[str | None],
+) -> None:
+    levels = _levels()
+    while dates:
+        # Fill the last chunk, then a chunk at a time
+        batch_size = _CHUNK_DAYS - meta.num_days % _CHUNK_DAYS
+        days = xra.concat(
+            [
+                _day_grids(date, levels, missing=fingerprint is None)
+                for date, fingerprint in zip(
+                    dates[:batch_size],
+                    fingerprints[:batch_size],
+                )
+            ],
+            dim='t',
+        )
+        _write_days(days, meta)
+
+        meta = _StoreMeta(
+            meta.start_date,
+            meta.fingerprints + tuple(fingerprints[:batch_size]),
+        )
+        _write_meta(meta)
+        app.logger.info(f'Extended Zarr store to {dates[:batch_size][-1]}')
+        dates, fingerprints = dates[batch_size:], fingerprints[batch_size:]
+
+
+def _day_grids(
+    date: dt.date,
+    levels: list[tuple[str, str]],
+    *,
+    missing: bool = False,
+) -> xra.Dataset:
+    """Read the day's sum and valid count grids of each variable and level.
+
+    Only the map's region is read. Each grid keeps its (unlabelled) level dimension, so
+    it can be opened like the variable in a daily file. A missing day's grids are
+    zeros, which are never read, as its fingerprint is `None`.
+    """
+    grids = {}
+    with read_cfsr_daily_file(max_daily_data_date() if missing else date) as dataset:
+        dataset = dataset.isel(map_region_slices(dataset))
+        for variable, level in levels:
+            data_array = dataset[variable]
+            level_dim = level_dim_name(data_array)
+            data_array = data_array.sel({level_dim: [level]}).drop_vars(level_dim)
+            name = _array_name(variable, level)
+            grids[name] = data_array.sum('t', keep_attrs=True)
+            grids[_count_array_name(name)] = data_array.count('t').astype(np.uint16)
+
+        day = xra.Dataset(grids).compute()
+
+    if missing:
+        day = xra.zeros_like(day)
+    return day.expand_dims(t=[np.datetime64(date, 'ns')])
+
+
+def _write_days(days: xra.Dataset, meta: _StoreMeta) -> None:
+    """Write `days` after the store's last day; metadata is consolidated separately."""
+    if meta.num_days == 0:
+        days.to_zarr(
+            _ZARR_DIR,
+            mode='w',
+            consolidated=False,
+            encoding={
+                name: {'chunks': (_CHUNK_DAYS, *days[name].shape[1:])}
+                for name in days.data_vars
+            },
+        )
+    else:
+        days.to_zarr(_ZARR_DIR, append_dim='t', consolidated=False)
+
+
+def _truncate(meta: _StoreMeta) -> None:
+    """Drop the days after `meta`'s, after hiding them from readers."""
+    _write_meta(meta)
+
+    names = [_array_name(variable, level) for variable, level in _levels()]
+    for name in ['t', *names, *(_count_array_name(name) for name in names)]:
+        array = zarr.open_array(str(_ZARR_DIR / name), mode='r+')
+        array.resize((meta.num_days, *array.shape[1:]))
+
+
+def _new_store(start_date: dt.date) -> _StoreMeta:
+    """Delete the store; the new one is written with its first days."""
+    app.logger.info(f'Creating Zarr store from {start_date}')
+    _META_FILE.unlink(missing_ok=True)
+    shutil.rmtree(_ZARR_DIR, ignore_errors=True)
+    return _StoreMeta(start_date, ())
+
+
+def _levels() -> list[tuple[str, str]]:
+    return [
+        (variable, level)
+        for variable, props in VARIABLES.items()
+        for level in props['levels']
+    ]
+
+
+def _array_name(variable: str, level: str) -> str:
+    return f'{variable}-{level}'
+
+
+def _count_array_name(name: str) -> str:
+    return f'{name}-count'
+
+
+def _open_store() -> tuple[_StoreMeta, xra.Dataset] | None:
+    """Open the store, or `None` if there's no store of the current format.
+
+    The store is only opened again once its metadata changes.
+    """
+    global _store_cache
+
+    try:
+        fingerprint = stat_fingerprint(_META_FILE)
+    except FileNotFoundError:
+        return None
+
+    if _store_cache is None or _store_cache[0] != fingerprint:
+        raw = json.loads(_META_FILE.read_text())
+        if raw['format'] != _FORMAT_VERSION:
+            return None
+
+        meta = _StoreMeta(
+            start_date=dt.date.fromisoformat(raw['start_date']),
+            fingerprints=tuple(raw['fingerprints']),
+        )
+        dataset = xra.open_zarr(_ZARR_DIR, consolidated=True)
+        _store_cache = (fingerprint, meta, dataset)
+
+    return _store_cache[1], _store_cache[2]
+
+
+def _write_meta(meta: _StoreMeta) -> None:
+    """Write the store's metadata, making its days visible to readers.
+
+    The arrays' metadata is consolidated first, for the readers which see it.
+    """
+    zarr.consolidate_metadata(str(_ZARR_DIR))
+    with atomic_write(_META_FILE, 'w') as f:
+        json.dump(
+            {
+                'format': _FORMAT_VERSION,
+                'start_date': meta.start_date.isoformat(),
+                'fingerprints': meta.fingerprints,
+            },
+            f,
+        )
@@ -0,0 +1,120 @@
+import hashlib
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import IO, Any, Callable
+
+from sipn_reanalysis_plots import app
+from sipn_reanalysis_plots.util.file import atomic_write
+
+# Temporary files older than this were abandoned by a crashed writer
+_ABANDONED_TMP_FILE_AGE_SECONDS = 60 * 60
+
+
+@dataclass
+class CacheStats:
+    """Counters for a single process's use of a cache."""
+
+    hits: int = 0
+    misses: int = 0
+    writes: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class DiskCache:
+    """Size-bounded cache of files in a directory, shared by all processes on a host.
+
+    Keys may be any string; they're hashed to name the entry files. Entries are written
+    atomically, so readers never see a partial entry. Reading an entry bumps its mtime,
+    and the least recently used entries are evicted when the cache's total size exceeds
+    `max_bytes`.
+    """
+
+    def __init__(self, directory: Path, *, max_bytes: int, suffix: str = ''):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self.stats = CacheStats()
+
+        self._stats_lock = threading.Lock()
+
+    def path(self, key: str) -> Path:
+        digest = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        return self.directory / digest[:2] / f'{digest}{self.suffix}'
+
+    def get_path(self, key: str) -> Path | None:
+        """Return the path to the entry for `key`, or None on a miss."""
+        path = self.path(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            self._count('misses')
+            return None
+
+        self._count('hits')
+        return path
+
+    def get(self, key: str) -> bytes | None:
+        path = self.get_path(key)
+        if path is None:
+            return None
+
+        try:
+            return path.read_bytes()
+        except FileNotFoundError:
+            # Evicted by another process between lookup and read
+            return None
+
+    def put(self, key: str, data: bytes) -> Path:
+        return self.put_with(key, lambda f: f.write(data))
+
+    def put_with(self, key: str, write: Callable[[IO[Any]], Any]) -> Path:
+        """Create the entry for `key` by calling `write` with a binary file object."""
+        path = self.path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        with atomic_write(path) as f:
+            write(f)
+        self._count('writes')
+
+        self.evict()
+        return path
+
+    def evict(self) -> None:
+        """Delete least recently used entries until the cache fits in `max_bytes`."""
+        entries = []
+        now = time.time()
+        for path in self.directory.glob('*/*'):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+
+            if path.name.startswith('.'):
+                if now - stat.st_mtime > _ABANDONED_TMP_FILE_AGE_SECONDS:
+                    path.unlink(missing_ok=True)
+                continue
+
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total_bytes = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_bytes <= self.max_bytes:
+                break
+
+            path.unlink(missing_ok=True)
+            total_bytes -= size
+            self._count('evictions')
+
+    def _count(self, stat_name: str) -> None:
+        with self._stats_lock:
+            setattr(self.stats, stat_name, getattr(self.stats, stat_name) + 1)
+
+        app.logger.debug(f'{self.directory.name} cache {stat_name}: {self.stats}')
@@ -1,28 +1,72 @@
-import base64
 import contextlib
 from io import BytesIO
-from typing import Literal
 
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 from matplotlib.figure import Figure
+from PIL import Image
 
+from sipn_reanalysis_plots.util.timing import StageTimer
 
-def fig_to_high_and_lowres_base64(
+
+def fig_to_png(
     fig: Figure,
-) -> tuple[str, str]:
-    return (
-        _fig_to_base64(fig),
-        _fig_to_base64(fig, dpi=600),
-    )
+    *,
+    dpi: int | float,
+) -> bytes:
+    with contextlib.closing(BytesIO()) as buf:
+        fig.savefig(buf, format='png', dpi=dpi)
+        img_bytes = buf.getvalue()
 
+    return img_bytes
 
-def _fig_to_base64(
+
+def fig_to_pngs(
     fig: Figure,
     *,
-    dpi: int | float | Literal['figure'] = 'figure',
-) -> str:
-    """Convert figure to base64 string for HTML embedding."""
+    dpis: list[int],
+    timer: StageTimer | None = None,
+) -> dict[int, bytes]:
+    """Render `fig` as PNG images at each of `dpis`, drawing it only once.
+
+    The figure is laid out and drawn at the highest resolution, and the other images
+    are downsampled from its pixels.
+    """
+    timer = timer or StageTimer()
+    max_dpi = max(dpis)
+
+    with timer.stage('draw'):
+        fig.set_dpi(max_dpi)
+        canvas = FigureCanvasAgg(fig)
+        canvas.draw()
+        image = Image.fromarray(np.asarray(canvas.buffer_rgba())).convert('RGB')
+
+    pngs = {}
+    for dpi in sorted(dpis, reverse=True):
+        if dpi != max_dpi:
+            with timer.stage('downsample'):
+                image_at_dpi = downsample(image, factor=max_dpi / dpi)
+        else:
+            image_at_dpi = image
+
+        with timer.stage('encode'):
+            pngs[dpi] = image_to_png(image_at_dpi)
+
+    return pngs
+
+
+def downsample(image: Image.Image, *, factor: float) -> Image.Image:
+    """Shrink `image` by `factor`, averaging pixels (like drawing at a lower dpi)."""
+    if factor.is_integer():
+        return image.reduce(int(factor))
+
+    size = (round(image.width / factor), round(image.height / factor))
+    return image.resize(size, Image.Resampling.LANCZOS, reducing_gap=3)
+
+
+def image_to_png(image: Image.Image) -> bytes:
     with contextlib.closing(BytesIO()) as buf:
-        fig.savefig(buf, format='png', dpi=dpi)
-        img_bytes = base64.b64encode(buf.getbuffer()).decode('ascii')
+        image.save(buf, format='png')
+        img_bytes = buf.getvalue()
 
     return img_bytes
@@ -0,0 +1,55 @@
+import fcntl
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Any, Generator
+
+from sipn_reanalysis_plots._types import FileFingerprint
+
+
+@contextmanager
+def atomic_path(path: Path) -> Generator[Path, None, None]:
+    """Yield a temporary path to write to, then move it in place of `path` on success.
+
+    Readers (including in other processes) see either the old file or the complete new
+    one, never a partial write.
+    """
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.')
+    os.close(fd)
+    try:
+        yield Path(tmp_name)
+        # `mkstemp` creates files readable only by their owner
+        os.chmod(tmp_name, 0o644)
+        os.replace(tmp_name, path)
+    except BaseException:
+        os.unlink(tmp_name)
+        raise
+
+
+@contextmanager
+def atomic_write(
+    path: Path,
+    mode: str = 'wb',
+) -> Generator[IO[Any], None, None]:
+    """Open a temporary file for writing, then move it in place of `path` on success."""
+    with atomic_path(path) as tmp_path:
+        with open(tmp_path, mode) as f:
+            yield f
+
+
+@contextmanager
+def file_lock(path: Path) -> Generator[None, None, None]:
+    """Hold an exclusive lock on `path`, shared by all processes on the host."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def stat_fingerprint(path: Path) -> FileFingerprint:
+    stat = path.stat()
+    return FileFingerprint(size=stat.st_size, mtime_ns=stat.st_mtime_ns)
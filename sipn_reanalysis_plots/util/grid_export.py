@@ -0,0 +1,147 @@
+"""Export the reduced grids of plots, for clients to render themselves.
+
+A grid's values are sent as a little-endian array, row-major from its first `y`
+coordinate, so a browser can view it as a `TypedArray` as it arrives. Values are either
+float32 (missing values are NaN), or quantized to uint16 between the grid's minimum and
+maximum, where `value = raw * scale + offset` and `GRID_UINT16_NODATA` marks missing
+values. Quantized values are within `scale / 2` of the original, and half the size.
+
+Every grid shares the same coordinates (the map region of CFSR's grid), so they're
+identified by a hash of their values and served separately, to be fetched and cached by
+clients once.
+
+Grids are calculated as plots are, from the grid store and climatology, in the render
+pool if it's enabled.
+"""
+import hashlib
+from collections.abc import Iterator
+from dataclasses import dataclass
+
+import numpy as np
+
+from sipn_reanalysis_plots import app
+from sipn_reanalysis_plots.constants.grid import (
+    GRID_STREAM_CHUNK_BYTES,
+    GRID_UINT16_NODATA,
+)
+from sipn_reanalysis_plots.constants.paths import GRID_COORDS_DIR
+from sipn_reanalysis_plots.util.file import atomic_write
+from sipn_reanalysis_plots.util.render import PlotRequest, record_render
+from sipn_reanalysis_plots.util.render_pool import RenderPool
+from sipn_reanalysis_plots.util.timing import StageTimer, recording
+
+
+@dataclass(frozen=True)
+class ExportedGrid:
+    # float32, on the (y, x) dims
+    values: np.ndarray
+    # Cell centers, in `CRS` coordinates
+    x: np.ndarray
+    y: np.ndarray
+    long_name: str
+    units: str
+
+    def coords_id(self) -> str:
+        """Identify the grid's coordinates by their values."""
+        digest = hashlib.sha256(_coords_bytes(self.x, self.y))
+        return digest.hexdigest()[:16]
+
+
+@dataclass(frozen=True)
+class GridCoords:
+    x: np.ndarray
+    y: np.ndarray
+
+    def to_bytes(self) -> bytes:
+        """Encode the `x` then `y` cell centers, as little-endian float64."""
+        return _coords_bytes(self.x, self.y)
+
+
+def export_grid(
+    plot_request: PlotRequest,
+    *,
+    pool: RenderPool | None = None,
+) -> ExportedGrid:
+    """Calculate the plot's grid, in `pool`'s processes if it's given.
+
+    The grid's coordinates are saved, to be served by their ID. The time spent is added
+    to the current timer.
+    """
+    if pool is None:
+        grid, timer = export_grid_job(plot_request)
+    else:
+        grid, timer = pool.run(export_grid_job, plot_request)
+    app.logger.info(f'Exported grid of {plot_request}: {timer}')
+    record_render(timer)
+
+    save_grid_coords(grid)
+    return grid
+
+
+def export_grid_job(plot_request: PlotRequest) -> tuple[ExportedGrid, StageTimer]:
+    """Calculate the plot's grid, and the time spent in each stage."""
+    timer = StageTimer()
+    with recording(timer), timer.stage('data'):
+        data_array = plot_request.plot_data().data_array
+        values = np.asarray(data_array.values, dtype=np.float32)
+
+    y_dim, x_dim = data_array.dims
+    grid = ExportedGrid(
+        values=values,
+        x=np.asarray(data_array[x_dim].values, dtype=np.float64),
+        y=np.asarray(data_array[y_dim].values, dtype=np.float64),
+        long_name=data_array.attrs.get('long_name', ''),
+        units=data_array.attrs.get('units', ''),
+    )
+    return grid, timer
+
+
+def quantize_uint16(values: np.ndarray) -> tuple[np.ndarray, float, float]:
+    """Quantize `values` to uint16 between their minimum and maximum.
+
+    Returns the quantized values, and the scale and offset which restore them.
+    """
+    finite = np.isfinite(values)
+    if finite.any():
+        offset = float(values[finite].min())
+        high = float(values[finite].max())
+    else:
+        offset = high = 0.0
+    scale = (high - offset) / (GRID_UINT16_NODATA - 1) or 1.0
+
+    raw = np.round((values.astype(np.float64) - offset) / scale)
+    quantized = np.where(finite, raw, GRID_UINT16_NODATA).astype('<u2')
+    return quantized, scale, offset
+
+
+def iter_array_chunks(array: np.ndarray) -> Iterator[bytes]:
+    """Yield the array's bytes in chunks, to stream it without another full copy."""
+    buffer = np.ascontiguousarray(array).data.cast('B')
+    for start in range(0, len(buffer), GRID_STREAM_CHUNK_BYTES):
+        yield bytes(buffer[start : start + GRID_STREAM_CHUNK_BYTES])
+
+
+def save_grid_coords(grid: ExportedGrid) -> None:
+    path = GRID_COORDS_DIR / f'{grid.coords_id()}.npz'
+    if path.exists():
+        return
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with atomic_write(path) as f:
+        np.savez(f, x=grid.x, y=grid.y)
+
+
+def read_grid_coords(coords_id: str) -> GridCoords | None:
+    """Read the coordinates saved with ID `coords_id`, or return None if there are none.
+
+    `coords_id` must be validated as hexadecimal, as it's part of a path.
+    """
+    try:
+        with np.load(GRID_COORDS_DIR / f'{coords_id}.npz') as npz:
+            return GridCoords(x=npz['x'], y=npz['y'])
+    except FileNotFoundError:
+        return None
+
+
+def _coords_bytes(x: np.ndarray, y: np.ndarray) -> bytes:
+    return x.astype('<f8').tobytes() + y.astype('<f8').tobytes()
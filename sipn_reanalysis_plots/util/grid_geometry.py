@@ -0,0 +1,67 @@
+"""Data grid geometry in the plot projection, calculated once per grid and reused.
+
+Data grids are already in `CRS` coordinates, but cartopy's `pcolormesh` still
+transforms every cell corner to check whether it wraps around the projection boundary.
+A grid's cells don't change between plots, so they're calculated here once per grid,
+without matplotlib or cartopy, for plots and for the data reads which need them.
+"""
+import functools
+from dataclasses import dataclass
+
+import numpy as np
+import xarray as xra
+
+
+@dataclass(frozen=True)
+class ProjectedGrid:
+    # Cell centers
+    x: np.ndarray
+    y: np.ndarray
+    # Cell corners, for `pcolormesh`
+    x_corners: np.ndarray
+    y_corners: np.ndarray
+
+
+GridSignature = tuple[bytes, bytes, str]
+
+
+def grid_signature(data_array: xra.DataArray) -> GridSignature:
+    """Identify the grid of a 2-D `data_array`, on the `(y, x)` dims, by its values.
+
+    Signatures are hashable, to key caches of calculations on the grid.
+    """
+    y_dim, x_dim = data_array.dims
+    x = data_array[x_dim].values
+    y = data_array[y_dim].values
+    return (x.tobytes(), y.tobytes(), x.dtype.str)
+
+
+def projected_grid(data_array: xra.DataArray) -> ProjectedGrid:
+    """Find the cell centers and corners of a 2-D `data_array`, on the `(y, x)` dims."""
+    return grid_from_signature(grid_signature(data_array))
+
+
+@functools.lru_cache(maxsize=8)
+def grid_from_signature(signature: GridSignature) -> ProjectedGrid:
+    """Calculate a grid's geometry once per grid signature (its coordinate values)."""
+    x_bytes, y_bytes, dtype = signature
+    x = np.frombuffer(x_bytes, dtype=dtype)
+    y = np.frombuffer(y_bytes, dtype=dtype)
+    return ProjectedGrid(
+        x=x,
+        y=y,
+        x_corners=_cell_corners(x),
+        y_corners=_cell_corners(y),
+    )
+
+
+def _cell_corners(centers: np.ndarray) -> np.ndarray:
+    """Infer cell corners halfway between centers, as `xarray` does for `pcolormesh`."""
+    half_deltas = np.diff(centers) / 2
+    return np.concatenate(
+        [
+            [centers[0] - half_deltas[0]],
+            centers[:-1] + half_deltas,
+            [centers[-1] + half_deltas[-1]],
+        ]
+    )
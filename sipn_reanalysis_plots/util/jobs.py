@@ -0,0 +1,249 @@
+"""Plot jobs, which render plots in the background while clients poll their status.
+
+Long ranges, especially of anomalies, can take longer to render than a client (or
+gunicorn) will wait for an image. A job renders its plot at every resolution into the
+plot cache instead, so its images are served immediately once it's done.
+
+Job states are files shared by all processes on a host, so any web worker can answer a
+poll. A job's ID is derived from its plot's cache key, so submitting the same plot again
+(while its input files are unchanged) finds the same job. Each web worker runs the jobs
+submitted to it in its own job processes; there's no broker.
+"""
+import functools
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field, replace
+from pathlib import Path
+from typing import Any, Literal
+
+from sipn_reanalysis_plots import app
+from sipn_reanalysis_plots.constants.jobs import (
+    JOB_MAX_QUEUED,
+    JOB_PROCESSES,
+    JOB_STATE_MAX_AGE_SECONDS,
+    JOB_TIMEOUT_SECONDS,
+)
+from sipn_reanalysis_plots.constants.paths import JOB_STATE_DIR
+from sipn_reanalysis_plots.constants.plot import PLOT_DPI, PLOT_DPI_HIGH_RES
+from sipn_reanalysis_plots.constants.render import (
+    RENDER_WORKER_MAX_JOBS,
+    RENDER_WORKER_MAX_RSS_BYTES,
+)
+from sipn_reanalysis_plots.errors import JobQueueFullError
+from sipn_reanalysis_plots.util.file import atomic_write, file_lock
+from sipn_reanalysis_plots.util.render import (
+    PlotCacheKey,
+    PlotRequest,
+    plot_cache,
+    render_plot_pngs,
+)
+from sipn_reanalysis_plots.util.render_pool import RenderPool, prepare_render_process
+
+JobStatus = Literal['queued', 'running', 'done', 'failed']
+
+# Jobs render every resolution of their plot
+JOB_DPIS = (PLOT_DPI, PLOT_DPI_HIGH_RES)
+
+# Admits a job to run or to wait to run; it's refused beyond that
+_job_slots = threading.BoundedSemaphore(max(JOB_PROCESSES, 1) + JOB_MAX_QUEUED)
+
+
+@dataclass(frozen=True, kw_only=True)
+class JobState:
+    id: str
+    plot: str
+    status: JobStatus
+    files_read: int
+    files_total: int
+    error: str | None = None
+    # Where the plot's image is served from, with the (query string) arguments to ask
+    # for it
+    image_endpoint: str
+    image_args: dict[str, str] = field(default_factory=dict)
+    # The web worker which runs the job
+    pid: int
+    updated_ns: int
+
+
+def plot_job_id(cache_key: PlotCacheKey) -> str:
+    return hashlib.sha256(cache_key.key.encode('utf-8')).hexdigest()[:32]
+
+
+def submit_job(
+    plot_request: PlotRequest,
+    *,
+    cache_key: PlotCacheKey,
+    image_endpoint: str,
+    image_args: dict[str, str],
+) -> JobState:
+    """Start a job to render the plot, or find the job already rendering it.
+
+    If the plot is already cached, the job is done at once. Raises `JobQueueFullError`
+    if too many jobs are waiting to run in this process.
+    """
+    job_id = plot_job_id(cache_key)
+    _prune_job_states()
+
+    with file_lock(_lock_path(job_id)):
+        state = read_job(job_id)
+        if state is not None and state.status != 'failed':
+            return state
+
+        files_total = len(plot_request.input_fps())
+        cached = all(
+            plot_cache.path(cache_key.for_dpi(dpi)).exists() for dpi in JOB_DPIS
+        )
+        state = JobState(
+            id=job_id,
+            plot=str(plot_request),
+            status='done' if cached else 'queued',
+            files_read=files_total if cached else 0,
+            files_total=files_total,
+            image_endpoint=image_endpoint,
+            image_args=image_args,
+            pid=os.getpid(),
+            updated_ns=time.time_ns(),
+        )
+        if cached:
+            _write_state(state)
+            return state
+
+        if not _job_slots.acquire(blocking=False):
+            raise JobQueueFullError('Too many plot jobs are waiting to run')
+        _write_state(state)
+
+    _job_executor().submit(_run_job, state, plot_request, cache_key)
+    app.logger.info(f'Submitted plot job {job_id} for {plot_request}')
+    return state
+
+
+def read_job(job_id: str) -> JobState | None:
+    """Read the job's state, or `None` if there's no such job.
+
+    A job whose web worker exited before it finished is reported as failed.
+    """
+    try:
+        state = JobState(**json.loads(_state_path(job_id).read_text()))
+    except FileNotFoundError:
+        return None
+
+    if state.status in ('queued', 'running') and not _process_exists(state.pid):
+        return replace(state, status='failed', error='The job was abandoned')
+    return state
+
+
+@dataclass(frozen=True)
+class _JobProgress:
+    """Count the job's input files as they're read, and record the count in its state.
+
+    Picklable, so it can count in a job process.
+    """
+
+    job_id: str
+    fps: frozenset[Path]
+    read_fps: set[Path] = field(default_factory=set)
+
+    def __call__(self, fp: Path) -> None:
+        if fp not in self.fps or fp in self.read_fps:
+            return
+
+        self.read_fps.add(fp)
+        _update_state(self.job_id, files_read=len(self.read_fps))
+
+
+def _run_job(
+    state: JobState,
+    plot_request: PlotRequest,
+    cache_key: PlotCacheKey,
+) -> None:
+    try:
+        _update_state(state.id, status='running')
+        render_plot_pngs(
+            plot_request,
+            dpis=JOB_DPIS,
+            cache_key=cache_key,
+            pool=_job_pool(),
+            on_file_read=_JobProgress(state.id, frozenset(plot_request.input_fps())),
+        )
+    except Exception as e:
+        app.logger.warning(f'Plot job {state.id} for {state.plot} failed: {e!r}')
+        _update_state(state.id, status='failed', error=str(e) or repr(e))
+    else:
+        _update_state(state.id, status='done', files_read=state.files_total)
+    finally:
+        _job_slots.release()
+
+
+@functools.cache
+def _job_executor() -> ThreadPoolExecutor:
+    """Start this web worker's job threads, each waiting for a job process, on first use.
+
+    Started lazily, so each (forked) web worker has its own.
+    """
+    return ThreadPoolExecutor(
+        max_workers=max(JOB_PROCESSES, 1),
+        thread_name_prefix='plot-job',
+    )
+
+
+@functools.cache
+def _job_pool() -> RenderPool | None:
+    if JOB_PROCESSES <= 0:
+        return None
+
+    app.logger.info(f'Starting {JOB_PROCESSES} job processes')
+    return RenderPool(
+        JOB_PROCESSES,
+        # Jobs wait for a thread of the executor rather than in the pool
+        max_queued=0,
+        timeout_seconds=JOB_TIMEOUT_SECONDS,
+        max_jobs=RENDER_WORKER_MAX_JOBS,
+        max_rss_bytes=RENDER_WORKER_MAX_RSS_BYTES,
+        initializer=prepare_render_process,
+    )
+
+
+def _update_state(job_id: str, **changes: Any) -> None:
+    with file_lock(_lock_path(job_id)):
+        state = JobState(**json.loads(_state_path(job_id).read_text()))
+        _write_state(replace(state, **changes, updated_ns=time.time_ns()))
+
+
+def _write_state(state: JobState) -> None:
+    with atomic_write(_state_path(state.id), 'w') as f:
+        json.dump(asdict(state), f)
+
+
+def _prune_job_states() -> None:
+    """Delete the state and lock files of jobs untouched for too long."""
+    oldest_mtime = time.time() - JOB_STATE_MAX_AGE_SECONDS
+    for path in JOB_STATE_DIR.glob('*'):
+        try:
+            if path.stat().st_mtime < oldest_mtime:
+                path.unlink()
+        except FileNotFoundError:
+            # Deleted by another process
+            pass
+
+
+def _process_exists(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # It exists, but belongs to another user
+        return True
+    return True
+
+
+def _state_path(job_id: str) -> Path:
+    return JOB_STATE_DIR / f'{job_id}.json'
+
+
+def _lock_path(job_id: str) -> Path:
+    return JOB_STATE_DIR / f'{job_id}.lock'
@@ -0,0 +1,112 @@
+"""Map geometry in the plot projection, calculated once per process and reused.
+
+Every plot shares the same map: its extent and gridlines are defined in lon/lat, and
+cartopy projects them into `CRS` again on each draw. None of this changes between
+plots, so it's calculated here once and plots are drawn from the results in the map's
+projected coordinates (as is data, see `util/grid_geometry.py`).
+"""
+import functools
+from dataclasses import dataclass
+from typing import Any
+
+import cartopy.crs as ccrs
+import matplotlib.path as mpath
+import numpy as np
+from matplotlib.axes import Axes
+from matplotlib.collections import Collection, PathCollection
+from matplotlib.figure import Figure
+
+from sipn_reanalysis_plots.constants.crs import CRS
+from sipn_reanalysis_plots.constants.plot import LATITUDE_LIMIT
+
+
+@dataclass(frozen=True)
+class MapGeometry:
+    xlim: tuple[float, float]
+    ylim: tuple[float, float]
+    gridline_paths: tuple[mpath.Path, ...]
+    # Properties of the gridlines drawn by cartopy
+    gridline_style: dict[str, Any]
+
+
+@functools.cache
+def map_geometry() -> MapGeometry:
+    """Project the map's extent and gridlines into `CRS`.
+
+    A map is drawn once (without rendering) with cartopy's own extent and gridline
+    logic, and the projected results are kept.
+    """
+    fig = Figure(figsize=(6, 6))
+    ax = fig.add_subplot(projection=CRS)
+    ax.set_extent([-180, 180, 90, LATITUDE_LIMIT], crs=ccrs.PlateCarree())
+    gridliner = ax.gridlines(color='white', alpha=0.5)
+    add_circle_boundary(ax)
+    fig.draw_without_rendering()
+
+    gridline_artists = [*gridliner.xline_artists, *gridliner.yline_artists]
+    gridline_paths = tuple(
+        (artist.get_transform() - ax.transData).transform_path(path)
+        for artist in gridline_artists
+        for path in artist.get_paths()
+    )
+
+    return MapGeometry(
+        xlim=ax.get_xlim(),
+        ylim=ax.get_ylim(),
+        gridline_paths=gridline_paths,
+        gridline_style=_gridline_style(gridliner.xline_artists[0]),
+    )
+
+
+def _gridline_style(artist: Collection) -> dict[str, Any]:
+    return {
+        'edgecolor': artist.get_edgecolor(),
+        'linewidth': artist.get_linewidth(),
+        'linestyle': artist.get_linestyle(),
+        'alpha': artist.get_alpha(),
+        'zorder': artist.get_zorder(),
+    }
+
+
+def add_map_decorations(ax: Axes) -> None:
+    """Draw the coastlines, gridlines and boundary over the data, and set the extent."""
+    # TODO: The coastlines are filled with a semitransparent white color. How to make
+    # fully transparent?
+    ax.coastlines(
+        resolution='110m',
+        color='gray',
+        linewidth=1,
+    )
+    # Gridlines and extent are projected once, instead of by cartopy on each draw
+    add_gridlines(ax)
+    geometry = map_geometry()
+    ax.set_xlim(*geometry.xlim)
+    ax.set_ylim(*geometry.ylim)
+    add_circle_boundary(ax)
+
+
+def add_gridlines(ax: Axes) -> None:
+    """Draw the map's gridlines on `ax` from their projected paths."""
+    geometry = map_geometry()
+    collection = PathCollection(
+        geometry.gridline_paths,
+        facecolor='none',
+        transform=ax.transData,
+        **geometry.gridline_style,
+    )
+    ax.add_collection(collection, autolim=False)
+
+
+def add_circle_boundary(ax: Axes) -> None:
+    """Mutate ax to add a circular boundary.
+
+    Based on:
+        https://scitools.org.uk/cartopy/docs/latest/gallery/lines_and_polygons/always_circular_stereo.html#sphx-glr-gallery-lines-and-polygons-always-circular-stereo-py
+    """
+    theta = np.linspace(0, 2 * np.pi, 100)
+    center = [0.5, 0.5]
+    radius = 0.5
+    verts = np.vstack([np.sin(theta), np.cos(theta)]).T
+    circle = mpath.Path(verts * radius + center)
+
+    ax.set_boundary(circle, transform=ax.transAxes)
@@ -0,0 +1,107 @@
+"""Prometheus metrics of requests, data reads and rendering, shared by all processes.
+
+Each process (gunicorn workers and their render processes) writes its metrics to its
+own files under `METRICS_DIR`, and a scrape of `/metrics` from any worker aggregates
+them. Counters and histograms only, as gauges can't be summed meaningfully across
+processes. Metrics of a previous run of the server are cleared when it starts (see
+`gunicorn.conf.py`).
+"""
+import os
+
+from sipn_reanalysis_plots.constants.paths import METRICS_DIR
+
+# NOTE: `prometheus_client` stores values in files, instead of memory, only if this is
+# set when it's imported. Set here for render processes too, which inherit it.
+os.environ['PROMETHEUS_MULTIPROC_DIR'] = str(METRICS_DIR)
+METRICS_DIR.mkdir(parents=True, exist_ok=True)
+
+# isort: split
+from flask import request  # noqa: E402
+from prometheus_client import (  # noqa: E402
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client.multiprocess import MultiProcessCollector  # noqa: E402
+
+_NAMESPACE = 'sipn_reanalysis_plots'
+
+# Plots may take tens of seconds to render from uncached data
+_SECONDS_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+request_seconds = Histogram(
+    'request_duration_seconds',
+    'Time to respond to a request, by endpoint and the kind of plot requested',
+    ['endpoint', 'period', 'range', 'anomaly', 'contour'],
+    namespace=_NAMESPACE,
+    buckets=_SECONDS_BUCKETS,
+)
+files_opened = Counter(
+    'data_files_opened',
+    'Data files opened',
+    namespace=_NAMESPACE,
+)
+bytes_read = Counter(
+    'data_bytes_read',
+    'Bytes of data (uncompressed) selected from opened files',
+    namespace=_NAMESPACE,
+)
+file_pool_lookups = Counter(
+    'netcdf_file_pool_lookups',
+    'Lookups of files in the NetCDF file pool, by result (hits or misses)',
+    ['result'],
+    namespace=_NAMESPACE,
+)
+plot_cache_lookups = Counter(
+    'plot_cache_lookups',
+    'Lookups of images in the plot cache, by result (hits or misses)',
+    ['result'],
+    namespace=_NAMESPACE,
+)
+listing_seconds = Histogram(
+    'availability_listing_duration_seconds',
+    'Time to list available data, by source (manifest or directory)',
+    ['source'],
+    namespace=_NAMESPACE,
+    buckets=_SECONDS_BUCKETS,
+)
+render_stage_seconds = Histogram(
+    'render_stage_duration_seconds',
+    'Time spent in each stage of rendering plots, e.g. "data", "draw" or "encode"',
+    ['stage'],
+    namespace=_NAMESPACE,
+    buckets=_SECONDS_BUCKETS,
+)
+
+
+def observe_request(seconds: float) -> None:
+    """Record the time taken to respond to the current request."""
+    args = request.args
+    endpoint = request.endpoint or ''
+    period = next(
+        (period for period in ('daily', 'monthly') if endpoint.startswith(period)),
+        '',
+    )
+    is_range = bool(args.get('end_date') or args.get('end_month'))
+
+    request_seconds.labels(
+        endpoint=endpoint,
+        period=period,
+        range=('range' if is_range else 'single') if period else '',
+        anomaly=_flag(args.get('anomaly')) if period else '',
+        contour=_flag(args.get('contour')) if period else '',
+    ).observe(seconds)
+
+
+def metrics_response_body() -> tuple[bytes, str]:
+    """Collect the metrics of every process, and their content type."""
+    registry = CollectorRegistry()
+    MultiProcessCollector(registry, path=str(METRICS_DIR))
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def _flag(value: str | None) -> str:
+    # NOTE: As `wtforms.BooleanField` parses them
+    return 'false' if value in (None, '', 'false') else 'true'
@@ -5,29 +5,46 @@ leaks:
     https://matplotlib.org/stable/gallery/user_interfaces/web_application_server_sgskip.html
 """
 import datetime as dt
-import functools
+from dataclasses import dataclass
+from typing import Any
 
-import cartopy.crs as ccrs
-import matplotlib.path as mpath
 import numpy as np
 import xarray as xra
+from matplotlib import colormaps
 from matplotlib.axes import Axes
+from matplotlib.cm import ScalarMappable
+from matplotlib.colors import from_levels_and_colors
 from matplotlib.figure import Figure
+from matplotlib.ticker import LinearLocator, MaxNLocator
 
 from sipn_reanalysis_plots._types import YearMonth
 from sipn_reanalysis_plots.constants.crs import CRS
-from sipn_reanalysis_plots.constants.plot import LATITUDE_LIMIT
 from sipn_reanalysis_plots.util.climatology import (
     diff_from_daily_climatology,
     diff_from_monthly_climatology,
 )
-from sipn_reanalysis_plots.util.data.read import (
-    read_cfsr_daily_file,
-    read_cfsr_daily_files,
-    read_cfsr_monthly_file,
-    read_cfsr_monthly_files,
+from sipn_reanalysis_plots.util.data.cumulative_store import cumulative_mean
+from sipn_reanalysis_plots.util.data.reduce import (
+    reduce_cfsr_daily,
+    reduce_cfsr_monthly,
 )
-from sipn_reanalysis_plots.util.data.reduce import reduce_dataset
+from sipn_reanalysis_plots.util.grid_geometry import projected_grid
+from sipn_reanalysis_plots.util.map_geometry import add_map_decorations
+from sipn_reanalysis_plots.util.timing import stage
+
+# Colormaps of values which span 0 (centered on it), and of those which don't
+_CMAP_DIVERGENT = 'RdBu_r'
+_CMAP_SEQUENTIAL = 'viridis'
+# Bands of filled contour plots (at most)
+_CONTOUR_LEVELS = 20
+
+
+@dataclass(frozen=True)
+class PlotData:
+    """The data and title of a plot, ready to be drawn by any rendering engine."""
+
+    data_array: xra.DataArray
+    title: str
 
 
 # TODO: Accept a form object?
@@ -42,30 +59,66 @@ def plot_cfsr_daily(
     as_filled_contour: bool = False,
     anomaly: bool = False,
 ) -> Figure:
-    if not end_date:
-        opener = functools.partial(read_cfsr_daily_file, date)
-    else:
-        opener = functools.partial(
-            read_cfsr_daily_files,
-            start_date=date,
-            end_date=end_date,
-        )
+    plot_data = cfsr_daily_plot_data(
+        date,
+        end_date=end_date,
+        variable=variable,
+        level=level,
+        anomaly=anomaly,
+    )
+    return plot_figure(plot_data, as_filled_contour=as_filled_contour)
 
-    with opener() as dataset:
-        data_array = reduce_dataset(
-            dataset,
-            variable=variable,
-            level=level,
-        )
+
+def plot_cfsr_monthly(
+    month: YearMonth,
+    *,
+    end_month: YearMonth | None = None,
+    # TODO: Better types
+    variable: str,
+    level: str,
+    as_filled_contour: bool = False,
+    anomaly: bool = False,
+) -> Figure:
+    plot_data = cfsr_monthly_plot_data(
+        month,
+        end_month=end_month,
+        variable=variable,
+        level=level,
+        anomaly=anomaly,
+    )
+    return plot_figure(plot_data, as_filled_contour=as_filled_contour)
+
+
+def cfsr_daily_plot_data(
+    date: dt.date,
+    *,
+    end_date: dt.date | None = None,
+    variable: str,
+    level: str,
+    anomaly: bool = False,
+) -> PlotData:
+    with stage('reduce'):
+        data_array = None
+        if end_date:
+            # Ranges are cheapest from the cumulative store, if it covers them
+            data_array = cumulative_mean(date, end_date, variable=variable, level=level)
+        if data_array is None:
+            data_array = reduce_cfsr_daily(
+                date,
+                end_date,
+                variable=variable,
+                level=level,
+            )
 
     if anomaly:
-        data_array = diff_from_daily_climatology(
-            data_array,
-            variable=variable,
-            level=level,
-            start_date=date,
-            end_date=end_date,
-        )
+        with stage('climatology'):
+            data_array = diff_from_daily_climatology(
+                data_array,
+                variable=variable,
+                level=level,
+                start_date=date,
+                end_date=end_date,
+            )
 
     plot_title = _plot_title(
         var_longname=data_array.attrs['long_name'],
@@ -75,49 +128,34 @@ def plot_cfsr_daily(
         anomaly=anomaly,
     )
 
-    fig = _plot_data_array(
-        data_array,
-        title=plot_title,
-        as_filled_contour=as_filled_contour,
-    )
+    return PlotData(data_array=data_array, title=plot_title)
 
-    return fig
 
-
-def plot_cfsr_monthly(
+def cfsr_monthly_plot_data(
     month: YearMonth,
     *,
     end_month: YearMonth | None = None,
-    # TODO: Better types
     variable: str,
     level: str,
-    as_filled_contour: bool = False,
     anomaly: bool = False,
-) -> Figure:
-    if not end_month:
-        opener = functools.partial(read_cfsr_monthly_file, month)
-    else:
-        opener = functools.partial(
-            read_cfsr_monthly_files,
-            start_month=month,
-            end_month=end_month,
-        )
-
-    with opener() as dataset:
-        data_array = reduce_dataset(
-            dataset,
+) -> PlotData:
+    with stage('reduce'):
+        data_array = reduce_cfsr_monthly(
+            month,
+            end_month,
             variable=variable,
             level=level,
         )
 
     if anomaly:
-        data_array = diff_from_monthly_climatology(
-            data_array,
-            variable=variable,
-            level=level,
-            start_month=month,
-            end_month=end_month,
-        )
+        with stage('climatology'):
+            data_array = diff_from_monthly_climatology(
+                data_array,
+                variable=variable,
+                level=level,
+                start_month=month,
+                end_month=end_month,
+            )
 
     plot_title = _plot_title(
         var_longname=data_array.attrs['long_name'],
@@ -126,13 +164,66 @@ def plot_cfsr_monthly(
         date_str=_monthly_date_str(month, end_month),
         anomaly=anomaly,
     )
-    fig = _plot_data_array(
-        data_array,
-        title=plot_title,
+
+    return PlotData(data_array=data_array, title=plot_title)
+
+
+def plot_figure(plot_data: PlotData, *, as_filled_contour: bool = False) -> Figure:
+    return _plot_data_array(
+        plot_data.data_array,
+        title=plot_data.title,
         as_filled_contour=as_filled_contour,
     )
 
-    return fig
+
+def plot_cmap_params(
+    values: np.ndarray,
+    *,
+    as_filled_contour: bool = False,
+) -> dict[str, Any]:
+    """Pick the colormap and its limits for `values`, as `xarray`'s plot methods do.
+
+    The colormap spans the values, and is diverging (and centered on 0) if they span 0.
+    Filled contours have levels at round values, and a colormap of one color per band,
+    including those beyond the levels. Returns the keyword args of `pcolormesh` or
+    `contourf` (`vmin` and `vmax` are `None` when there's a `norm`).
+    """
+    finite = values[np.isfinite(values)]
+    vmin, vmax = (finite.min(), finite.max()) if finite.size else (0.0, 0.0)
+    divergent = vmin < 0 < vmax
+    if divergent:
+        vmax = max(-vmin, vmax)
+        vmin = -vmax
+    cmap_name = _CMAP_DIVERGENT if divergent else _CMAP_SEQUENTIAL
+
+    if not as_filled_contour:
+        if vmin == vmax:
+            vmin, vmax = LinearLocator(2).tick_values(vmin, vmax)
+        return {
+            'cmap': cmap_name,
+            'vmin': vmin,
+            'vmax': vmax,
+            'norm': None,
+            'levels': None,
+            'extend': 'neither',
+        }
+
+    # NOTE: `MaxNLocator`'s N is the number of bands, not levels
+    levels = MaxNLocator(_CONTOUR_LEVELS - 1).tick_values(vmin, vmax)
+    colors = [
+        tuple(color)
+        for color in colormaps[cmap_name](np.linspace(0, 1, len(levels) + 1))
+    ]
+    cmap, norm = from_levels_and_colors(levels, colors, extend='both')
+    cmap.name = cmap_name
+    return {
+        'cmap': cmap,
+        'vmin': None,
+        'vmax': None,
+        'norm': norm,
+        'levels': levels,
+        'extend': 'both',
+    }
 
 
 def _plot_data_array(
@@ -146,53 +237,45 @@ def _plot_data_array(
     fig.set_tight_layout(True)
     ax = fig.subplots(subplot_kw={'projection': CRS})
 
-    plot_opts = {
-        'ax': ax,
-        'add_colorbar': False,
-    }
+    grid = projected_grid(data_array)
+    values = data_array.to_masked_array(copy=False)
+    cmap_params = plot_cmap_params(values.data, as_filled_contour=as_filled_contour)
+
+    # NOTE: The data is already in the map projection, so `Axes` methods are called
+    # directly, skipping the cartopy overrides which transform every grid point to
+    # check for wrapping.
+    plot: ScalarMappable
     if as_filled_contour:
-        plot = data_array.plot.contourf(
-            levels=20,
-            extend='both',
-            **plot_opts,
+        plot = Axes.contourf(
+            ax,
+            grid.x,
+            grid.y,
+            values,
+            levels=cmap_params['levels'],
+            extend=cmap_params['extend'],
+            cmap=cmap_params['cmap'],
+            norm=cmap_params['norm'],
         )
     else:
-        plot = data_array.plot(**plot_opts)
-
-    plot.axes.set_title(title)
+        plot = Axes.pcolormesh(
+            ax,
+            grid.x_corners,
+            grid.y_corners,
+            values,
+            cmap=cmap_params['cmap'],
+            vmin=cmap_params['vmin'],
+            vmax=cmap_params['vmax'],
+            norm=cmap_params['norm'],
+        )
 
-    # Add decorations over top of imagery
-    # TODO: The coastlines are filled with a semitransparent white color. How to make
-    # fully transparent?
-    ax.coastlines(
-        resolution='110m',
-        color='gray',
-        linewidth=1,
-    )
-    ax.gridlines(color='white', alpha=0.5)
-    ax.set_extent([-180, 180, 90, LATITUDE_LIMIT], crs=ccrs.PlateCarree())
-    _add_circle_boundary(ax)
+    ax.set_title(title)
+    add_map_decorations(ax)
 
     fig.colorbar(plot, extend='both')
 
     return fig
 
 
-def _add_circle_boundary(ax: Axes) -> None:
-    """Mutate ax to add a circular boundary.
-
-    Based on:
-        https://scitools.org.uk/cartopy/docs/latest/gallery/lines_and_polygons/always_circular_stereo.html#sphx-glr-gallery-lines-and-polygons-always-circular-stereo-py
-    """
-    theta = np.linspace(0, 2 * np.pi, 100)
-    center = [0.5, 0.5]
-    radius = 0.5
-    verts = np.vstack([np.sin(theta), np.cos(theta)]).T
-    circle = mpath.Path(verts * radius + center)
-
-    ax.set_boundary(circle, transform=ax.transAxes)
-
-
 def _monthly_date_str(
     month: YearMonth,
     end_month: YearMonth | None = None,
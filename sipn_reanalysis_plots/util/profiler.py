@@ -0,0 +1,246 @@
+"""Profile a sample of requests, or those with a token, cheaply enough for production.
+
+Unlike `$ENABLE_PROFILER`, which traces every call of every request, a profiled
+request's thread (and dask's compute threads) are sampled every few milliseconds from
+a background thread. Requests with the token also have their memory allocations traced
+with `tracemalloc`, which slows them several times over, so sampled requests don't.
+Each profile is saved as JSON under `PROFILE_DIR` and listed at `/debug/profiles`,
+with:
+
+* the sampled stacks, in the "folded" format read by flame graph tools (e.g.
+  speedscope);
+* if memory was traced, the peak memory traced during the request, and the allocation
+  sites of memory allocated during the request and still held at its end.
+
+Only one request at a time is profiled by each process, as memory tracing is global.
+
+NOTE: Plots rendered in the render pool's processes aren't sampled; the request waits
+for them in `RenderPool.run`. Their stages are timed in the `Server-Timing` header.
+"""
+import collections
+import datetime as dt
+import hmac
+import json
+import os
+import random
+import sys
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+from types import FrameType
+from typing import Any
+
+from flask import Response, g, request
+
+from sipn_reanalysis_plots import app
+from sipn_reanalysis_plots.constants.paths import PROFILE_DIR
+from sipn_reanalysis_plots.constants.profile import (
+    PROFILE_MAX_FILES,
+    PROFILE_SAMPLE_INTERVAL_SECONDS,
+    PROFILE_SAMPLE_RATE,
+    PROFILE_TOKEN,
+    PROFILE_TOP_ALLOCATIONS,
+)
+from sipn_reanalysis_plots.util.dask_scheduler import DASK_THREAD_NAME_PREFIX
+from sipn_reanalysis_plots.util.file import atomic_write
+
+# Endpoints never profiled, e.g. those listing profiles
+_UNPROFILED_ENDPOINTS = {'static', 'metrics', 'profiles', 'profile'}
+
+# Held by the request being profiled
+_profiling_lock = threading.Lock()
+
+
+class StackSampler:
+    """Count the stacks of a thread, and of dask's busy compute threads, over time."""
+
+    def __init__(self, thread_id: int, *, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: collections.Counter[str] = collections.Counter()
+        self.samples = 0
+
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run,
+            name='profile-sampler',
+            daemon=True,
+        )
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._thread.join()
+
+    def sample(self) -> None:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == self.thread_id:
+                self.stacks[_folded_stack('request', frame)] += 1
+            elif names.get(thread_id, '').startswith(
+                DASK_THREAD_NAME_PREFIX
+            ) and not _is_idle_worker(frame):
+                self.stacks[_folded_stack('dask', frame)] += 1
+        self.samples += 1
+
+    def folded(self) -> str:
+        """Format the stacks as lines of frames, root first, and their counts."""
+        return ''.join(
+            f'{stack} {count}\n' for stack, count in self.stacks.most_common()
+        )
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            self.sample()
+
+
+def configure_profiler() -> None:
+    """Profile requests, if a sample rate or token is configured."""
+    if PROFILE_SAMPLE_RATE > 0 or PROFILE_TOKEN:
+        app.before_request(_start_profile)
+        app.after_request(_record_status)
+        app.teardown_request(_finish_profile)
+
+
+def request_has_profile_token() -> bool:
+    """Check the request's `X-Profile-Token` header.
+
+    NOTE: The token is only accepted in a header, never the URL, as URLs are logged
+    (see `util/request_timing.py`) and saved in profiles.
+    """
+    if not PROFILE_TOKEN:
+        return False
+
+    token = request.headers.get('X-Profile-Token', '')
+    return hmac.compare_digest(token.encode(), PROFILE_TOKEN.encode())
+
+
+def list_profiles() -> list[Path]:
+    """List saved profiles, newest first."""
+    return sorted(PROFILE_DIR.glob('*.json'), reverse=True)
+
+
+def _start_profile() -> None:
+    if request.endpoint in _UNPROFILED_ENDPOINTS:
+        return
+    has_token = request_has_profile_token()
+    if not (has_token or random.random() < PROFILE_SAMPLE_RATE):
+        return
+    if not _profiling_lock.acquire(blocking=False):
+        return
+
+    g.profile_start = time.perf_counter()
+    g.profile_snapshot = None
+    if has_token:
+        g.profile_tracing = not tracemalloc.is_tracing()
+        if g.profile_tracing:
+            tracemalloc.start()
+        g.profile_snapshot = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+
+    g.profile_sampler = StackSampler(
+        threading.get_ident(),
+        interval=PROFILE_SAMPLE_INTERVAL_SECONDS,
+    )
+    g.profile_sampler.start()
+
+
+def _record_status(response: Response) -> Response:
+    g.profile_status = response.status_code
+    return response
+
+
+def _finish_profile(exc: BaseException | None) -> None:
+    sampler: StackSampler | None = g.pop('profile_sampler', None)
+    if sampler is None:
+        return
+
+    try:
+        sampler.stop()
+        seconds = time.perf_counter() - g.profile_start
+        memory = _stop_memory_trace(g.profile_snapshot)
+
+        _save_profile(
+            {
+                'created': dt.datetime.now().isoformat(timespec='milliseconds'),
+                'pid': os.getpid(),
+                'method': request.method,
+                'request_url': request.full_path,
+                'endpoint': request.endpoint,
+                'status': g.get('profile_status', 500),
+                'seconds': round(seconds, 4),
+                'samples': sampler.samples,
+                'sample_interval_seconds': sampler.interval,
+                **memory,
+                'folded_stacks': sampler.folded(),
+            }
+        )
+    finally:
+        _profiling_lock.release()
+
+
+def _stop_memory_trace(snapshot: tracemalloc.Snapshot | None) -> dict[str, Any]:
+    """Summarize the memory traced since `snapshot`, if memory was traced."""
+    if snapshot is None:
+        return {'peak_memory_bytes': None, 'retained_allocations': None}
+
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    allocations = _allocations_since(snapshot)
+    if g.profile_tracing:
+        tracemalloc.stop()
+
+    return {'peak_memory_bytes': peak_bytes, 'retained_allocations': allocations}
+
+
+def _allocations_since(
+    snapshot: tracemalloc.Snapshot,
+) -> list[dict[str, Any]]:
+    """List the sites which allocated the most memory still held since `snapshot`."""
+    ignored = [
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap*>'),
+    ]
+    current = tracemalloc.take_snapshot().filter_traces(ignored)
+    stats = current.compare_to(snapshot.filter_traces(ignored), 'lineno')
+
+    return [
+        {
+            'site': str(stat.traceback[0]),
+            'bytes': stat.size_diff,
+            'count': stat.count_diff,
+        }
+        for stat in stats[:PROFILE_TOP_ALLOCATIONS]
+        if stat.size_diff > 0
+    ]
+
+
+def _save_profile(profile: dict[str, Any]) -> None:
+    """Save the profile, deleting the oldest beyond `PROFILE_MAX_FILES`."""
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    path = PROFILE_DIR / f'{dt.datetime.now():%Y%m%dT%H%M%S.%f}-{os.getpid()}.json'
+    with atomic_write(path, 'w') as f:
+        json.dump(profile, f)
+    app.logger.info(f'Saved profile of {profile["request_url"]}: {path.name}')
+
+    for old_path in list_profiles()[PROFILE_MAX_FILES:]:
+        old_path.unlink(missing_ok=True)
+
+
+def _folded_stack(root: str, frame: FrameType | None) -> str:
+    frames = []
+    while frame is not None:
+        code = frame.f_code
+        module = '/'.join(Path(code.co_filename).parts[-2:])
+        frames.append(f'{code.co_name} ({module})')
+        frame = frame.f_back
+
+    return ';'.join([root, *reversed(frames)])
+
+
+def _is_idle_worker(frame: FrameType) -> bool:
+    """Whether the thread pool worker is waiting for a task."""
+    code = frame.f_code
+    return code.co_name == '_worker' and code.co_filename.endswith('thread.py')
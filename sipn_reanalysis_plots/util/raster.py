@@ -0,0 +1,412 @@
+"""Render plots straight to image pixels, without drawing the data with matplotlib.
+
+An alternative to drawing a `Figure` for every plot, for plots which aren't filled
+contours. Everything which doesn't depend on the data is drawn once per resolution and
+colormap with matplotlib, as a "frame": the layout, coastlines, gridlines, boundary and
+colorbar. Each plot is then:
+
+* colored at the data's own resolution by the colormap's lookup table,
+* resampled to pixels through a map from each pixel to the grid cell it falls in,
+  calculated once per grid (the data is already in the map projection, so this is a
+  nearest-cell lookup, as `pcolormesh` draws it),
+* composited under the frame's lines, with its title and colorbar ticks drawn by
+  Pillow.
+
+The frame is laid out for a typical title and colorbar, so plots may be placed a few
+pixels differently than by matplotlib's tight layout.
+"""
+import functools
+from dataclasses import dataclass
+
+import numpy as np
+from cartopy.mpl.geoaxes import GeoAxes
+from matplotlib import colormaps, rcParams
+from matplotlib.backends.backend_agg import FigureCanvasAgg, RendererAgg
+from matplotlib.cm import ScalarMappable
+from matplotlib.colorbar import Colorbar
+from matplotlib.colors import Colormap, Normalize
+from matplotlib.figure import Figure
+from matplotlib.font_manager import FontProperties, findfont
+from matplotlib.ticker import MaxNLocator, ScalarFormatter
+from matplotlib.transforms import Transform
+from PIL import Image, ImageDraw, ImageFont
+
+from sipn_reanalysis_plots.constants.crs import CRS
+from sipn_reanalysis_plots.util.fig import image_to_png
+from sipn_reanalysis_plots.util.grid_geometry import (
+    GridSignature,
+    grid_from_signature,
+    grid_signature,
+)
+from sipn_reanalysis_plots.util.map_geometry import add_map_decorations
+from sipn_reanalysis_plots.util.plot import PlotData, plot_cmap_params
+from sipn_reanalysis_plots.util.timing import StageTimer
+
+_WHITE = 255
+# Lay frames out for two-line titles, like every plot's
+_LAYOUT_TITLE = 'lp\nlp'
+# ... and colorbar tick labels as wide as most plots'
+_LAYOUT_CLIM = (200, 300)
+
+
+@dataclass(frozen=True)
+class _Layout:
+    """Where a frame's parts are, in image pixels (row 0 at the top)."""
+
+    shape: tuple[int, int]
+    # Map (projected) coordinates of the centers of the pixel rows and columns which the
+    # map axes span
+    map_y: np.ndarray
+    map_x: np.ndarray
+    # Flat indices into the image of the pixels inside the map's circular boundary...
+    map_pixels: np.ndarray
+    # ... and the indices of their rows and columns in `map_y` and `map_x`
+    map_pixel_rows: np.ndarray
+    map_pixel_cols: np.ndarray
+    colorbar_top: float
+    colorbar_bottom: float
+    colorbar_right: float
+    title_x: float
+    title_baseline: float
+    title_line_spacing: float
+    title_font_path: str
+    title_font_px: int
+    tick_font_path: str
+    tick_font_px: int
+    tick_length: float
+    tick_width: int
+    tick_pad: float
+    # Distance from a tick to its label's baseline, to center the label on the tick
+    tick_label_drop: float
+    offset_text_pad: float
+    tick_nbins: int
+
+
+@dataclass(frozen=True)
+class _Overlay:
+    """A frame's pixels, with lines over the map kept apart to composite over data."""
+
+    # Packed RGBX pixels of the frame, as drawn over a white background without data
+    background: np.ndarray
+    # Indices into `_Layout.map_pixels` of the pixels which lines are drawn over...
+    line_pixels: np.ndarray
+    # ... and those lines' alpha (0-255) and alpha-premultiplied color
+    line_alpha: np.ndarray
+    line_premultiplied: np.ndarray
+
+
+def render_data_array_png(
+    plot_data: PlotData,
+    *,
+    dpi: int,
+    timer: StageTimer | None = None,
+) -> bytes:
+    """Render `plot_data` as a (non-contour) PNG image of the same size as `Figure`s."""
+    timer = timer or StageTimer()
+    with timer.stage('draw'):
+        image = _render_image(plot_data, dpi=dpi)
+
+    with timer.stage('encode'):
+        return image_to_png(image)
+
+
+def _render_image(plot_data: PlotData, *, dpi: int) -> Image.Image:
+    values = plot_data.data_array.to_masked_array(copy=False)
+    cmap_params = plot_cmap_params(values.data)
+    cmap = cmap_params['cmap']
+    if isinstance(cmap, str):
+        cmap = colormaps[cmap]
+    vmin, vmax = cmap_params['vmin'], cmap_params['vmax']
+
+    layout = _layout(dpi)
+    overlay = _overlay(dpi, cmap.name)
+    pixel_cells = _pixel_cells(grid_signature(plot_data.data_array), dpi)
+
+    # Color each grid cell once, then look colors up for each pixel. The last color is
+    # for pixels outside the grid. Pixels are packed in 32 bits, to be copied whole.
+    cell_rgba = cmap(Normalize(vmin, vmax)(values.ravel()), bytes=True)
+    cell_colors = _pack(np.vstack([_over_white(cell_rgba), [_WHITE] * 3]))
+    map_colors = cell_colors[pixel_cells]
+
+    line_rgb = _unpack(map_colors[overlay.line_pixels])
+    line_rgb = (
+        line_rgb * (255 - overlay.line_alpha) + overlay.line_premultiplied + 127
+    ) // 255
+    map_colors[overlay.line_pixels] = _pack(line_rgb)
+
+    image = overlay.background.copy()
+    image[layout.map_pixels] = map_colors
+
+    height, width = layout.shape
+    pil_image = Image.frombytes('RGB', (width, height), image, 'raw', 'RGBX')
+    _draw_text(pil_image, layout, title=plot_data.title, clim=(vmin, vmax))
+
+    return pil_image
+
+
+def _draw_text(
+    image: Image.Image,
+    layout: _Layout,
+    *,
+    title: str,
+    clim: tuple[float, float],
+) -> None:
+    """Draw the title and colorbar ticks, like matplotlib's defaults."""
+    draw = ImageDraw.Draw(image)
+
+    title_font = _font(layout.title_font_path, layout.title_font_px)
+    for i, line in enumerate(title.split('\n')):
+        draw.text(
+            (layout.title_x, layout.title_baseline + i * layout.title_line_spacing),
+            line,
+            font=title_font,
+            fill='black',
+            anchor='ms',
+        )
+
+    tick_font = _font(layout.tick_font_path, layout.tick_font_px)
+    ticks, labels, offset = _colorbar_ticks(clim, nbins=layout.tick_nbins)
+    vmin, vmax = clim
+    height = layout.colorbar_bottom - layout.colorbar_top
+    tick_x = layout.colorbar_right
+    label_x = tick_x + layout.tick_length + layout.tick_pad
+    for tick, label in zip(ticks, labels):
+        tick_y = round(layout.colorbar_bottom - (tick - vmin) / (vmax - vmin) * height)
+        draw.line(
+            [(tick_x, tick_y), (tick_x + layout.tick_length, tick_y)],
+            fill='black',
+            width=layout.tick_width,
+        )
+        draw.text(
+            (label_x, tick_y + layout.tick_label_drop),
+            label,
+            font=tick_font,
+            fill='black',
+            anchor='ls',
+        )
+
+    if offset:
+        draw.text(
+            (tick_x, layout.colorbar_top - layout.offset_text_pad),
+            offset,
+            font=tick_font,
+            fill='black',
+            anchor='ld',
+        )
+
+
+def _colorbar_ticks(
+    clim: tuple[float, float],
+    *,
+    nbins: int,
+) -> tuple[np.ndarray, list[str], str]:
+    """Pick and label ticks as a colorbar's default locator and formatter would."""
+    vmin, vmax = clim
+    locator = MaxNLocator(nbins=nbins, steps=[1, 2, 2.5, 5, 10])
+    ticks = np.asarray(locator.tick_values(vmin, vmax))
+    tolerance = (vmax - vmin) * 1e-10
+    ticks = ticks[(ticks >= vmin - tolerance) & (ticks <= vmax + tolerance)]
+
+    formatter = ScalarFormatter()
+    formatter.create_dummy_axis()
+    formatter.axis.set_view_interval(vmin, vmax)  # type: ignore
+    labels = formatter.format_ticks(list(ticks))
+
+    return ticks, labels, formatter.get_offset()
+
+
+def _pack(rgb: np.ndarray) -> np.ndarray:
+    """Pack RGB colors in 32-bit RGBX words."""
+    rgbx = np.full((len(rgb), 4), _WHITE, dtype=np.uint8)
+    rgbx[:, :3] = rgb
+    return rgbx.view(np.uint32).ravel()
+
+
+def _unpack(rgbx: np.ndarray) -> np.ndarray:
+    return rgbx.view(np.uint8).reshape(-1, 4)[:, :3]
+
+
+def _over_white(rgba: np.ndarray) -> np.ndarray:
+    """Composite `rgba` colors over a white background, dropping alpha."""
+    rgb = rgba[:, :3].astype(np.uint16)
+    alpha = rgba[:, 3:].astype(np.uint16)
+    return ((rgb * alpha + _WHITE * (255 - alpha) + 127) // 255).astype(np.uint8)
+
+
+@functools.lru_cache(maxsize=8)
+def _pixel_cells(signature: GridSignature, dpi: int) -> np.ndarray:
+    """Map each pixel inside the map's boundary to the flat index of its grid cell.
+
+    Pixels outside the grid map to the index past the last cell.
+    """
+    grid = grid_from_signature(signature)
+    layout = _layout(dpi)
+
+    rows = _cell_indices(grid.y_corners, layout.map_y)[layout.map_pixel_rows]
+    cols = _cell_indices(grid.x_corners, layout.map_x)[layout.map_pixel_cols]
+    num_cols = grid.x_corners.size - 1
+    num_cells = (grid.y_corners.size - 1) * num_cols
+
+    cells = rows * num_cols + cols
+    cells[(rows < 0) | (cols < 0)] = num_cells
+    return cells
+
+
+def _cell_indices(corners: np.ndarray, coords: np.ndarray) -> np.ndarray:
+    """Find the cell (between two `corners`) of each of `coords`, or -1 if none."""
+    descending = corners[0] > corners[-1]
+    if descending:
+        corners = corners[::-1]
+
+    num_cells = corners.size - 1
+    indices = np.searchsorted(corners, coords, side='right') - 1
+    outside = (indices < 0) | (indices >= num_cells)
+    if descending:
+        indices = num_cells - 1 - indices
+
+    indices[outside] = -1
+    return indices
+
+
+@functools.lru_cache(maxsize=4)
+def _overlay(dpi: int, cmap_name: str) -> _Overlay:
+    layout = _layout(dpi)
+    fig, ax, colorbar = _frame_figure(dpi, colormaps[cmap_name])
+    # Hide what's drawn for each plot, and everything's background
+    ax.title.set_visible(False)
+    colorbar.ax.tick_params(which='both', length=0, labelright=False)
+    colorbar.ax.yaxis.offsetText.set_visible(False)
+    fig.patch.set_alpha(0)
+    ax.patch.set_alpha(0)
+
+    canvas = FigureCanvasAgg(fig)
+    canvas.draw()
+    rgba = np.asarray(canvas.buffer_rgba()).reshape(-1, 4)
+    background = _pack(_over_white(rgba))
+
+    map_rgba = rgba[layout.map_pixels]
+    line_pixels = np.flatnonzero(map_rgba[:, 3])
+    line_rgba = map_rgba[line_pixels].astype(np.uint16)
+    line_alpha = line_rgba[:, 3:]
+
+    return _Overlay(
+        background=background,
+        line_pixels=line_pixels,
+        line_alpha=line_alpha,
+        line_premultiplied=line_rgba[:, :3] * line_alpha,
+    )
+
+
+@functools.lru_cache(maxsize=4)
+def _layout(dpi: int) -> _Layout:
+    fig, ax, colorbar = _frame_figure(dpi, colormaps['viridis'])
+    renderer = FigureCanvasAgg(fig).get_renderer()
+    height, width = int(fig.bbox.height), int(fig.bbox.width)
+
+    def image_row(display_y: float) -> float:
+        return height - display_y
+
+    # The map's pixels, and the map and axes coordinates of their centers
+    map_bbox = ax.get_window_extent(renderer)
+    map_cols = slice(max(int(map_bbox.x0), 0), min(int(np.ceil(map_bbox.x1)), width))
+    map_rows = slice(
+        max(int(image_row(map_bbox.y1)), 0),
+        min(int(np.ceil(image_row(map_bbox.y0))), height),
+    )
+    display_x = np.arange(map_cols.start, map_cols.stop) + 0.5
+    display_y = height - (np.arange(map_rows.start, map_rows.stop) + 0.5)
+    map_x, map_y = _separable_transform(ax.transData.inverted(), display_x, display_y)
+    axes_x, axes_y = _separable_transform(ax.transAxes.inverted(), display_x, display_y)
+    inside = (axes_y[:, np.newaxis] - 0.5) ** 2 + (axes_x[np.newaxis, :] - 0.5) ** 2
+    map_pixel_rows, map_pixel_cols = np.nonzero(inside <= 0.25)
+    map_pixels = (map_pixel_rows + map_rows.start) * width + (
+        map_pixel_cols + map_cols.start
+    )
+
+    title = ax.title
+    title_bbox = title.get_window_extent(renderer)
+    title_font = title.get_fontproperties()
+    lp_height, _, lp_descent = _text_metrics(renderer, title_font)
+
+    tick_font = colorbar.ax.yaxis.get_ticklabels()[0].get_fontproperties()
+    tick_lp_height, _, tick_lp_descent = _text_metrics(renderer, tick_font)
+    colorbar_bbox = colorbar.ax.get_window_extent(renderer)
+
+    def px(points: float) -> float:
+        return points * dpi / 72
+
+    return _Layout(
+        shape=(height, width),
+        map_y=map_y,
+        map_x=map_x,
+        map_pixels=map_pixels,
+        map_pixel_rows=map_pixel_rows,
+        map_pixel_cols=map_pixel_cols,
+        colorbar_top=image_row(colorbar_bbox.y1),
+        colorbar_bottom=image_row(colorbar_bbox.y0),
+        colorbar_right=colorbar_bbox.x1,
+        title_x=(title_bbox.x0 + title_bbox.x1) / 2,
+        title_baseline=image_row(title_bbox.y1) + lp_height - lp_descent,
+        title_line_spacing=title_bbox.height - lp_height,
+        title_font_path=findfont(title_font),
+        title_font_px=round(px(title_font.get_size_in_points())),
+        tick_font_path=findfont(tick_font),
+        tick_font_px=round(px(tick_font.get_size_in_points())),
+        tick_length=px(rcParams['ytick.major.size']),
+        tick_width=max(round(px(rcParams['ytick.major.width'])), 1),
+        tick_pad=px(rcParams['ytick.major.pad']),
+        tick_label_drop=(tick_lp_height - tick_lp_descent) / 2,
+        offset_text_pad=px(3),
+        tick_nbins=int(np.clip(colorbar.ax.yaxis.get_tick_space(), 1, 9)),
+    )
+
+
+def _frame_figure(dpi: int, cmap: Colormap) -> tuple[Figure, GeoAxes, Colorbar]:
+    """Lay out a plot without data, and fix its layout.
+
+    Mirrors the figure drawn by `plot._plot_data_array`.
+    """
+    fig = Figure(figsize=(6, 6), dpi=dpi)
+    fig.set_layout_engine('tight')
+    ax = fig.subplots(subplot_kw={'projection': CRS})
+    ax.set_title(_LAYOUT_TITLE)
+    add_map_decorations(ax)
+    colorbar = fig.colorbar(
+        ScalarMappable(norm=Normalize(*_LAYOUT_CLIM), cmap=cmap),
+        ax=ax,
+        extend='both',
+    )
+
+    fig.draw_without_rendering()
+    fig.set_layout_engine('none')
+
+    return fig, ax, colorbar
+
+
+def _separable_transform(
+    transform: Transform,
+    display_x: np.ndarray,
+    display_y: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Transform pixel columns and rows separately, for an axis-aligned `transform`."""
+    x = transform.transform(np.column_stack([display_x, np.zeros_like(display_x)]))
+    y = transform.transform(np.column_stack([np.zeros_like(display_y), display_y]))
+    return x[:, 0], y[:, 1]
+
+
+def _text_metrics(
+    renderer: RendererAgg,
+    font: FontProperties,
+) -> tuple[float, float, float]:
+    """Measure the height, width and descent matplotlib lays lines of text out with."""
+    width, height, descent = renderer.get_text_width_height_descent(
+        'lp',
+        font,
+        ismath=False,
+    )
+    return height, width, descent
+
+
+@functools.cache
+def _font(path: str, size: int) -> ImageFont.FreeTypeFont:
+    return ImageFont.truetype(path, size)
@@ -0,0 +1,60 @@
+"""Weight the cells of a data grid by their area within a region.
+
+The grid is in the map projection, so each cell center's latitude and longitude are
+calculated to find the cells in a region, and cells are weighted by their area on the
+globe. Weights only depend on the region and the grid, so they're calculated once per
+process and reused by every request.
+"""
+import functools
+
+import cartopy.crs as ccrs
+import cartopy.feature as cfeature
+import numpy as np
+import shapely
+
+from sipn_reanalysis_plots._types import Region
+from sipn_reanalysis_plots.constants.crs import CRS
+from sipn_reanalysis_plots.util.grid_geometry import GridSignature, grid_from_signature
+
+
+@functools.lru_cache(maxsize=32)
+def region_weights(region: Region, signature: GridSignature) -> np.ndarray:
+    """Weight each cell of the grid, on the `(y, x)` dims, by its area in the region.
+
+    The grid's cells are equally spaced in the (north polar stereographic) projection,
+    whose scale factor at latitude φ is k = 2 / (1 + sin φ), so a cell's area on the
+    globe is dx·dy / k². As dx·dy is the same for every cell, it's left out. Cells
+    outside the region weigh 0.
+    """
+    lon, lat = _cell_lonlats(signature)
+    in_region = (lat >= region.min_lat) & (lat <= region.max_lat)
+    if region.min_lon <= region.max_lon:
+        in_region &= (lon >= region.min_lon) & (lon <= region.max_lon)
+    else:
+        in_region &= (lon >= region.min_lon) | (lon <= region.max_lon)
+    if region.ocean_only:
+        in_region &= ~_land_mask(signature)
+
+    return np.where(in_region, ((1 + np.sin(np.deg2rad(lat))) / 2) ** 2, 0.0)
+
+
+@functools.lru_cache(maxsize=8)
+def _cell_lonlats(signature: GridSignature) -> tuple[np.ndarray, np.ndarray]:
+    grid = grid_from_signature(signature)
+    x, y = np.meshgrid(grid.x, grid.y)
+    lonlats = ccrs.PlateCarree().transform_points(CRS, x, y)
+    return lonlats[..., 0], lonlats[..., 1]
+
+
+@functools.lru_cache(maxsize=8)
+def _land_mask(signature: GridSignature) -> np.ndarray:
+    """Find the cells whose centers are on land, at the coastlines' resolution."""
+    lon, lat = _cell_lonlats(signature)
+    return shapely.contains_xy(_land(), lon, lat)
+
+
+@functools.cache
+def _land() -> shapely.Geometry:
+    land = shapely.union_all(list(cfeature.LAND.with_scale('110m').geometries()))
+    shapely.prepare(land)
+    return land
@@ -0,0 +1,313 @@
+"""Render plots to PNG images, with a cache shared by all worker processes on a host.
+
+Cache entries are keyed by the normalized plot request and the fingerprints (size and
+mtime) of every input file, including climatology, so re-ingesting a file invalidates
+exactly the plots calculated from it.
+
+The data and plotting libraries are only imported to render, so web workers which
+only serve cached plots, or render them in the render pool, start faster and stay
+smaller.
+"""
+import contextlib
+import datetime as dt
+import hashlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from sipn_reanalysis_plots import app
+from sipn_reanalysis_plots._types import YearMonth
+from sipn_reanalysis_plots.constants.cache import PLOT_CACHE_MAX_BYTES
+from sipn_reanalysis_plots.constants.paths import (
+    DATA_CLIMATOLOGY_DAILY_FILE,
+    DATA_CLIMATOLOGY_MONTHLY_FILE,
+    PLOT_CACHE_DIR,
+)
+from sipn_reanalysis_plots.constants.plot import PLOT_ENGINE
+from sipn_reanalysis_plots.constants.version import VERSION
+from sipn_reanalysis_plots.util.data.files import (
+    FileReadListener,
+    cfsr_daily_fps,
+    cfsr_monthly_fps,
+    listen_for_file_reads,
+)
+from sipn_reanalysis_plots.util.data.list import data_file_fingerprints
+from sipn_reanalysis_plots.util.disk_cache import DiskCache
+from sipn_reanalysis_plots.util.metrics import plot_cache_lookups, render_stage_seconds
+from sipn_reanalysis_plots.util.render_pool import RenderPool
+from sipn_reanalysis_plots.util.timing import (
+    StageTimer,
+    current_timer,
+    recording,
+    stage,
+)
+
+if TYPE_CHECKING:
+    from sipn_reanalysis_plots.util.plot import PlotData
+
+plot_cache = DiskCache(PLOT_CACHE_DIR, max_bytes=PLOT_CACHE_MAX_BYTES, suffix='.png')
+
+
+@dataclass(frozen=True, kw_only=True)
+class _PlotRequest:
+    variable: str
+    level: str
+    contour: bool = False
+    anomaly: bool = False
+
+    def _options_str(self) -> str:
+        return f'contour={self.contour:d}/anomaly={self.anomaly:d}'
+
+    def engine(self) -> str:
+        """Name the engine which renders the plot; only matplotlib draws contours."""
+        return 'matplotlib' if self.contour else PLOT_ENGINE
+
+
+@dataclass(frozen=True, kw_only=True)
+class DailyPlotRequest(_PlotRequest):
+    start_date: dt.date
+    end_date: dt.date | None = None
+
+    def __str__(self) -> str:
+        date_str = f'{self.start_date:%Y%m%d}'
+        if self.end_date:
+            date_str = f'{date_str}-{self.end_date:%Y%m%d}'
+
+        return f'daily/{self.variable}/{self.level}/{date_str}/{self._options_str()}'
+
+    def input_fps(self) -> list[Path]:
+        """List every file the plot is calculated from."""
+        fps = cfsr_daily_fps(self.start_date, self.end_date)
+        if self.anomaly:
+            fps.append(DATA_CLIMATOLOGY_DAILY_FILE)
+        return fps
+
+    def plot_data(self) -> 'PlotData':
+        from sipn_reanalysis_plots.util.plot import cfsr_daily_plot_data
+
+        return cfsr_daily_plot_data(
+            self.start_date,
+            end_date=self.end_date,
+            variable=self.variable,
+            level=self.level,
+            anomaly=self.anomaly,
+        )
+
+
+@dataclass(frozen=True, kw_only=True)
+class MonthlyPlotRequest(_PlotRequest):
+    start_month: YearMonth
+    end_month: YearMonth | None = None
+
+    def __str__(self) -> str:
+        month_str = f'{self.start_month}'
+        if self.end_month:
+            month_str = f'{month_str}-{self.end_month}'
+
+        return f'monthly/{self.variable}/{self.level}/{month_str}/{self._options_str()}'
+
+    def input_fps(self) -> list[Path]:
+        """List every file the plot is calculated from."""
+        fps = cfsr_monthly_fps(self.start_month, self.end_month)
+        if self.anomaly:
+            fps.append(DATA_CLIMATOLOGY_MONTHLY_FILE)
+        return fps
+
+    def plot_data(self) -> 'PlotData':
+        from sipn_reanalysis_plots.util.plot import cfsr_monthly_plot_data
+
+        return cfsr_monthly_plot_data(
+            self.start_month,
+            end_month=self.end_month,
+            variable=self.variable,
+            level=self.level,
+            anomaly=self.anomaly,
+        )
+
+
+PlotRequest = DailyPlotRequest | MonthlyPlotRequest
+
+
+@dataclass(frozen=True)
+class PlotCacheKey:
+    """Identify a plot by its request and the versions of its inputs and this code."""
+
+    key: str
+    # Modification time of the newest input file
+    last_modified: dt.datetime
+
+    def for_dpi(self, dpi: int) -> str:
+        return f'{self.key}\ndpi={dpi}'
+
+    def etag(self, dpi: int) -> str:
+        return hashlib.sha256(self.for_dpi(dpi).encode('utf-8')).hexdigest()
+
+
+def plot_cache_key(plot_request: PlotRequest) -> PlotCacheKey:
+    """Fingerprint the plot's inputs to identify it.
+
+    Raises `FileNotFoundError` if any input file doesn't exist. Input files are counted
+    as "input_files" in the current timer.
+    """
+    fps = plot_request.input_fps()
+    with stage('cache_key'):
+        fingerprints = data_file_fingerprints(fps)
+    if (timer := current_timer()) is not None:
+        timer.count('input_files', len(fps))
+
+    key = '\n'.join(
+        [
+            f'v{VERSION}',
+            str(plot_request),
+            f'engine={plot_request.engine()}',
+            *(f'{fp.name}:{fingerprint}' for fp, fingerprint in zip(fps, fingerprints)),
+        ]
+    )
+    last_modified_ns = max(fingerprint.mtime_ns for fingerprint in fingerprints)
+    last_modified = dt.datetime.fromtimestamp(
+        last_modified_ns / 1e9,
+        tz=dt.timezone.utc,
+    )
+
+    return PlotCacheKey(key=key, last_modified=last_modified)
+
+
+def render_plot_png(
+    plot_request: PlotRequest,
+    *,
+    dpi: int,
+    cache_key: PlotCacheKey | None = None,
+    pool: RenderPool | None = None,
+) -> bytes:
+    pngs = render_plot_pngs(plot_request, dpis=(dpi,), cache_key=cache_key, pool=pool)
+    return pngs[dpi]
+
+
+def render_plot_pngs(
+    plot_request: PlotRequest,
+    *,
+    dpis: tuple[int, ...],
+    cache_key: PlotCacheKey | None = None,
+    pool: RenderPool | None = None,
+    on_file_read: FileReadListener | None = None,
+) -> dict[int, bytes]:
+    """Render the plot as PNG images at each of `dpis`.
+
+    Images are read from the plot cache where possible. Otherwise, the plot's data is
+    calculated once and rendered at each missing resolution by the plot's engine (a
+    matplotlib figure is drawn once, at the highest resolution, and downsampled), then
+    stored in the cache. Plots are rendered in `pool`'s processes if it's given, where
+    `on_file_read` (which must then be picklable) is called with each file read.
+
+    The time spent rendering is added to the current timer.
+    """
+    if cache_key is None:
+        cache_key = plot_cache_key(plot_request)
+
+    pngs = _cached_pngs(cache_key, dpis)
+    missing_dpis = [dpi for dpi in dpis if dpi not in pngs]
+    if missing_dpis:
+        if pool is None:
+            rendered, timer = render_pngs_job(
+                plot_request,
+                missing_dpis,
+                on_file_read,
+            )
+        else:
+            rendered, timer = pool.run(
+                render_pngs_job,
+                plot_request,
+                missing_dpis,
+                on_file_read,
+            )
+        app.logger.info(f'Rendered {plot_request} at dpi={missing_dpis}: {timer}')
+        record_render(timer)
+
+        with stage('plot_cache'):
+            for dpi, png in rendered.items():
+                pngs[dpi] = png
+                plot_cache.put(cache_key.for_dpi(dpi), png)
+
+    return pngs
+
+
+def _cached_pngs(cache_key: PlotCacheKey, dpis: tuple[int, ...]) -> dict[int, bytes]:
+    pngs = {}
+    with stage('plot_cache'):
+        for dpi in dpis:
+            if (png := plot_cache.get(cache_key.for_dpi(dpi))) is not None:
+                pngs[dpi] = png
+
+    plot_cache_lookups.labels(result='hits').inc(len(pngs))
+    plot_cache_lookups.labels(result='misses').inc(len(dpis) - len(pngs))
+    return pngs
+
+
+def record_render(timer: StageTimer) -> None:
+    """Add a render's stages to the current timer and the render metrics."""
+    if (request_timer := current_timer()) is not None:
+        request_timer.merge(timer)
+    for name, seconds in timer.seconds.items():
+        render_stage_seconds.labels(stage=name).observe(seconds)
+
+
+def render_pngs_job(
+    plot_request: PlotRequest,
+    dpis: list[int],
+    on_file_read: FileReadListener | None = None,
+) -> tuple[dict[int, bytes], StageTimer]:
+    """Render the plot at each of `dpis`, without the plot cache.
+
+    Returns the images and the time spent in each stage of rendering them (including
+    computing dask collections), and counts of work done, e.g. dask tasks computed.
+    """
+    timer = StageTimer()
+    with contextlib.ExitStack() as stack:
+        stack.enter_context(recording(timer))
+        if on_file_read is not None:
+            stack.enter_context(listen_for_file_reads(on_file_read))
+
+        pngs = _render_pngs(plot_request, dpis=dpis, timer=timer)
+    return pngs, timer
+
+
+def _render_pngs(
+    plot_request: PlotRequest,
+    *,
+    dpis: list[int],
+    timer: StageTimer,
+) -> dict[int, bytes]:
+    with timer.stage('data'):
+        plot_data = plot_request.plot_data()
+
+    return render_plot_data_pngs(
+        plot_data,
+        engine=plot_request.engine(),
+        as_filled_contour=plot_request.contour,
+        dpis=dpis,
+        timer=timer,
+    )
+
+
+def render_plot_data_pngs(
+    plot_data: 'PlotData',
+    *,
+    engine: str,
+    as_filled_contour: bool = False,
+    dpis: list[int],
+    timer: StageTimer | None = None,
+) -> dict[int, bytes]:
+    """Render the plot's data with `engine` (see `PLOT_ENGINES`) at each of `dpis`."""
+    from sipn_reanalysis_plots.util.fig import fig_to_pngs
+    from sipn_reanalysis_plots.util.plot import plot_figure
+    from sipn_reanalysis_plots.util.raster import render_data_array_png
+
+    timer = timer or StageTimer()
+    if engine == 'raster':
+        return {
+            dpi: render_data_array_png(plot_data, dpi=dpi, timer=timer) for dpi in dpis
+        }
+
+    with timer.stage('plot'):
+        fig = plot_figure(plot_data, as_filled_contour=as_filled_contour)
+    return fig_to_pngs(fig, dpis=dpis, timer=timer)
@@ -0,0 +1,262 @@
+"""A pool of render processes owned by each web worker.
+
+Rendering in the web worker itself lets one slow plot (e.g. a long range of anomalies
+drawn as contours) hold the worker for as long as it takes, and lets memory kept by
+matplotlib build up in it. Instead, plots are rendered by separate processes, which:
+
+* import the plotting libraries before their first render,
+* are killed if a render takes longer than a timeout,
+* are replaced after a number of renders, or once their memory use exceeds a limit,
+* exit when the web worker does, even if it's killed (e.g. by gunicorn's timeout).
+
+Renders beyond the number of processes wait in a bounded queue, for at most the render
+timeout. When it's full, renders are refused, so the routes can ask clients to try
+again later.
+"""
+import atexit
+import functools
+import multiprocessing
+import os
+import queue
+import resource
+import threading
+import time
+from collections.abc import Callable
+from typing import Any, TypeVar
+
+from sipn_reanalysis_plots import app
+from sipn_reanalysis_plots.constants.render import (
+    RENDER_POOL_MAX_QUEUED,
+    RENDER_POOL_PROCESSES,
+    RENDER_TIMEOUT_SECONDS,
+    RENDER_WORKER_MAX_JOBS,
+    RENDER_WORKER_MAX_RSS_BYTES,
+    RENDER_WORKER_STARTUP_TIMEOUT_SECONDS,
+)
+from sipn_reanalysis_plots.errors import (
+    RenderPoolBusyError,
+    RenderTimeoutError,
+    RenderWorkerError,
+)
+
+T = TypeVar('T')
+
+# Seconds between render processes' checks that their web worker is still running
+_PARENT_CHECK_INTERVAL_SECONDS = 1
+
+# NOTE: "spawn" avoids forking a web worker which may hold HDF5 or dask state
+_mp_context = multiprocessing.get_context('spawn')
+
+
+class _Worker:
+    """A render process, and the web worker's end of a pipe to it."""
+
+    def __init__(self, initializer: Callable[[], None] | None):
+        self.conn, child_conn = _mp_context.Pipe()
+        self.process = _mp_context.Process(
+            target=_worker_main,
+            args=(child_conn, initializer, os.getpid()),
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+        self.jobs = 0
+        self._started = False
+
+    def run(
+        self,
+        func: Callable[..., Any],
+        args: tuple[Any, ...],
+        *,
+        timeout_seconds: float,
+    ) -> tuple[bool, Any, int]:
+        """Run `func(*args)` in the process.
+
+        Returns whether it succeeded, its result (or exception) and the process's peak
+        RSS in bytes.
+        """
+        if not self._started:
+            if not self.conn.poll(RENDER_WORKER_STARTUP_TIMEOUT_SECONDS):
+                raise RenderWorkerError('Render process failed to start in time')
+            self._receive()
+            self._started = True
+
+        self.jobs += 1
+        self.conn.send((func, args))
+        if not self.conn.poll(timeout_seconds):
+            raise RenderTimeoutError(f'Render took longer than {timeout_seconds}s')
+
+        return self._receive()
+
+    def _receive(self) -> Any:
+        try:
+            return self.conn.recv()
+        except (EOFError, OSError) as e:
+            raise RenderWorkerError(
+                f'Render process exited with code {self.process.exitcode}',
+            ) from e
+
+    def stop(self) -> None:
+        """Kill the process, which may be stuck in a render."""
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+class RenderPool:
+    def __init__(
+        self,
+        processes: int,
+        *,
+        max_queued: int,
+        timeout_seconds: float,
+        max_jobs: int,
+        max_rss_bytes: int,
+        initializer: Callable[[], None] | None = None,
+    ):
+        self._timeout_seconds = timeout_seconds
+        self._max_jobs = max_jobs
+        self._max_rss_bytes = max_rss_bytes
+        self._initializer = initializer
+
+        # Admits a render to run or to wait for a process; it's refused beyond that
+        self._admission = threading.BoundedSemaphore(processes + max_queued)
+        self._idle: queue.SimpleQueue[_Worker] = queue.SimpleQueue()
+        for _ in range(processes):
+            self._idle.put(_Worker(initializer))
+
+    def run(self, func: Callable[..., T], *args: Any) -> T:
+        """Run `func(*args)` in a render process, waiting for one to be free.
+
+        `func` and its arguments and result must be picklable. Raises
+        `RenderPoolBusyError` if too many renders are already waiting (or none finishes
+        within the timeout), and `RenderTimeoutError` if the render doesn't finish in
+        time.
+        """
+        if not self._admission.acquire(blocking=False):
+            raise RenderPoolBusyError('Too many plots are being rendered')
+
+        try:
+            try:
+                worker = self._idle.get(timeout=self._timeout_seconds)
+            except queue.Empty:
+                raise RenderPoolBusyError('No render process was free in time')
+            try:
+                succeeded, result, rss_bytes = worker.run(
+                    func,
+                    args,
+                    timeout_seconds=self._timeout_seconds,
+                )
+            except (RenderTimeoutError, RenderWorkerError) as e:
+                app.logger.warning(f'Replacing render process: {e}')
+                worker.stop()
+                self._idle.put(_Worker(self._initializer))
+                raise
+
+            self._idle.put(self._recycle(worker, rss_bytes=rss_bytes))
+        finally:
+            self._admission.release()
+
+        if not succeeded:
+            raise result
+        return result
+
+    def close(self) -> None:
+        """Stop every idle render process."""
+        while True:
+            try:
+                self._idle.get_nowait().stop()
+            except queue.Empty:
+                return
+
+    def _recycle(self, worker: _Worker, *, rss_bytes: int) -> _Worker:
+        """Replace `worker` if it's done its share of renders or uses too much memory."""
+        if worker.jobs < self._max_jobs and rss_bytes <= self._max_rss_bytes:
+            return worker
+
+        app.logger.info(
+            f'Recycling render process after {worker.jobs} renders'
+            f' ({rss_bytes / 2**20:.0f}MiB peak RSS)'
+        )
+        worker.stop()
+        return _Worker(self._initializer)
+
+
+@functools.cache
+def render_pool() -> RenderPool | None:
+    """Start this web worker's render pool on first use, or `None` if it's disabled.
+
+    Started lazily, so each (forked) web worker has its own.
+    """
+    if RENDER_POOL_PROCESSES <= 0:
+        return None
+
+    app.logger.info(f'Starting {RENDER_POOL_PROCESSES} render processes')
+    pool = RenderPool(
+        RENDER_POOL_PROCESSES,
+        max_queued=RENDER_POOL_MAX_QUEUED,
+        timeout_seconds=RENDER_TIMEOUT_SECONDS,
+        max_jobs=RENDER_WORKER_MAX_JOBS,
+        max_rss_bytes=RENDER_WORKER_MAX_RSS_BYTES,
+        initializer=prepare_render_process,
+    )
+    atexit.register(pool.close)
+    return pool
+
+
+def prepare_render_process() -> None:
+    """Import the plotting libraries, and warm their state, before the first render."""
+    from sipn_reanalysis_plots.util.startup import warm_render_state
+
+    warm_render_state()
+
+
+def _worker_main(
+    conn: Any,
+    initializer: Callable[[], None] | None,
+    parent_pid: int,
+) -> None:
+    threading.Thread(
+        target=_exit_with_parent,
+        args=(parent_pid,),
+        name='render-parent-check',
+        daemon=True,
+    ).start()
+    if initializer is not None:
+        initializer()
+    conn.send('started')
+
+    while True:
+        try:
+            func, args = conn.recv()
+        except EOFError:
+            # The web worker has exited
+            return
+
+        _run_job(conn, func, args)
+
+
+def _exit_with_parent(parent_pid: int) -> None:
+    """Exit the render process, even mid-render, once its web worker has exited.
+
+    NOTE: A killed web worker can't stop its render processes, and one stuck in a
+    render wouldn't see its pipe close.
+    """
+    while os.getppid() == parent_pid:
+        time.sleep(_PARENT_CHECK_INTERVAL_SECONDS)
+    os._exit(1)
+
+
+def _run_job(conn: Any, func: Callable[..., Any], args: tuple[Any, ...]) -> None:
+    try:
+        succeeded, result = True, func(*args)
+    except Exception as e:
+        succeeded, result = False, e
+
+    # NOTE: `ru_maxrss` is in KiB on Linux
+    rss_bytes = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    try:
+        conn.send((succeeded, result, rss_bytes))
+    except Exception as e:
+        # e.g. an exception which can't be pickled
+        conn.send((False, RenderWorkerError(repr(e)), rss_bytes))
@@ -0,0 +1,68 @@
+"""Time the stages of each request, for a `Server-Timing` header and a JSON log line.
+
+The total time is also recorded in the request duration metric (see `util/metrics.py`).
+
+Work done while handling a request records itself in the request's timer (see
+`util/timing.py`): e.g. listing and opening data files, dask computes, and drawing and
+encoding plots, including those rendered in the render pool's processes.
+"""
+import contextlib
+import json
+import time
+
+from flask import Response, g, request
+
+from sipn_reanalysis_plots import app
+from sipn_reanalysis_plots.util.metrics import observe_request
+from sipn_reanalysis_plots.util.timing import StageTimer, recording
+
+
+def configure_request_timing() -> None:
+    app.before_request(_start_timer)
+    app.after_request(_report_timer)
+    app.teardown_request(_stop_timer)
+
+
+def _start_timer() -> None:
+    g.timer = StageTimer()
+    g.timer_start = time.perf_counter()
+    g.timer_stack = contextlib.ExitStack()
+    g.timer_stack.enter_context(recording(g.timer))
+
+
+def _report_timer(response: Response) -> Response:
+    timer: StageTimer = g.timer
+    total_seconds = time.perf_counter() - g.timer_start
+    observe_request(total_seconds)
+
+    response.headers['Server-Timing'] = ', '.join(
+        [
+            *([timings] if (timings := timer.server_timing()) else []),
+            f'total;dur={total_seconds * 1000:.1f}',
+        ]
+    )
+
+    app.logger.info(
+        json.dumps(
+            {
+                'method': request.method,
+                'path': request.path,
+                'endpoint': request.endpoint,
+                'params': request.args.to_dict(),
+                'status': response.status_code,
+                'total_ms': round(total_seconds * 1000, 1),
+                'stages_ms': {
+                    name: round(seconds * 1000, 1)
+                    for name, seconds in timer.seconds.items()
+                },
+                # e.g. "files_read" and "input_files"
+                'counts': timer.counts,
+            }
+        )
+    )
+    return response
+
+
+def _stop_timer(exc: BaseException | None) -> None:
+    if (stack := g.pop('timer_stack', None)) is not None:
+        stack.close()
@@ -0,0 +1,73 @@
+"""Warm the expensive, immutable state every plot reuses, before the first request.
+
+Render processes warm it before their first render. With `$STARTUP_PRELOAD`, it's also
+warmed when the app is imported, so with gunicorn's `--preload` the workers it forks
+share it, instead of each building it on its first request.
+
+NOTE: Nothing warmed here may hold open files or threads, which can't be shared with
+forked workers: e.g. data files aren't read, and dask isn't used.
+"""
+import functools
+import time
+
+import numpy as np
+
+from sipn_reanalysis_plots import app
+from sipn_reanalysis_plots.constants.plot import (
+    PLOT_DPI,
+    PLOT_DPI_HIGH_RES,
+    PLOT_ENGINE,
+)
+from sipn_reanalysis_plots.errors import NoDataFoundError
+from sipn_reanalysis_plots.util.data.list import (
+    list_daily_data_paths,
+    list_monthly_data_paths,
+)
+
+# A grid like CFSR's, in meters in the map's projection
+_GRID_EXTENT = 5e6
+_GRID_SIZE = 161
+
+
+def warm_process_state() -> None:
+    """Warm the plotting libraries' state, and list the available data."""
+    start = time.perf_counter()
+    warm_render_state()
+    try:
+        list_daily_data_paths()
+        list_monthly_data_paths()
+    except NoDataFoundError as e:
+        app.logger.warning(f'Availability index not warmed: {e}')
+
+    app.logger.info(f'Warmed process state in {time.perf_counter() - start:.1f}s')
+
+
+# NOTE: Render processes warm on import (with `$STARTUP_PRELOAD`) and before their
+# first render, which needn't render again
+@functools.cache
+def warm_render_state() -> None:
+    """Import the plotting libraries, and render plots of synthetic data.
+
+    Rendering projects the map's extent, gridlines and coastlines (loading the coastline
+    shapefile), and loads the fonts and colormaps, which are kept by the libraries (or
+    `util/map_geometry.py`) for later plots. A plot of anomalies is rendered too, for
+    its colormap.
+    """
+    import xarray as xra
+
+    from sipn_reanalysis_plots.util.plot import PlotData
+    from sipn_reanalysis_plots.util.render import render_plot_data_pngs
+
+    coords = np.linspace(-_GRID_EXTENT, _GRID_EXTENT, _GRID_SIZE)
+    distance = np.hypot(*np.meshgrid(coords, coords)) / _GRID_EXTENT
+    for values in (distance, distance - 0.5):
+        data_array = xra.DataArray(
+            values,
+            coords={'y': coords[::-1], 'x': coords},
+            dims=('y', 'x'),
+        )
+        render_plot_data_pngs(
+            PlotData(data_array=data_array, title='Warming up\n(K)'),
+            engine=PLOT_ENGINE,
+            dpis=[PLOT_DPI, PLOT_DPI_HIGH_RES],
+        )
@@ -0,0 +1,208 @@
+"""Calculate time series of a variable's daily mean over a region.
+
+A series is calculated in chunks of `TIMESERIES_CHUNK_DAYS` days, so memory use is
+bounded however long it is, and yielded as each chunk is done, so responses can stream.
+Each day's mean is cached on disk, keyed by the region and its file's fingerprint, so
+overlapping series (e.g. a season, extended by a day after ingest) only read the days
+they don't share. Days without a file have no mean.
+
+The data libraries are only imported to calculate uncached days.
+"""
+import datetime as dt
+import hashlib
+import itertools
+import json
+import math
+from collections.abc import Iterator
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from sipn_reanalysis_plots._types import Region
+from sipn_reanalysis_plots.constants.cache import TIMESERIES_CACHE_MAX_BYTES
+from sipn_reanalysis_plots.constants.paths import TIMESERIES_CACHE_DIR
+from sipn_reanalysis_plots.constants.timeseries import TIMESERIES_CHUNK_DAYS
+from sipn_reanalysis_plots.constants.variables import VARIABLES
+from sipn_reanalysis_plots.constants.version import VERSION
+from sipn_reanalysis_plots.util.data.list import daily_data_fingerprints
+from sipn_reanalysis_plots.util.date import date_range
+from sipn_reanalysis_plots.util.disk_cache import DiskCache
+from sipn_reanalysis_plots.util.timing import stage
+
+if TYPE_CHECKING:
+    from matplotlib.figure import Figure
+
+timeseries_cache = DiskCache(
+    TIMESERIES_CACHE_DIR,
+    max_bytes=TIMESERIES_CACHE_MAX_BYTES,
+    suffix='.json',
+)
+
+
+@dataclass(frozen=True, kw_only=True)
+class DailyTimeSeriesRequest:
+    start_date: dt.date
+    end_date: dt.date
+    variable: str
+    level: str
+    region: Region
+
+    def __str__(self) -> str:
+        return (
+            f'timeseries/daily/{self.variable}/{self.level}'
+            f'/{self.start_date:%Y%m%d}-{self.end_date:%Y%m%d}/{self.region}'
+        )
+
+    def title(self) -> str:
+        long_name = VARIABLES[self.variable]['long_name']
+        return (
+            f'{long_name} at {self.level}, {self.region.long_name}\n'
+            f'Daily mean, {self.start_date:%Y-%m-%d} to {self.end_date:%Y-%m-%d}'
+        )
+
+
+@dataclass(frozen=True)
+class DailyMean:
+    date: dt.date
+    # None if the day's file is missing, or the region has no data
+    value: float | None
+    units: str | None
+
+
+def daily_means(timeseries_request: DailyTimeSeriesRequest) -> Iterator[DailyMean]:
+    """Calculate (or read from the cache) the series' mean for each day, in order."""
+    dates = list(
+        date_range(timeseries_request.start_date, timeseries_request.end_date),
+    )
+    for start in range(0, len(dates), TIMESERIES_CHUNK_DAYS):
+        chunk = dates[start : start + TIMESERIES_CHUNK_DAYS]
+        yield from _chunk_daily_means(timeseries_request, chunk)
+
+
+def timeseries_etag(timeseries_request: DailyTimeSeriesRequest) -> str:
+    """Identify the series by its request, and the versions of its files and this code."""
+    dates = list(
+        date_range(timeseries_request.start_date, timeseries_request.end_date),
+    )
+    key = '\n'.join(
+        [
+            f'v{VERSION}',
+            str(timeseries_request),
+            *(str(fingerprint) for fingerprint in daily_data_fingerprints(dates)),
+        ]
+    )
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
+def render_daily_means_png(
+    timeseries_request: DailyTimeSeriesRequest,
+    means: list[DailyMean],
+    *,
+    dpi: int,
+) -> bytes:
+    """Plot the series as a line, with gaps for days without a mean."""
+    # NOTE: Imported here so web workers only import matplotlib to plot
+    from sipn_reanalysis_plots.util.fig import fig_to_png
+
+    with stage('plot'):
+        fig = _plot_daily_means(timeseries_request, means)
+    with stage('encode'):
+        return fig_to_png(fig, dpi=dpi)
+
+
+def _plot_daily_means(
+    timeseries_request: DailyTimeSeriesRequest,
+    means: list[DailyMean],
+) -> 'Figure':
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(8, 4))
+    fig.set_layout_engine('tight')
+    ax = fig.subplots()
+    ax.plot(
+        np.array([mean.date for mean in means], dtype='datetime64[D]'),
+        [mean.value if mean.value is not None else float('nan') for mean in means],
+    )
+    ax.set_title(timeseries_request.title())
+    units = next((mean.units for mean in means if mean.units), None)
+    if units:
+        ax.set_ylabel(units)
+    ax.grid(alpha=0.5)
+    fig.autofmt_xdate()
+
+    return fig
+
+
+def _chunk_daily_means(
+    timeseries_request: DailyTimeSeriesRequest,
+    dates: list[dt.date],
+) -> list[DailyMean]:
+    """Read the dates' cached means, and calculate the others in consecutive runs."""
+    fingerprints = daily_data_fingerprints(dates)
+    keys = {
+        date: _cache_key(timeseries_request, date, fingerprint)
+        for date, fingerprint in zip(dates, fingerprints)
+        if fingerprint is not None
+    }
+
+    means: dict[dt.date, DailyMean] = {}
+    with stage('timeseries_cache'):
+        for date, key in keys.items():
+            if (cached := timeseries_cache.get(key)) is not None:
+                means[date] = DailyMean(date, **json.loads(cached))
+
+    uncached = [date for date in keys if date not in means]
+    for run in _consecutive_runs(uncached):
+        for mean in _calculate_daily_means(timeseries_request, run):
+            means[mean.date] = mean
+            timeseries_cache.put(
+                keys[mean.date],
+                json.dumps({'value': mean.value, 'units': mean.units}).encode(),
+            )
+
+    return [means.get(date, DailyMean(date, None, None)) for date in dates]
+
+
+def _calculate_daily_means(
+    timeseries_request: DailyTimeSeriesRequest,
+    dates: list[dt.date],
+) -> list[DailyMean]:
+    # NOTE: Imported here so web workers only import the data libraries to calculate
+    from sipn_reanalysis_plots.util.data.region_means import read_daily_region_means
+
+    values, units = read_daily_region_means(
+        dates[0],
+        dates[-1],
+        variable=timeseries_request.variable,
+        level=timeseries_request.level,
+        region=timeseries_request.region,
+    )
+    return [
+        DailyMean(date, None if math.isnan(value) else float(value), units)
+        for date, value in zip(dates, values)
+    ]
+
+
+def _consecutive_runs(dates: list[dt.date]) -> Iterator[list[dt.date]]:
+    """Split sorted `dates` into runs of consecutive days."""
+    for _, run in itertools.groupby(
+        enumerate(dates),
+        key=lambda item: item[1].toordinal() - item[0],
+    ):
+        yield [date for _, date in run]
+
+
+def _cache_key(
+    timeseries_request: DailyTimeSeriesRequest,
+    date: dt.date,
+    fingerprint: str,
+) -> str:
+    return '\n'.join(
+        [
+            f'v{VERSION}',
+            f'daily/{timeseries_request.variable}/{timeseries_request.level}',
+            str(timeseries_request.region),
+            f'{date:%Y%m%d}:{fingerprint}',
+        ]
+    )
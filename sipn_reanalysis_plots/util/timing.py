@@ -0,0 +1,89 @@
+import contextlib
+import contextvars
+import time
+from collections.abc import Iterator
+
+
+class StageTimer:
+    """Accumulate the time spent in each stage of some work, e.g. rendering a plot.
+
+    Also counts things done in the work, e.g. tasks computed.
+    """
+
+    def __init__(self) -> None:
+        self.seconds: dict[str, float] = {}
+        self.counts: dict[str, int] = {}
+
+    @contextlib.contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.seconds[name] = self.seconds.get(name, 0) + elapsed
+
+    def count(self, name: str, n: int = 1) -> None:
+        self.counts[name] = self.counts.get(name, 0) + n
+
+    def merge(self, other: 'StageTimer') -> None:
+        """Add the times and counts of `other`, e.g. work done in another process."""
+        for name, seconds in other.seconds.items():
+            self.seconds[name] = self.seconds.get(name, 0) + seconds
+        for name, n in other.counts.items():
+            self.count(name, n)
+
+    def server_timing(self) -> str:
+        """Format the stages' times as a `Server-Timing` header value.
+
+        Stages may overlap, e.g. "dask" computes are also part of the "data" stage.
+        """
+        return ', '.join(
+            f'{name};dur={seconds * 1000:.1f}' for name, seconds in self.seconds.items()
+        )
+
+    def __str__(self) -> str:
+        return ' '.join(
+            [
+                *(
+                    f'{name}={seconds * 1000:.0f}ms'
+                    for name, seconds in self.seconds.items()
+                ),
+                *(f'{name}={n}' for name, n in self.counts.items()),
+            ]
+        )
+
+
+_current_timer: contextvars.ContextVar[StageTimer | None] = contextvars.ContextVar(
+    'current_timer',
+    default=None,
+)
+
+
+@contextlib.contextmanager
+def recording(timer: StageTimer) -> Iterator[None]:
+    """Record work which times (or counts) itself in `timer`, in this block and thread.
+
+    e.g. dask computes, and reads of data files.
+    """
+    token = _current_timer.set(timer)
+    try:
+        yield
+    finally:
+        _current_timer.reset(token)
+
+
+def current_timer() -> StageTimer | None:
+    return _current_timer.get()
+
+
+@contextlib.contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time this block as stage `name` of the current timer, if there is one."""
+    timer = current_timer()
+    if timer is None:
+        yield
+        return
+
+    with timer.stage(name):
+        yield
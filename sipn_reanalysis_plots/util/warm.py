@@ -0,0 +1,205 @@
+"""Pre-render the plots most likely to be requested after an ingest.
+
+Most traffic is for the latest day and month, so without warming, the first user after
+each ingest waits for a cold read and render.
+"""
+import datetime as dt
+import functools
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Literal
+
+from sipn_reanalysis_plots import app
+from sipn_reanalysis_plots._types import YearMonth
+from sipn_reanalysis_plots.constants.paths import PLOT_CACHE_WARM_STATE_FILE
+from sipn_reanalysis_plots.constants.plot import PLOT_DPI, PLOT_DPI_HIGH_RES
+from sipn_reanalysis_plots.constants.variables import VARIABLES
+from sipn_reanalysis_plots.util.data.files import cfsr_daily_fps, cfsr_monthly_fps
+from sipn_reanalysis_plots.util.data.list import (
+    data_file_fingerprints,
+    list_daily_data_dates,
+    list_monthly_data_yearmonths,
+)
+from sipn_reanalysis_plots.util.file import atomic_write
+from sipn_reanalysis_plots.util.render import (
+    DailyPlotRequest,
+    MonthlyPlotRequest,
+    PlotRequest,
+    plot_cache,
+    plot_cache_key,
+    render_plot_pngs,
+)
+
+WarmResult = Literal['cached', 'rendered', 'failed']
+
+
+@dataclass(frozen=True)
+class WarmReport:
+    plots: int
+    rendered: int
+    failed: int
+    processes: int
+    seconds: float
+
+    def __str__(self) -> str:
+        return (
+            f'{self.plots} plots ({self.rendered} rendered, {self.failed} failed)'
+            f' in {self.seconds:.1f}s with {self.processes} processes:'
+            f' {self.plots / self.seconds:.2f} plots/s'
+        )
+
+
+def warm_plot_cache(
+    daily_dates: list[dt.date] | None = None,
+    months: list[YearMonth] | None = None,
+    *,
+    limit: int = 7,
+    processes: int | None = None,
+    high_res: bool = False,
+) -> WarmReport:
+    """Render plots of every variable, level and option for the dates and months.
+
+    Call after ingest. Without dates or months, warms the (at most `limit`) latest days
+    and months ingested since the last warm-up, or the latest day and month the first
+    time. With `high_res`, high-res images are rendered too, each from the same drawing
+    of the plot as its low-res image.
+    """
+    started_ns = time.time_ns()
+    fingerprints = data_fingerprints()
+    if daily_dates is None and months is None:
+        daily_dates, months = newly_ingested_data(fingerprints, limit=limit)
+
+    plot_requests = _plot_requests(daily_dates or [], months or [])
+    dpis = (PLOT_DPI, PLOT_DPI_HIGH_RES) if high_res else (PLOT_DPI,)
+    processes = processes or _host_cpus()
+    app.logger.info(f'Warming {len(plot_requests)} plots with {processes} processes')
+
+    # NOTE: "spawn" avoids forking a parent which may hold HDF5 or dask state
+    with ProcessPoolExecutor(
+        max_workers=processes,
+        mp_context=multiprocessing.get_context('spawn'),
+    ) as pool:
+        results = list(
+            pool.map(functools.partial(_warm_plot, dpis=dpis), plot_requests),
+        )
+
+    _write_warmed_fingerprints(fingerprints)
+    return WarmReport(
+        plots=len(results),
+        rendered=results.count('rendered'),
+        failed=results.count('failed'),
+        processes=processes,
+        seconds=(time.time_ns() - started_ns) / 1e9,
+    )
+
+
+def data_fingerprints() -> dict[str, str]:
+    """Fingerprint every daily and monthly file, keyed by its name."""
+    paths = [
+        *(cfsr_daily_fps(date)[0] for date in list_daily_data_dates()),
+        *(cfsr_monthly_fps(month)[0] for month in list_monthly_data_yearmonths()),
+    ]
+    return {p.name: str(f) for p, f in zip(paths, data_file_fingerprints(paths))}
+
+
+def newly_ingested_data(
+    fingerprints: dict[str, str],
+    *,
+    limit: int,
+) -> tuple[list[dt.date], list[YearMonth]]:
+    """List the latest days and months whose files changed since the last warm-up.
+
+    A file is new if its fingerprint (from `data_fingerprints`) differs from the one
+    recorded by the last warm-up. Comparing mtimes to the warm-up's time would miss
+    files copied with their mtimes preserved (e.g. by `rsync -a`).
+    """
+    daily_dates = list_daily_data_dates()
+    months = list_monthly_data_yearmonths()
+
+    warmed = _read_warmed_fingerprints()
+    if warmed is None:
+        return daily_dates[-1:], months[-1:]
+
+    def is_new(name: str) -> bool:
+        return fingerprints.get(name) != warmed.get(name)
+
+    new_daily_dates = [d for d in daily_dates if is_new(cfsr_daily_fps(d)[0].name)]
+    new_months = [m for m in months if is_new(cfsr_monthly_fps(m)[0].name)]
+    return new_daily_dates[-limit:], new_months[-limit:]
+
+
+def _plot_requests(
+    daily_dates: list[dt.date],
+    months: list[YearMonth],
+) -> list[PlotRequest]:
+    options = [
+        (variable, level, contour, anomaly)
+        for variable, props in VARIABLES.items()
+        for level in props['levels']
+        for contour in (False, True)
+        for anomaly in (False, True)
+    ]
+    daily_requests = [
+        DailyPlotRequest(
+            start_date=date,
+            variable=variable,
+            level=level,
+            contour=contour,
+            anomaly=anomaly,
+        )
+        for date in daily_dates
+        for variable, level, contour, anomaly in options
+    ]
+    monthly_requests = [
+        MonthlyPlotRequest(
+            start_month=month,
+            variable=variable,
+            level=level,
+            contour=contour,
+            anomaly=anomaly,
+        )
+        for month in months
+        for variable, level, contour, anomaly in options
+    ]
+    return [*daily_requests, *monthly_requests]
+
+
+def _warm_plot(plot_request: PlotRequest, *, dpis: tuple[int, ...]) -> WarmResult:
+    try:
+        cache_key = plot_cache_key(plot_request)
+        if all(plot_cache.path(cache_key.for_dpi(dpi)).exists() for dpi in dpis):
+            return 'cached'
+
+        render_plot_pngs(plot_request, dpis=dpis, cache_key=cache_key)
+    except Exception as e:
+        app.logger.warning(f'Failed to warm {plot_request}: {e!r}')
+        return 'failed'
+
+    return 'rendered'
+
+
+def _host_cpus() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        # Not available on all platforms
+        return os.cpu_count() or 1
+
+
+def _read_warmed_fingerprints() -> dict[str, str] | None:
+    try:
+        state = json.loads(PLOT_CACHE_WARM_STATE_FILE.read_text())
+    except FileNotFoundError:
+        return None
+    # NOTE: Older warm-ups only recorded when they started
+    return state.get('fingerprints')
+
+
+def _write_warmed_fingerprints(fingerprints: dict[str, str]) -> None:
+    PLOT_CACHE_WARM_STATE_FILE.parent.mkdir(parents=True, exist_ok=True)
+    with atomic_write(PLOT_CACHE_WARM_STATE_FILE, 'w') as f:
+        json.dump({'fingerprints': fingerprints}, f)
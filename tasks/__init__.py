@@ -1,10 +1,16 @@
 from invoke import Collection
 
-from . import env
+from . import benchmark, cache, climatology, cumulative, env
 from . import format as format_
-from . import test
+from . import manifest, test, zarr_store
 
 ns = Collection()
+ns.add_collection(benchmark)
+ns.add_collection(cache)
+ns.add_collection(climatology)
+ns.add_collection(cumulative)
 ns.add_collection(env)
 ns.add_collection(format_)
+ns.add_collection(manifest)
 ns.add_collection(test)
+ns.add_collection(zarr_store)
@@ -0,0 +1,121 @@
+import datetime as dt
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+from invoke import task
+from invoke.exceptions import Exit
+
+from .util import PROJECT_DIR
+
+sys.path.append(str(PROJECT_DIR))
+
+# WARNING: Do not import from sipn_reanalysis_plots at this level to avoid failure of basic
+# commands because unneeded envvars are not populated. Here, `$DATA_DIR` and `$CACHE_DIR`
+# are set before it's imported.
+
+DEFAULT_DATA_DIR = str(Path(tempfile.gettempdir()) / 'sipn-reanalysis-plots-benchmark')
+
+
+@task
+def generate(ctx, data_dir=DEFAULT_DATA_DIR, days=None, grid_size=161):
+    """Generate a tree of synthetic data to benchmark with.
+
+    Has as many daily files as the real archive by default; pass `--days` for fewer, and
+    `--grid-size` for a smaller (or larger) grid.
+    """
+    from sipn_reanalysis_plots.benchmark.synthetic_data import (
+        DEFAULT_DAYS,
+        generate_data_tree,
+    )
+
+    generate_data_tree(
+        Path(data_dir),
+        days=int(days) if days else DEFAULT_DAYS,
+        grid_size=int(grid_size),
+    )
+
+    print(f'🎉🧪 Synthetic data generated: {data_dir}')
+
+
+@task(
+    help={
+        'output': 'JSON file to save results to',
+        'baseline': "A previous run's JSON results, to flag regressions against",
+        'only': 'Only run benchmarks whose names start with this, e.g. "read/"',
+    },
+)
+def run(
+    ctx,
+    data_dir=DEFAULT_DATA_DIR,
+    output=None,
+    baseline=None,
+    repeat=5,
+    only=None,
+    threshold=0.2,
+):
+    """Time each stage of serving a plot, against synthetic data.
+
+    Generates the data first if `--data-dir` doesn't exist. Fails if any benchmark is
+    more than `--threshold` (a fraction) slower than in `--baseline`.
+    """
+    os.environ['DATA_DIR'] = data_dir
+    os.environ['CACHE_DIR'] = tempfile.mkdtemp(prefix='sipn-reanalysis-plots-cache-')
+    if not Path(data_dir).exists():
+        generate(ctx, data_dir=data_dir)
+
+    from sipn_reanalysis_plots.benchmark.suite import run_benchmarks
+
+    results = run_benchmarks(repeat=int(repeat), only=only)
+
+    output = output or f'benchmark-{dt.datetime.now():%Y%m%dT%H%M%S}.json'
+    Path(output).write_text(json.dumps(results, indent=2))
+    print(f'🎉⏱️  Benchmark results saved: {output}')
+
+    if baseline:
+        compare(ctx, baseline, output, threshold=threshold)
+
+
+@task
+def startup(ctx, data_dir=DEFAULT_DATA_DIR, repeat=3):
+    """Time a web worker's startup and first plot, with and without preloading.
+
+    Preloading is `$STARTUP_PRELOAD` with gunicorn's `--preload`.
+    """
+    os.environ['DATA_DIR'] = data_dir
+    os.environ['CACHE_DIR'] = tempfile.mkdtemp(prefix='sipn-reanalysis-plots-cache-')
+    if not Path(data_dir).exists():
+        generate(ctx, data_dir=data_dir)
+
+    from sipn_reanalysis_plots.benchmark.startup import first_plot_url, measure_startup
+
+    url = first_plot_url()
+    print(f'Starting a worker to serve {url}:')
+    for name, preload in (('Lazy imports', False), ('Preloaded', True)):
+        seconds = measure_startup(url, preload=preload, repeat=int(repeat))
+        print(
+            f'  {name}: import {seconds["import"]:.2f}s,'
+            f' first request {seconds["first_request"]:.2f}s,'
+            f' worker ready to respond {seconds["worker"]:.2f}s'
+        )
+
+
+@task
+def compare(ctx, baseline, results, threshold=0.2):
+    """Flag benchmarks more than `--threshold` (a fraction) slower than in `baseline`."""
+    from sipn_reanalysis_plots.benchmark.suite import compare_results
+
+    regressions = compare_results(
+        json.loads(Path(baseline).read_text()),
+        json.loads(Path(results).read_text()),
+        threshold=float(threshold),
+    )
+    if regressions:
+        raise Exit(
+            '💥🐢 Regressions since baseline:\n' + '\n'.join(regressions),
+            code=1,
+        )
+
+    print('🎉🐇 No regressions since baseline.')
@@ -0,0 +1,38 @@
+import datetime as dt
+import sys
+
+from invoke import task
+
+from .util import PROJECT_DIR
+
+sys.path.append(str(PROJECT_DIR))
+
+# WARNING: Do not import from sipn_reanalysis_plots at this level to avoid failure of basic
+# commands because unneeded envvars are not populated.
+
+
+@task(iterable=['date', 'month'])
+def warm(ctx, date, month, limit=7, processes=None, high_res=False):
+    """Pre-render plots of newly ingested data into the plot cache.
+
+    Run after ingest. By default, warms the latest days and months ingested since the
+    last run. Pass `--date` (YYYY-MM-DD) or `--month` (YYYY-MM) to warm specific ones,
+    and `--high-res` to render high-res images too.
+    """
+    from sipn_reanalysis_plots._types import YearMonth
+    from sipn_reanalysis_plots.util.warm import warm_plot_cache
+
+    daily_dates = months = None
+    if date or month:
+        daily_dates = [dt.date.fromisoformat(d) for d in date]
+        months = [YearMonth(year=int(m[:4]), month=int(m[5:7])) for m in month]
+
+    report = warm_plot_cache(
+        daily_dates,
+        months,
+        limit=int(limit),
+        processes=int(processes) if processes else None,
+        high_res=high_res,
+    )
+
+    print(f'🎉🔥 Plot cache warmed: {report}')
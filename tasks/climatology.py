@@ -0,0 +1,25 @@
+import sys
+
+from invoke import task
+
+from .util import PROJECT_DIR
+
+sys.path.append(str(PROJECT_DIR))
+
+# WARNING: Do not import from sipn_reanalysis_plots at this level to avoid failure of basic
+# commands because unneeded envvars are not populated.
+
+
+@task(default=True)
+def build(ctx):
+    """Build the memory-mapped climatology blocks for every variable and level.
+
+    Run after deploying a new climatology file, so the first anomaly requests don't have
+    to wait for blocks to be built.
+    """
+    from sipn_reanalysis_plots.constants.paths import CLIMATOLOGY_STORE_DIR
+    from sipn_reanalysis_plots.util.data.climatology_store import preload_climatology
+
+    preload_climatology(build=True)
+
+    print(f'🎉🌡️ Climatology blocks built: {CLIMATOLOGY_STORE_DIR}')
@@ -0,0 +1,28 @@
+import datetime as dt
+import sys
+
+from invoke import task
+
+from .util import PROJECT_DIR
+
+sys.path.append(str(PROJECT_DIR))
+
+# WARNING: Do not import from sipn_reanalysis_plots at this level to avoid failure of basic
+# commands because unneeded envvars are not populated.
+
+
+@task(default=True)
+def extend(ctx, start_date=None):
+    """Extend the cumulative store with newly ingested (or re-ingested) daily data.
+
+    Run after ingest. Pass `--start-date` (YYYY-MM-DD) to limit how far back a new store
+    reaches; changing it for an existing store rebuilds it.
+    """
+    from sipn_reanalysis_plots.constants.paths import CUMULATIVE_STORE_DIR
+    from sipn_reanalysis_plots.util.data.cumulative_store import extend_cumulative_store
+
+    num_days = extend_cumulative_store(
+        dt.date.fromisoformat(start_date) if start_date else None,
+    )
+
+    print(f'🎉➕ Cumulative store extended by {num_days} days: {CUMULATIVE_STORE_DIR}')
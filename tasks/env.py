@@ -8,10 +8,19 @@ ENV_LOCKFILE = PROJECT_DIR / "environment-lock.yml"
 @task(default=True, aliases=['export'])
 def lock(ctx):
     """Update the environment-lock.yml file from the current `sipn-reanalysis-plots` environment."""
-    print_and_run(f"conda env export -n sipn-reanalysis-plots > {ENV_LOCKFILE}")
-
-    with open(ENV_LOCKFILE, "r") as f:
-        lines = f.readlines()
+    result = print_and_run(
+        "conda env export -n sipn-reanalysis-plots",
+        pty=False,
+        hide='out',
+    )
+    lines = result.stdout.splitlines(keepends=True)
+
+    # NOTE: `conda env export` succeeds, without listing any packages, if the
+    # environment doesn't exist. Don't overwrite the lockfile with that.
+    if not any(line.startswith('dependencies:') for line in lines):
+        raise RuntimeError(
+            'No packages exported; create the environment from environment.yml first'
+        )
 
     with open(ENV_LOCKFILE, "w") as f:
         for line in lines:
@@ -0,0 +1,25 @@
+import sys
+
+from invoke import task
+
+from .util import PROJECT_DIR
+
+sys.path.append(str(PROJECT_DIR))
+
+# WARNING: Do not import from sipn_reanalysis_plots at this level to avoid failure of basic
+# commands because unneeded envvars are not populated.
+
+
+@task(iterable=['path'], default=True)
+def update(ctx, path):
+    """Update the data manifest after ingest.
+
+    Pass `--path` once for each newly ingested (or removed) file for a quick incremental
+    update. Without `--path`, the data directories are re-listed in full.
+    """
+    from sipn_reanalysis_plots.constants.paths import DATA_MANIFEST_FILE
+    from sipn_reanalysis_plots.util.data.manifest import update_manifest
+
+    update_manifest(path or None)
+
+    print(f'🎉📜 Manifest updated: {DATA_MANIFEST_FILE}')
@@ -0,0 +1,69 @@
+import datetime as dt
+import sys
+import time
+
+from invoke import task
+
+from .util import PROJECT_DIR
+
+sys.path.append(str(PROJECT_DIR))
+
+# WARNING: Do not import from sipn_reanalysis_plots at this level to avoid failure of basic
+# commands because unneeded envvars are not populated.
+
+
+@task(default=True)
+def extend(ctx, start_date=None):
+    """Extend the Zarr store with newly ingested (or re-ingested) daily data.
+
+    Run after ingest. Pass `--start-date` (YYYY-MM-DD) to limit how far back a new store
+    reaches; changing it for an existing store rebuilds it.
+    """
+    from sipn_reanalysis_plots.constants.paths import ZARR_STORE_DIR
+    from sipn_reanalysis_plots.util.data.zarr_store import extend_zarr_store
+
+    num_days = extend_zarr_store(
+        dt.date.fromisoformat(start_date) if start_date else None,
+    )
+
+    print(f'🎉➕ Zarr store extended by {num_days} days: {ZARR_STORE_DIR}')
+
+
+@task
+def benchmark(ctx, days=30, variable='T', level='2m', repeat=5):
+    """Compare reading the latest range of `--days` days from the Zarr store and files.
+
+    Each read reduces the range to a single grid, as a plot does, without the grid
+    store. Extend the Zarr store first.
+    """
+    from sipn_reanalysis_plots.util.data.list import max_daily_data_date
+    from sipn_reanalysis_plots.util.data.read import read_cfsr_daily_files
+    from sipn_reanalysis_plots.util.data.reduce import reduce_dataset
+    from sipn_reanalysis_plots.util.data.zarr_store import (
+        read_zarr_store,
+        zarr_store_covers,
+    )
+
+    end_date = max_daily_data_date()
+    start_date = end_date - dt.timedelta(days=int(days) - 1)
+    if not zarr_store_covers(start_date, end_date):
+        raise RuntimeError(f'Zarr store does not cover {start_date} to {end_date}')
+
+    print(f'Reading {variable} at {level} from {start_date} to {end_date}:')
+    for name, opener in (('Zarr', read_zarr_store), ('NetCDF', read_cfsr_daily_files)):
+        seconds = []
+        for _ in range(int(repeat)):
+            start = time.perf_counter()
+            with opener(
+                start_date=start_date,
+                end_date=end_date,
+                variable=variable,
+                level=level,
+            ) as dataset:
+                reduce_dataset(dataset, variable=variable, level=level).compute()
+            seconds.append(time.perf_counter() - start)
+
+        print(
+            f'  {name}: best {min(seconds) * 1000:.0f}ms,'
+            f' worst {max(seconds) * 1000:.0f}ms of {repeat}'
+        )